@@ -0,0 +1,105 @@
+"""
+让基准测试脱离AstrBot运行：把仓库注册为 data.plugins.astrbot_plugin_battlefield_tool 包，
+未安装AstrBot时提供插件用到的 astrbot.api 替身(logger、filter、Star、StarTools等)
+"""
+
+from pathlib import Path
+
+import logging
+import sys
+import tempfile
+import types
+
+REPO_ROOT = Path(__file__).parent.parent.resolve()
+PACKAGE = "data.plugins.astrbot_plugin_battlefield_tool"
+
+
+def _register_package(name: str, path=None):
+    if name in sys.modules:
+        return sys.modules[name]
+    module = types.ModuleType(name)
+    module.__path__ = [str(path)] if path is not None else []
+    sys.modules[name] = module
+    return module
+
+
+class _Filter:
+    """只保留处理函数本身，不做命令注册"""
+
+    @staticmethod
+    def command(name, alias=None, **kwargs):
+        return lambda func: func
+
+
+class MessageChain:
+    def __init__(self):
+        self.chain = []
+
+    def message(self, text: str):
+        self.chain.append(text)
+        return self
+
+
+class AstrMessageEvent:
+    """仅用于类型标注，压测时使用 loadtest.FakeEvent"""
+
+
+class Context:
+    async def send_message(self, session_origin, message_chain):
+        return True
+
+
+class Star:
+    def __init__(self, context):
+        self.context = context
+
+    async def html_render(self, tmpl, data, return_url=True, options=None):
+        raise NotImplementedError("基准测试中需替换 html_render")
+
+
+class StarTools:
+    # 数据目录的根目录，可在运行前修改
+    data_root = Path(tempfile.gettempdir()) / "bf_tool_benchmark"
+
+    @classmethod
+    def get_data_dir(cls, name: str) -> Path:
+        path = cls.data_root / name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+def _register(*args, **kwargs):
+    return lambda cls: cls
+
+
+def _install_astrbot_stubs():
+    astrbot = _register_package("astrbot")
+    api = _register_package("astrbot.api")
+    api.logger = logging.getLogger("astrbot")
+    astrbot.api = api
+
+    event = _register_package("astrbot.api.event")
+    event.filter = _Filter()
+    event.AstrMessageEvent = AstrMessageEvent
+    event.MessageChain = MessageChain
+
+    star = _register_package("astrbot.api.star")
+    star.Context = Context
+    star.Star = Star
+    star.StarTools = StarTools
+    star.register = _register
+
+    api_all = _register_package("astrbot.api.all")
+    api_all.AstrBotConfig = dict
+    api.event, api.star, api.all = event, star, api_all
+
+
+def setup():
+    """注册插件包，重复调用无副作用"""
+    _register_package("data")
+    _register_package("data.plugins")
+    _register_package(PACKAGE, REPO_ROOT)
+    try:
+        import astrbot.api  # noqa: F401
+    except ImportError:
+        _install_astrbot_stubs()
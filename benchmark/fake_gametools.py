@@ -0,0 +1,190 @@
+"""
+模拟 api.gametools.network 的本地服务，返回 benchmark/fixtures 中的数据，可设置延迟、错误率和429比例
+
+    python benchmark/fake_gametools.py --port 8780 --latency 0.2 --error-rate 0.02 --rate-429 0.05
+
+把插件的 api_sites 配置为 http://127.0.0.1:8780/ 即可让插件请求本服务。
+玩家接口(all/stats/weapons/vehicles)按请求的name返回对应玩家名，服务器接口按name过滤服务器。
+GET /__stats 返回各接口的请求次数和状态码统计。
+"""
+
+from aiohttp import web
+from pathlib import Path
+from typing import Dict, Optional
+
+import argparse
+import asyncio
+import json
+import random
+import zlib
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+GAMES = ("bf1", "bfv", "bf4", "bf3")
+# 接口 -> 使用的样例数据，stats与all返回相同的玩家数据
+PLAYER_PROPS = {"all": "all", "stats": "all", "weapons": "weapons", "vehicles": "vehicles"}
+NAME_PLACEHOLDER = "__BENCH_NAME__"
+USER_ID_PLACEHOLDER = "__BENCH_USER_ID__"
+
+
+class FakeGametools:
+    """按设置的延迟和错误比例返回样例数据"""
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: float = 1,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency: 响应延迟的中位数(秒)
+            latency_sigma: 延迟对数正态分布的sigma，越大长尾越明显
+            error_rate: 返回500的比例
+            rate_429: 返回429的比例
+            retry_after: 429响应的Retry-After(秒)
+            seed: 随机种子
+        """
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        # (prop, status) -> 次数
+        self.counts: Dict[str, int] = {}
+        self._players: Dict[tuple, bytes] = {}
+        self._servers: Dict[str, list] = {}
+        for game in GAMES:
+            for prop in ("all", "weapons", "vehicles"):
+                data = json.loads((FIXTURE_DIR / f"{game}_{prop}.json").read_text(encoding="utf-8"))
+                data["userName"] = NAME_PLACEHOLDER
+                data["userId"] = USER_ID_PLACEHOLDER
+                # 预先序列化，请求时只替换玩家名，避免压测时服务端成为瓶颈
+                self._players[(game, prop)] = json.dumps(data, ensure_ascii=False).encode()
+            servers = json.loads((FIXTURE_DIR / f"{game}_servers.json").read_text(encoding="utf-8"))
+            self._servers[game] = servers["servers"]
+
+    def _count(self, prop: str, status: int):
+        key = f"{prop}:{status}"
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _player_body(self, game: str, prop: str, name: str) -> bytes:
+        user_id = zlib.crc32(name.lower().encode()) + 10**9
+        return (
+            self._players[(game, PLAYER_PROPS[prop])]
+            .replace(json.dumps(NAME_PLACEHOLDER).encode(), json.dumps(name, ensure_ascii=False).encode())
+            .replace(json.dumps(USER_ID_PLACEHOLDER).encode(), str(user_id).encode())
+        )
+
+    def _servers_body(self, game: str, name: str, limit: int) -> bytes:
+        name = "".join(name.lower().split())
+        servers = [
+            s for s in self._servers[game] if name in "".join(s["prefix"].lower().split())
+        ]
+        return json.dumps({"servers": servers[:limit]}, ensure_ascii=False).encode()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        game = request.match_info["game"]
+        prop = request.match_info["prop"]
+        await asyncio.sleep(self.latency * self.random.lognormvariate(0, self.latency_sigma))
+
+        roll = self.random.random()
+        if roll < self.rate_429:
+            self._count(prop, 429)
+            return web.json_response(
+                {"errors": ["Too many requests"]},
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        if roll < self.rate_429 + self.error_rate:
+            self._count(prop, 500)
+            return web.json_response({"errors": ["Internal server error"]}, status=500)
+        if game not in GAMES or (prop not in PLAYER_PROPS and prop != "servers"):
+            self._count(prop, 404)
+            return web.json_response({"errors": [f"unknown endpoint {game}/{prop}"]}, status=404)
+
+        name = request.query.get("name", "")
+        if prop == "servers":
+            body = self._servers_body(game, name, int(request.query.get("limit", 10)))
+        elif not name:
+            self._count(prop, 400)
+            return web.json_response({"errors": ["name is required"]}, status=400)
+        else:
+            body = self._player_body(game, prop, name)
+        self._count(prop, 200)
+        return web.Response(body=body, content_type="application/json")
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.counts)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/__stats", self.stats)
+        app.router.add_get("/{game}/{prop}", self.handle)
+        app.router.add_get("/{game}/{prop}/", self.handle)
+        return app
+
+
+async def _serve(host: str, port: int, options: dict, ready=None):
+    runner = web.AppRunner(FakeGametools(**options).create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    if ready is not None:
+        ready.put(port)
+    else:
+        print(f"fake gametools 已启动: http://{host}:{port}/")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def serve(host: str, port: int, options: dict, ready=None):
+    """
+    启动服务并一直运行，供子进程调用
+    Args:
+        host: 监听地址
+        port: 端口，为0时随机选择
+        options: FakeGametools的参数
+        ready: 启动后写入实际端口的队列
+    """
+    try:
+        asyncio.run(_serve(host, port, options, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.1, help="接口延迟中位数(秒)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="延迟长尾程度")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回500的比例")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="返回429的比例")
+    parser.add_argument("--retry-after", type=float, default=1, help="429的Retry-After(秒)")
+
+
+def options_from_args(args) -> dict:
+    return {
+        "latency": args.latency,
+        "latency_sigma": args.latency_sigma,
+        "error_rate": args.error_rate,
+        "rate_429": args.rate_429,
+        "retry_after": args.retry_after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟 api.gametools.network 的本地服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    add_arguments(parser)
+    args = parser.parse_args()
+    serve(args.host, args.port, options_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
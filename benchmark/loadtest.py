@@ -0,0 +1,376 @@
+"""
+BattlefieldTool 的端到端压力测试，无需网络和AstrBot
+
+模拟多个群和用户并发发送 stat/weapons/vehicles/servers/bind 命令，直接调用插件的命令处理方法。
+接口由子进程中的 fake_gametools 提供(可设置延迟、错误率和429比例)，html_render 替换为固定耗时的桩函数。
+结束后输出吞吐量、各命令的p50/p99耗时和内存峰值：
+
+    python benchmark/loadtest.py                                   # 默认参数
+    python benchmark/loadtest.py --requests 5000 --concurrency 200 # 提高并发
+    python benchmark/loadtest.py --rate 50 --duration 60           # 按固定速率发送，模拟高峰
+    python benchmark/loadtest.py --latency 0.5 --error-rate 0.05 --rate-429 0.02
+
+数据库、渲染缓存等写入临时目录，每次运行都从空数据开始。
+"""
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bootstrap import setup  # noqa: E402
+
+setup()
+
+import aiohttp  # noqa: E402
+import fake_gametools  # noqa: E402
+from astrbot.api import logger  # noqa: E402
+from data.plugins.astrbot_plugin_battlefield_tool import main as plugin_main  # noqa: E402
+from data.plugins.astrbot_plugin_battlefield_tool.utils.requestUtil import (  # noqa: E402
+    get_cache_stats,
+)
+
+COMMANDS = ("stat", "weapons", "vehicles", "servers", "bind")
+DEFAULT_MIX = "stat:40,weapons:20,vehicles:15,servers:15,bind:10"
+GAME_WEIGHTS = {"bfv": 40, "bf1": 40, "bf4": 15, "bf3": 5}
+# 不含命令别名(如"服务器")的服务器名关键字，解析命令时别名会被去掉
+SERVER_QUERIES = ("中文", "萌新友好", "禁止载具狗", "BENCH", "02")
+
+
+class FakeEvent:
+    """只实现插件用到的 AstrMessageEvent 方法"""
+
+    def __init__(self, message_str: str, sender_id: str, group_id: Optional[str] = None):
+        self.message_str = message_str
+        self._sender_id = sender_id
+        self._group_id = group_id
+        message_type = "GroupMessage" if group_id else "FriendMessage"
+        self.unified_msg_origin = f"bench:{message_type}:{group_id or sender_id}"
+
+    def get_sender_id(self) -> str:
+        return self._sender_id
+
+    def get_group_id(self) -> str:
+        return self._group_id or ""
+
+    def is_private_chat(self) -> bool:
+        return self._group_id is None
+
+    def is_admin(self) -> bool:
+        return False
+
+    @staticmethod
+    def plain_result(text: str):
+        return "text", text
+
+    @staticmethod
+    def image_result(url: str):
+        return "image", url
+
+
+class FakeContext:
+    """只实现插件用到的 Context 方法，服务器订阅的通知直接丢弃"""
+
+    async def send_message(self, session_origin, message_chain):
+        return True
+
+
+class BenchTool(plugin_main.BattlefieldTool):
+    """html_render 替换为桩函数，按设置的耗时返回图片地址或本地文件"""
+
+    render_latency = 0.05
+
+    async def html_render(self, tmpl, data, return_url=True, options=None):
+        await asyncio.sleep(self.render_latency)
+        if return_url:
+            return f"https://render.invalid/{uuid.uuid4().hex}.jpg"
+        path = self.bf_data_path / "stub_render" / f"{uuid.uuid4().hex}.jpg"
+        path.parent.mkdir(exist_ok=True)
+        # 渲染缓存按文件大小淘汰，写入与页面长度相当的内容
+        path.write_bytes(b"\xff\xd8" + bytes(min(len(tmpl), 256 * 1024)))
+        return str(path)
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for item in text.split(","):
+        command, _, weight = item.partition(":")
+        if command not in COMMANDS:
+            raise ValueError(f"不支持的命令: {command}，可选: {','.join(COMMANDS)}")
+        mix[command] = int(weight or 1)
+    return mix
+
+
+def build_workload(args, rng: random.Random) -> List[tuple]:
+    """
+    生成请求序列
+    Returns:
+        [(命令, FakeEvent)]
+    """
+    mix = parse_mix(args.mix)
+    commands, weights = list(mix), list(mix.values())
+    games, game_weights = list(GAME_WEIGHTS), list(GAME_WEIGHTS.values())
+    players = [f"Bench{i:04d}" for i in range(args.players)]
+    users = [
+        (f"{100000 + g * args.users + u}", f"{900000 + g}")
+        for g in range(args.groups)
+        for u in range(args.users)
+    ]
+    total = args.requests
+    if args.rate > 0 and args.duration > 0:
+        total = int(args.rate * args.duration)
+
+    workload = []
+    for _ in range(total):
+        command = rng.choices(commands, weights)[0]
+        qq_id, group_id = rng.choice(users)
+        if rng.random() < args.private_ratio:
+            group_id = None
+        game = rng.choices(games, game_weights)[0]
+        suffix = f",game={game}" if rng.random() < 0.5 else ""
+        if command == "bind":
+            message = f"bind {rng.choice(players)}"
+        elif command == "servers":
+            message = f"servers {rng.choice(SERVER_QUERIES)}{suffix}"
+        elif rng.random() < args.bound_ratio:
+            # 不带玩家名，使用已绑定的账号
+            message = f"{command}{' ' + suffix if suffix else ''}"
+        else:
+            message = f"{command} {rng.choice(players)}{suffix}"
+        workload.append((command, FakeEvent(message, qq_id, group_id)))
+    return workload
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Recorder:
+    """记录每个请求的耗时和结果"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {c: [] for c in COMMANDS}
+        self.outcomes: Dict[str, Counter] = {c: Counter() for c in COMMANDS}
+        self.texts = Counter()
+
+    async def run(self, plugin: BenchTool, command: str, event: FakeEvent):
+        handler = getattr(plugin, f"bf_{command}")
+        start = time.perf_counter()
+        outcome = "none"
+        try:
+            async for kind, content in handler(event):
+                outcome = kind
+                if kind == "text":
+                    # 玩家名等数字替换掉，相同类型的回复合并统计
+                    self.texts[re.sub(r"\d+", "N", content.splitlines()[0])[:60]] += 1
+        except Exception as e:
+            outcome = "exception"
+            self.texts[f"{type(e).__name__}: {e}"[:60]] += 1
+        self.latencies[command].append(time.perf_counter() - start)
+        self.outcomes[command][outcome] += 1
+
+
+async def run_closed_loop(plugin, recorder: Recorder, workload: List[tuple], concurrency: int):
+    """固定数量的用户连续发送，上一条处理完才发下一条"""
+    queue = iter(workload)
+
+    async def worker():
+        for command, event in queue:
+            await recorder.run(plugin, command, event)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def run_open_loop(plugin, recorder: Recorder, workload: List[tuple], rate: float, rng):
+    """按泊松分布的间隔发送，不等待前面的请求完成"""
+    tasks = []
+    next_at = time.perf_counter()
+    for command, event in workload:
+        next_at += rng.expovariate(rate)
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(recorder.run(plugin, command, event)))
+    await asyncio.gather(*tasks)
+
+
+def start_fake_gametools(args) -> tuple:
+    """在子进程中启动 fake_gametools，避免与插件争抢事件循环"""
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    process = ctx.Process(
+        target=fake_gametools.serve,
+        args=("127.0.0.1", 0, fake_gametools.options_from_args(args), ready),
+        daemon=True,
+    )
+    process.start()
+    port = ready.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}/"
+
+
+async def fetch_server_stats(site: str) -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(site + "__stats") as response:
+            return await response.json()
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def report(recorder: Recorder, elapsed: float, server_stats: dict, plugin, args, traced_peak):
+    total = sum(len(v) for v in recorder.latencies.values())
+    print(f"\n请求数: {total}  耗时: {elapsed:.2f}s  吞吐量: {total / elapsed:.1f} 请求/秒")
+    print(
+        f"{'命令':<10}{'次数':>6}{'图片':>6}{'文本':>6}{'异常':>6}"
+        f"{'p50(ms)':>10}{'p99(ms)':>10}{'最大(ms)':>10}"
+    )
+    everything = []
+    for command in COMMANDS:
+        latencies = recorder.latencies[command]
+        if not latencies:
+            continue
+        everything += latencies
+        outcomes = recorder.outcomes[command]
+        print(
+            f"{command:<12}{len(latencies):>6}{outcomes['image']:>6}{outcomes['text']:>6}"
+            f"{outcomes['exception']:>6}{percentile(latencies, 0.5) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.99) * 1000:>10.1f}{max(latencies) * 1000:>10.1f}"
+        )
+    print(
+        f"{'全部':<10}{len(everything):>6}{'':>18}"
+        f"{percentile(everything, 0.5) * 1000:>16.1f}"
+        f"{percentile(everything, 0.99) * 1000:>10.1f}{max(everything, default=0) * 1000:>10.1f}"
+    )
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"\n进程内存峰值(RSS): {rss:.1f}MB")
+    if traced_peak is not None:
+        print(f"Python分配峰值(tracemalloc): {traced_peak / 1024 / 1024:.1f}MB")
+
+    print("\n回复的文本(前5种):")
+    for text, count in recorder.texts.most_common(5):
+        print(f"  {count:>6}  {text}")
+    print(f"\n接口请求(接口:状态码): {json.dumps(server_stats, sort_keys=True)}")
+    cache = get_cache_stats()
+    print(f"接口缓存: {json.dumps(cache, ensure_ascii=False, default=str)}")
+    if plugin.render_cache is not None:
+        print(f"渲染缓存: {json.dumps(plugin.render_cache.stats(), ensure_ascii=False)}")
+    if args.show_metrics:
+        print("\n插件各阶段耗时:")
+        for line in plugin.metrics.summary():
+            print(f"  {line}")
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    process, site = start_fake_gametools(args)
+    data_dir = tempfile.TemporaryDirectory(prefix="bf_tool_load_")
+
+    def get_data_dir(name: str) -> Path:
+        path = Path(data_dir.name, name)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    plugin_main.StarTools.get_data_dir = staticmethod(get_data_dir)
+    BenchTool.render_latency = args.render_latency
+    config = {
+        "default_game": "bfv",
+        "api_sites": [site],
+        "api_rate_limit": args.api_rate_limit,
+        "timeout_config": args.timeout,
+        "render_concurrency": args.render_concurrency,
+        "render_queue_size": args.render_queue_size,
+        "render_cache_max_mb": args.render_cache_mb,
+        # 页面中的图片为样例地址，不下载
+        "asset_cache_max_mb": 0,
+        "swr_enabled": args.swr,
+    }
+    plugin = BenchTool(FakeContext(), config)
+    await plugin.initialize()
+
+    workload = build_workload(args, rng)
+    recorder = Recorder()
+    traced_peak = None
+    if args.tracemalloc:
+        tracemalloc.start()
+    print(f"接口地址: {site}  请求数: {len(workload)}  ", end="")
+    print(f"按速率{args.rate}/s发送" if args.rate > 0 else f"并发数: {args.concurrency}")
+    start = time.perf_counter()
+    try:
+        if args.rate > 0:
+            await run_open_loop(plugin, recorder, workload, args.rate, rng)
+        else:
+            await run_closed_loop(plugin, recorder, workload, args.concurrency)
+        elapsed = time.perf_counter() - start
+        if args.tracemalloc:
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        server_stats = await fetch_server_stats(site)
+        report(recorder, elapsed, server_stats, plugin, args, traced_peak)
+    finally:
+        await plugin.terminate()
+        process.terminate()
+        process.join()
+        data_dir.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BattlefieldTool 端到端压力测试")
+    parser.add_argument("--groups", type=int, default=50, help="模拟的群数")
+    parser.add_argument("--users", type=int, default=20, help="每个群的用户数")
+    parser.add_argument("--players", type=int, default=200, help="被查询的不同玩家数")
+    parser.add_argument("--requests", type=int, default=2000, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=64, help="同时发送请求的用户数")
+    parser.add_argument("--rate", type=float, default=0, help="按固定速率(请求/秒)发送，为0时按并发数")
+    parser.add_argument("--duration", type=float, default=0, help="按速率发送时的持续时间(秒)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="命令比例，如 stat:40,servers:10")
+    parser.add_argument("--bound-ratio", type=float, default=0.3, help="不带玩家名(查询已绑定账号)的比例")
+    parser.add_argument("--private-ratio", type=float, default=0.1, help="私聊消息的比例")
+    parser.add_argument("--render-latency", type=float, default=0.3, help="html_render 桩函数的耗时(秒)")
+    parser.add_argument("--render-concurrency", type=int, default=2, help="插件配置 render_concurrency")
+    parser.add_argument("--render-queue-size", type=int, default=20, help="插件配置 render_queue_size")
+    parser.add_argument("--render-cache-mb", type=int, default=200, help="插件配置 render_cache_max_mb")
+    parser.add_argument("--api-rate-limit", type=float, default=5, help="插件配置 api_rate_limit")
+    parser.add_argument("--timeout", type=float, default=15, help="插件配置 timeout_config")
+    parser.add_argument("--swr", action="store_true", help="开启插件配置 swr_enabled")
+    fake_gametools.add_arguments(parser)
+    parser.add_argument("--seed", type=int, default=0, help="生成请求序列的随机种子")
+    parser.add_argument("--tracemalloc", action="store_true", help="统计Python分配峰值(会变慢)")
+    parser.add_argument("--show-metrics", action="store_true", help="输出插件各阶段耗时")
+    parser.add_argument("--log-level", default="CRITICAL", help="插件日志级别")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    logger.setLevel(args.log_level.upper())
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+生成基准测试用的接口数据
+
+{game}_{prop}.json 的字段与 api.gametools.network 各接口(经 utils/jsonUtil.py 裁剪后)一致，
+{game}_all_full.json 另带有裁剪时会丢弃的字段(职业、配备、地图、模式等)，用于检查裁剪规则。
+数量按各代游戏的实际规模设置，使用固定随机种子保证每次生成的内容相同：
+
+    python benchmark/make_fixtures.py
+"""
+
+from pathlib import Path
+
+import json
+import random
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+
+# game -> (武器数, 载具数, 服务器数)
+SIZES = {
+    "bf1": (260, 110, 30),
+    "bfv": (190, 90, 30),
+    "bf4": (130, 70, 12),
+    "bf3": (90, 50, 3),
+}
+WEAPON_TYPES = ["突击步枪", "冲锋枪", "轻机枪", "狙击步枪", "霰弹枪", "手枪", "配备"]
+VEHICLE_TYPES = ["坦克", "飞机", "运输载具", "固定武器", "船只"]
+MAPS = ["苏伊士", "西奈沙漠", "亚眠", "法欧堡", "阿奇巴巴", "圣康坦的伤痕", "流血宴厅", "帝国边境"]
+MODES = ["征服", "行动模式", "突破", "团队死斗", "抢攻"]
+COUNTRIES = ["CN", "HK", "JP", "SG", "DE", "US"]
+
+
+def _pct(rng: random.Random, low: float, high: float) -> str:
+    return f"{rng.uniform(low, high):.1f}%"
+
+
+def _weapon(rng: random.Random, game: str, i: int) -> dict:
+    kills = int(rng.paretovariate(1.2) * 20) if rng.random() > 0.2 else 0
+    shots = kills * rng.randint(8, 30)
+    return {
+        "weaponName": f"{game.upper()} 武器 {i:03d}",
+        "type": rng.choice(WEAPON_TYPES),
+        "image": f"https://cdn.example.com/{game}/weapons/{i}.png",
+        "kills": kills,
+        "killsPerMinute": round(rng.uniform(0, 2.5), 2),
+        "headshots": _pct(rng, 0, 40),
+        "accuracy": _pct(rng, 5, 45),
+        "timeEquipped": kills * rng.randint(20, 90),
+        "shotsFired": shots,
+        "shotsHit": int(shots * rng.uniform(0.05, 0.4)),
+        "headshotKills": int(kills * rng.uniform(0, 0.4)),
+    }
+
+
+def _vehicle(rng: random.Random, game: str, i: int) -> dict:
+    kills = int(rng.paretovariate(1.3) * 10) if rng.random() > 0.3 else 0
+    return {
+        "vehicleName": f"{game.upper()} 载具 {i:03d}",
+        "type": rng.choice(VEHICLE_TYPES),
+        "image": f"https://cdn.example.com/{game}/vehicles/{i}.png",
+        "kills": kills,
+        "killsPerMinute": round(rng.uniform(0, 3), 2),
+        "timeIn": kills * rng.randint(30, 120),
+        "destroyed": int(kills * rng.uniform(0, 0.5)),
+    }
+
+
+def _player(rng: random.Random, game: str) -> dict:
+    kills = rng.randint(5000, 80000)
+    deaths = int(kills / rng.uniform(0.6, 3))
+    return {
+        "userName": f"Bench_{game}_Player",
+        "userId": rng.randint(10**9, 10**10),
+        "id": rng.randint(10**9, 10**10),
+        "avatar": f"https://cdn.example.com/avatars/{game}.png",
+        "rank": rng.randint(1, 500),
+        "rankImg": f"https://cdn.example.com/{game}/rank.png",
+        "secondsPlayed": rng.randint(10**5, 5 * 10**6),
+        "kills": kills,
+        "deaths": deaths,
+        "killDeath": round(kills / deaths, 2),
+        "killsPerMinute": round(rng.uniform(0.3, 2.5), 2),
+        "headshots": _pct(rng, 5, 35),
+        "accuracy": _pct(rng, 8, 30),
+        "revives": float(rng.randint(0, 20000)),
+        "headShots": rng.randint(500, 20000),
+        "longestHeadShot": rng.uniform(100, 1500),
+        "wins": rng.randint(100, 5000),
+        "loses": rng.randint(100, 5000),
+        "highestKillStreak": rng.randint(10, 120),
+    }
+
+
+def _server(rng: random.Random, game: str, i: int) -> dict:
+    max_players = rng.choice([32, 64])
+    players = rng.randint(0, max_players)
+    return {
+        "prefix": f"[BENCH] {game.upper()} 中文服务器 #{i:02d} | 萌新友好 禁止载具狗",
+        "currentMap": rng.choice(MAPS),
+        "mode": rng.choice(MODES),
+        "serverInfo": f"{players}/{max_players}",
+        "playerAmount": players,
+        "maxPlayers": max_players,
+        "inQue": rng.randint(0, 10),
+        "country": rng.choice(COUNTRIES),
+        "url": f"https://cdn.example.com/{game}/maps/{i % len(MAPS)}.jpg",
+    }
+
+
+def _full(rng: random.Random, item: dict, extra: dict) -> dict:
+    """在裁剪后的字段之外补上完整接口中的其余字段"""
+    return {**item, **{k: v(rng) if callable(v) else v for k, v in extra.items()}}
+
+
+# 完整接口中存在、但模板用不到而被裁剪掉的字段
+WEAPON_EXTRA = {
+    "weaponId": lambda rng: str(rng.randint(10**5, 10**6)),
+    "hitVKills": lambda rng: round(rng.uniform(0, 5), 2),
+}
+VEHICLE_EXTRA = {
+    "vehicleId": lambda rng: str(rng.randint(10**5, 10**6)),
+    "spawns": lambda rng: rng.randint(0, 3000),
+    "roadKills": lambda rng: rng.randint(0, 500),
+    "passengerKills": lambda rng: rng.randint(0, 500),
+}
+PLAYER_EXTRA = {
+    "scorePerMinute": lambda rng: round(rng.uniform(200, 1500), 2),
+    "skill": lambda rng: round(rng.uniform(100, 600), 1),
+    "bestClass": lambda rng: rng.choice(["assault", "medic", "support", "scout"]),
+    "dividedKills": lambda rng: {
+        k: rng.randint(0, 10000) for k in ("ads", "grenades", "melee", "roadkills")
+    },
+    "classes": lambda rng: [
+        {"className": c, "kills": rng.randint(0, 20000), "secondsPlayed": rng.randint(0, 10**6)}
+        for c in ("assault", "medic", "support", "scout")
+    ],
+    "gadgets": lambda rng: [
+        {"gadgetName": f"配备 {i:02d}", "kills": rng.randint(0, 3000)} for i in range(40)
+    ],
+    "gamemodes": lambda rng: [
+        {"gamemodeName": m, "wins": rng.randint(0, 2000), "losses": rng.randint(0, 2000)}
+        for m in MODES
+    ],
+    "maps": lambda rng: [
+        {"mapName": m, "wins": rng.randint(0, 500), "losses": rng.randint(0, 500)}
+        for m in MAPS
+    ],
+    "platoons": [],
+}
+
+
+def build_full_fixture(game: str) -> dict:
+    """未经裁剪的all接口数据"""
+    rng = random.Random(f"battlefield-bench-{game}-full")
+    weapon_count, vehicle_count, _ = SIZES[game]
+    player = _full(rng, _player(rng, game), PLAYER_EXTRA)
+    weapons = [_full(rng, _weapon(rng, game, i), WEAPON_EXTRA) for i in range(weapon_count)]
+    vehicles = [
+        _full(rng, _vehicle(rng, game, i), VEHICLE_EXTRA) for i in range(vehicle_count)
+    ]
+    return {**player, "weapons": weapons, "vehicles": vehicles, "code": 200}
+
+
+def build_fixtures(game: str) -> dict:
+    rng = random.Random(f"battlefield-bench-{game}")
+    weapon_count, vehicle_count, server_count = SIZES[game]
+    player = _player(rng, game)
+    weapons = [_weapon(rng, game, i) for i in range(weapon_count)]
+    vehicles = [_vehicle(rng, game, i) for i in range(vehicle_count)]
+    basic = {k: player[k] for k in ("userName", "userId", "id", "avatar")}
+    return {
+        "all": {**player, "weapons": weapons, "vehicles": vehicles, "code": 200},
+        "weapons": {**basic, "weapons": weapons, "code": 200},
+        "vehicles": {**basic, "vehicles": vehicles, "code": 200},
+        "servers": {
+            "servers": [_server(rng, game, i) for i in range(server_count)],
+            "code": 200,
+        },
+    }
+
+
+def main():
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    for game in SIZES:
+        fixtures = build_fixtures(game)
+        fixtures["all_full"] = build_full_fixture(game)
+        for prop, data in fixtures.items():
+            path = FIXTURE_DIR / f"{game}_{prop}.json"
+            path.write_text(
+                json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            print(f"已生成 {path.name} ({path.stat().st_size} 字节)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+template.py 的离线基准测试，无需网络和AstrBot
+
+    python benchmark/run_benchmarks.py                    # 运行并与基准比较，内存分配超出时返回非0
+    python benchmark/run_benchmarks.py --update-baseline  # 以本次结果更新 benchmark/baseline.json
+    python benchmark/run_benchmarks.py -k weapons         # 只运行名称包含weapons的项目
+    python benchmark/run_benchmarks.py --time-baseline /tmp/bf_times.json --update-baseline
+    python benchmark/run_benchmarks.py --time-baseline /tmp/bf_times.json  # 与本机耗时比较
+
+每项记录中位耗时、最快耗时，以及单次调用的内存分配(tracemalloc统计的峰值和分配块数)。
+提交的 benchmark/baseline.json 只包含与机器无关的内存分配；耗时与机器相关，
+只有指定 --time-baseline 时才与同一台机器上保存的耗时比较。
+运行前会先检查未裁剪的完整数据(fixtures/*_all_full.json)经 jsonUtil.project 裁剪后
+渲染结果不变，裁剪规则丢掉模板需要的字段时直接失败。
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import argparse
+import copy
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bootstrap import setup  # noqa: E402
+
+setup()
+
+from data.plugins.astrbot_plugin_battlefield_tool.utils import template  # noqa: E402
+from data.plugins.astrbot_plugin_battlefield_tool.utils import jsonUtil  # noqa: E402
+
+BENCH_DIR = Path(__file__).parent
+FIXTURE_DIR = BENCH_DIR / "fixtures"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+GAMES = ("bf1", "bfv", "bf4", "bf3")
+UPDATE_TIME = 1700000000
+# 写入 baseline.json 的字段，耗时不写入
+ALLOC_FIELDS = ("peak_kb", "blocks")
+TIME_FIELDS = ("median_ms", "min_ms")
+
+
+def load_fixture(game: str, prop: str) -> dict:
+    data = json.loads((FIXTURE_DIR / f"{game}_{prop}.json").read_text(encoding="utf-8"))
+    data["__update_time"] = UPDATE_TIME
+    return data
+
+
+def check_projection() -> List[str]:
+    """用完整数据和裁剪后的数据分别渲染，返回渲染结果不一致的项目"""
+    builders = {
+        "all": lambda d, g: template.bf_main_html_builder(d, g),
+        "weapons": lambda d, g: template.bf_weapons_html_builder(d, g),
+        "vehicles": lambda d, g: template.bf_vehicles_html_builder(d, g),
+    }
+    failures = []
+    for game in GAMES:
+        full = load_fixture(game, "all_full")
+        for prop, builder in builders.items():
+            projected = jsonUtil.project(copy.deepcopy(full), prop)
+            projected["__update_time"] = UPDATE_TIME
+            if builder(copy.deepcopy(full), game) != builder(projected, game):
+                failures.append(f"{prop}[{game}]")
+    return failures
+
+
+def build_cases() -> Dict[str, tuple]:
+    """
+    Returns:
+        名称 -> (被测函数, 准备参数的函数)，参数每次重新复制，避免被上一次调用修改
+    """
+    cases = {}
+    for game in GAMES:
+        all_data = load_fixture(game, "all")
+        weapons = load_fixture(game, "weapons")
+        vehicles = load_fixture(game, "vehicles")
+        servers = load_fixture(game, "servers")
+        full_body = (FIXTURE_DIR / f"{game}_all_full.json").read_bytes()
+
+        # 解析并裁剪未经裁剪的完整响应体
+        cases[f"loads_project_all[{game}]"] = (
+            lambda body: jsonUtil.project(jsonUtil.loads(body), "all"),
+            lambda body=full_body: body,
+        )
+        cases[f"prepare_weapons_data[{game}]"] = (
+            lambda d, g=game: template.prepare_weapons_data(d, 50, g),
+            lambda d=weapons: copy.deepcopy(d),
+        )
+        cases[f"prepare_vehicles_data[{game}]"] = (
+            lambda d: template.prepare_vehicles_data(d, 50),
+            lambda d=vehicles: copy.deepcopy(d),
+        )
+        cases[f"bf_main_html_builder[{game}]"] = (
+            lambda d, g=game: template.bf_main_html_builder(d, g),
+            lambda d=all_data: copy.deepcopy(d),
+        )
+        cases[f"bf_weapons_html_builder[{game}]"] = (
+            lambda d, g=game: template.bf_weapons_html_builder(d, g),
+            lambda d=weapons: copy.deepcopy(d),
+        )
+        cases[f"bf_vehicles_html_builder[{game}]"] = (
+            lambda d, g=game: template.bf_vehicles_html_builder(d, g),
+            lambda d=vehicles: copy.deepcopy(d),
+        )
+        cases[f"bf_servers_html_builder[{game}]"] = (
+            lambda d, g=game: template.bf_servers_html_builder(d, g),
+            lambda d=servers: copy.deepcopy(d),
+        )
+        cases[f"bf_compare_html_builder[{game}]"] = (
+            lambda d, g=game: template.bf_compare_html_builder(d, g),
+            lambda d=all_data: {
+                "players": [copy.deepcopy(d) for _ in range(3)],
+                "__update_time": UPDATE_TIME,
+            },
+        )
+
+        # 只测Jinja渲染，数据预先整理好
+        def render_args(d=all_data, g=game):
+            d = copy.deepcopy(d)
+            template.prepare_main_data(d)
+            return {
+                "tailwind_css": template.TAILWIND_CSS,
+                "banner": template.BANNERS[g],
+                "update_time": "2023-11-15 06:13:20",
+                "d": d,
+                "weapon_data": template.prepare_weapons_data(d, 5, g),
+                "vehicle_data": template.prepare_vehicles_data(d, 5),
+                "game": g,
+            }
+
+        cases[f"jinja_render_main[{game}]"] = (
+            lambda kwargs: template.get_template(template.MAIN_TEMPLATE).render(**kwargs),
+            render_args,
+        )
+    return cases
+
+
+def measure(func: Callable, make_arg: Callable, repeat: int) -> dict:
+    """多次调用取中位数，另单独调用一次统计内存分配"""
+    times = []
+    for _ in range(repeat):
+        arg = make_arg()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+
+    arg = make_arg()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0
+    )
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 4),
+        "min_ms": round(min(times) * 1000, 4),
+        "peak_kb": round(peak / 1024, 1),
+        "blocks": blocks,
+    }
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    tolerance: float,
+    min_delta_ms: float,
+    check_time: bool = False,
+) -> List[str]:
+    """返回超出基准的项目说明，耗时需同时超出比例和绝对值，避免亚毫秒级的抖动误报"""
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if check_time and "median_ms" in base:
+            limit = max(base["median_ms"] * (1 + tolerance), base["median_ms"] + min_delta_ms)
+            if result["median_ms"] > limit:
+                failures.append(
+                    f"{name}: {result['median_ms']}ms > 基准 {base['median_ms']}ms +{tolerance:.0%}"
+                )
+        if "peak_kb" in base:
+            peak_limit = base["peak_kb"] * (1 + tolerance)
+            if result["peak_kb"] > peak_limit:
+                failures.append(
+                    f"{name}: 内存峰值 {result['peak_kb']}KB > 基准 {base['peak_kb']}KB +{tolerance:.0%}"
+                )
+    return failures
+
+
+def update_baseline(path: Path, results: Dict[str, dict], fields: tuple):
+    """只更新指定字段，保留文件中其他项目"""
+    baseline = {}
+    if path.exists():
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+    for name, result in results.items():
+        baseline[name] = {k: result[k] for k in fields}
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"已更新基准 {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="template.py 离线基准测试")
+    parser.add_argument("-k", dest="keyword", default="", help="只运行名称包含该字符串的项目")
+    parser.add_argument("-n", dest="repeat", type=int, default=30, help="每项的重复次数")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="允许超出基准的比例")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=0.05, help="耗时至少超出基准多少毫秒才算回退"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果更新基准")
+    parser.add_argument(
+        "--time-baseline",
+        type=Path,
+        default=None,
+        help="本机耗时基准文件，指定时才比较耗时(不同机器的耗时不可比，不要提交该文件)",
+    )
+    args = parser.parse_args()
+
+    projection_failures = check_projection()
+    if projection_failures:
+        print(
+            "裁剪后的数据渲染结果与完整数据不一致，jsonUtil 可能丢弃了模板需要的字段:",
+            file=sys.stderr,
+        )
+        for failure in projection_failures:
+            print(f"  FAIL {failure}", file=sys.stderr)
+        return 1
+
+    cases = {k: v for k, v in build_cases().items() if args.keyword in k}
+    # 预热，排除模板首次编译等一次性开销
+    for func, make_arg in cases.values():
+        func(make_arg())
+
+    results = {}
+    print(f"{'名称':<36}{'中位(ms)':>10}{'最快(ms)':>10}{'峰值(KB)':>10}{'分配块':>8}")
+    for name, (func, make_arg) in cases.items():
+        result = results[name] = measure(func, make_arg, args.repeat)
+        print(
+            f"{name:<38}{result['median_ms']:>10.3f}{result['min_ms']:>10.3f}"
+            f"{result['peak_kb']:>10.1f}{result['blocks']:>8}"
+        )
+
+    if args.update_baseline:
+        update_baseline(BASELINE_PATH, results, ALLOC_FIELDS)
+        if args.time_baseline is not None:
+            update_baseline(args.time_baseline, results, TIME_FIELDS)
+        return 0
+
+    if not BASELINE_PATH.exists():
+        print("没有基准文件，使用 --update-baseline 生成")
+        return 0
+    failures = compare(
+        results,
+        json.loads(BASELINE_PATH.read_text(encoding="utf-8")),
+        args.tolerance,
+        args.min_delta_ms,
+    )
+    if args.time_baseline is not None:
+        if args.time_baseline.exists():
+            failures += compare(
+                results,
+                json.loads(args.time_baseline.read_text(encoding="utf-8")),
+                args.tolerance,
+                args.min_delta_ms,
+                check_time=True,
+            )
+        else:
+            print(f"没有耗时基准 {args.time_baseline}，使用 --update-baseline 生成")
+    if failures:
+        print("\n性能回退:", file=sys.stderr)
+        for failure in failures:
+            print(f"  FAIL {failure}", file=sys.stderr)
+        return 1
+    print("\n全部项目均在基准范围内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
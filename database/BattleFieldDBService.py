@@ -1,16 +1,97 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Set, Tuple
 from data.plugins.astrbot_plugin_battlefield_tool.database.BattleFieldDataBase import (
     BattleFieldDataBase,
 )
 
+import asyncio
+import json
+
 
 class BattleFieldDBService:
     def __init__(self, db: BattleFieldDataBase):
         self.db = db
+        # 绑定表和渠道表数据量很小且每条消息都会读取，首次访问时整表载入内存，写入时同步更新
+        self._user_binds: Optional[Dict[str, Dict]] = None
+        self._session_tags: Optional[Dict[str, Dict]] = None
+        self._group_members: Optional[Dict[str, Set[str]]] = None
+        self._load_lock = asyncio.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+
+    async def _load_user_binds(self) -> Dict[str, Dict]:
+        """载入用户绑定表(只在首次访问时查询数据库)"""
+        if self._user_binds is None:
+            async with self._load_lock:
+                if self._user_binds is None:
+                    rows = await self.db.query("SELECT * FROM battleField_user_binds")
+                    self._user_binds = {row["qq_id"]: row for row in rows}
+                    self._loads += 1
+        return self._user_binds
+
+    async def _load_session_tags(self) -> Dict[str, Dict]:
+        """载入会话渠道表(只在首次访问时查询数据库)"""
+        if self._session_tags is None:
+            async with self._load_lock:
+                if self._session_tags is None:
+                    rows = await self.db.query(
+                        "SELECT session_channel_id, default_game_tag FROM battleField_session_tags"
+                    )
+                    self._session_tags = {
+                        row["session_channel_id"]: {
+                            "default_game_tag": row["default_game_tag"]
+                        }
+                        for row in rows
+                    }
+                    self._loads += 1
+        return self._session_tags
+
+    async def _load_group_members(self) -> Dict[str, Set[str]]:
+        """载入群成员表(只在首次访问时查询数据库)"""
+        if self._group_members is None:
+            async with self._load_lock:
+                if self._group_members is None:
+                    rows = await self.db.query(
+                        "SELECT group_id, qq_id FROM battleField_group_members"
+                    )
+                    members = {}
+                    for row in rows:
+                        members.setdefault(row["group_id"], set()).add(row["qq_id"])
+                    self._group_members = members
+                    self._loads += 1
+        return self._group_members
+
+    def _lookup(self, table: Dict[str, Dict], key: str) -> Optional[Dict]:
+        row = table.get(key)
+        if row is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        # 返回副本，避免调用方修改缓存
+        return dict(row)
+
+    def invalidate(self):
+        """清空内存缓存，下次访问时重新从数据库载入(用于绕过本服务直接写库后)"""
+        self._user_binds = None
+        self._session_tags = None
+        self._group_members = None
+
+    def cache_stats(self) -> dict:
+        """返回缓存命中统计"""
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "loads": self._loads,
+            "user_binds": len(self._user_binds) if self._user_binds is not None else None,
+            "session_tags": len(self._session_tags)
+            if self._session_tags is not None
+            else None,
+        }
 
     async def upsert_user_bind(self, qq_id: str, ea_name: str, ea_id: str) -> str:
         """更新或插入用户绑定"""
-        old_data = await self.query_bind_user(qq_id)
+        binds = await self._load_user_binds()
+        old_data = binds.get(qq_id)
         await self.db.exec_sql(
             """
             INSERT INTO battleField_user_binds (qq_id, ea_name, ea_id)
@@ -21,17 +102,50 @@ class BattleFieldDBService:
             """,
             (qq_id, ea_name, ea_id),
         )
+        # 写库成功后再更新缓存
+        binds[qq_id] = {"qq_id": qq_id, "ea_name": ea_name, "ea_id": ea_id}
         return (
             f"更新绑定数据: {old_data['ea_name']}-->{ea_name}"
             if old_data
             else f"成功绑定EA_NAME：{ea_name}"
         )
 
+    async def bulk_upsert_user_binds(self, binds: List[Tuple[str, str, str]]) -> int:
+        """
+        批量更新或插入用户绑定，在一个事务中提交
+        Args:
+            binds: (qq_id, ea_name, ea_id) 列表
+        Returns:
+            写入的条数
+        """
+        if not binds:
+            return 0
+        cached = await self._load_user_binds()
+        await self.db.exec_many(
+            """
+            INSERT INTO battleField_user_binds (qq_id, ea_name, ea_id)
+            VALUES (?, ?, ?) ON CONFLICT(qq_id) DO
+            UPDATE SET
+                ea_name = excluded.ea_name,
+                ea_id = excluded.ea_id
+            """,
+            binds,
+        )
+        for qq_id, ea_name, ea_id in binds:
+            cached[qq_id] = {"qq_id": qq_id, "ea_name": ea_name, "ea_id": ea_id}
+        return len(binds)
+
+    async def export_user_binds(self) -> List[Dict]:
+        """导出全部用户绑定"""
+        binds = await self._load_user_binds()
+        return [dict(row) for row in binds.values()]
+
     async def upsert_session_channel(
         self, session_channel_id: str, default_game_tag: str
     ) -> str:
         """更新或插入会话渠道设置"""
-        old_data = await self.query_session_channel(session_channel_id)
+        tags = await self._load_session_tags()
+        old_data = tags.get(session_channel_id)
         await self.db.exec_sql(
             """
             INSERT INTO battleField_session_tags (session_channel_id, default_game_tag)
@@ -41,6 +155,7 @@ class BattleFieldDBService:
             """,
             (session_channel_id, default_game_tag),
         )
+        tags[session_channel_id] = {"default_game_tag": default_game_tag}
         return (
             f"更新渠道数据: {old_data['default_game_tag']}-->{default_game_tag}"
             if old_data
@@ -49,16 +164,87 @@ class BattleFieldDBService:
 
     async def query_bind_user(self, qq_id: str) -> Optional[Dict]:
         """查询绑定用户"""
-        return await self.db.query(
-            "SELECT * FROM battleField_user_binds WHERE qq_id = ?",
-            (qq_id,),
-            fetch_all=False,
-        )
+        return self._lookup(await self._load_user_binds(), qq_id)
 
     async def query_session_channel(self, session_channel_id: str) -> Optional[Dict]:
         """查询会话渠道设置"""
+        return self._lookup(await self._load_session_tags(), session_channel_id)
+
+    async def add_group_member(self, group_id: str, qq_id: str) -> bool:
+        """记录群成员，已记录过时不访问数据库
+        Returns:
+            是否为新记录
+        """
+        members = await self._load_group_members()
+        if qq_id in members.get(group_id, ()):
+            return False
+        await self.db.exec_sql(
+            "INSERT OR IGNORE INTO battleField_group_members (group_id, qq_id) VALUES (?, ?)",
+            (group_id, qq_id),
+        )
+        members.setdefault(group_id, set()).add(qq_id)
+        return True
+
+    async def query_group_members(self) -> Dict[str, Set[str]]:
+        """返回 群id -> 成员qq_id集合(缓存本身，调用方不要修改)"""
+        return await self._load_group_members()
+
+    async def query_player_stats(self) -> List[Dict]:
+        """查询排行榜用的全部玩家数据"""
+        rows = await self.db.query(
+            "SELECT qq_id, game, ea_name, stats, updated_at FROM battleField_player_stats"
+        )
+        for row in rows:
+            row["stats"] = json.loads(row["stats"])
+        return rows
+
+    async def upsert_player_stats(self, rows: List[Tuple[str, str, str, dict, float]]):
+        """
+        批量保存排行榜用的玩家数据
+        Args:
+            rows: (qq_id, game, ea_name, stats, updated_at) 列表
+        """
+        if not rows:
+            return
+        await self.db.exec_many(
+            """
+            INSERT INTO battleField_player_stats (qq_id, game, ea_name, stats, updated_at)
+            VALUES (?, ?, ?, ?, ?) ON CONFLICT(qq_id, game) DO
+            UPDATE SET
+                ea_name = excluded.ea_name,
+                stats = excluded.stats,
+                updated_at = excluded.updated_at
+            """,
+            [
+                (qq_id, game, ea_name, json.dumps(stats), updated_at)
+                for qq_id, game, ea_name, stats, updated_at in rows
+            ],
+        )
+
+    async def add_server_watch(self, session_origin: str, game: str, server_name: str):
+        """新增服务器订阅"""
+        await self.db.exec_sql(
+            """
+            INSERT OR IGNORE INTO battleField_server_watches (session_origin, game, server_name)
+            VALUES (?, ?, ?)
+            """,
+            (session_origin, game, server_name),
+        )
+
+    async def remove_server_watch(
+        self, session_origin: str, game: str, server_name: str
+    ):
+        """删除服务器订阅"""
+        await self.db.exec_sql(
+            """
+            DELETE FROM battleField_server_watches
+            WHERE session_origin = ? AND game = ? AND server_name = ?
+            """,
+            (session_origin, game, server_name),
+        )
+
+    async def query_server_watches(self) -> List[Dict]:
+        """查询全部服务器订阅"""
         return await self.db.query(
-            "SELECT default_game_tag FROM battleField_session_tags WHERE session_channel_id = ?",
-            (session_channel_id,),
-            fetch_all=False,
+            "SELECT session_origin, game, server_name FROM battleField_server_watches"
         )
@@ -1,15 +1,48 @@
-from typing import Tuple, Optional, Union, Dict, List
+from typing import Tuple, Optional, Union, Dict, List, Iterable
 from astrbot.api.star import StarTools
 from astrbot.api import logger
 
 import aiosqlite
+import asyncio
 import os
+import re
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "sql", "migrations"
+)
+# 迁移文件命名: 0001_说明.sql，编号即执行后的 user_version
+MIGRATION_PATTERN = re.compile(r"^(\d+)_[\w\-]+\.sql$")
+
+
+class _WriteRequest:
+    """写入队列中的一条请求"""
+
+    __slots__ = ("sql", "params", "many", "future")
+
+    def __init__(self, sql: str, params, many: bool, future: asyncio.Future):
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.future = future
 
 
 class BattleFieldDataBase:
     bf_db_name = "battle_filed_tool.db"
 
-    def __init__(self, bf_db_path: str = None):
+    def __init__(
+        self,
+        bf_db_path: str = None,
+        read_pool_size: int = 3,
+        write_batch_size: int = 64,
+        cache_size_kb: int = 8192,
+    ):
+        """
+        Args:
+            bf_db_path: 数据库所在目录
+            read_pool_size: 只读连接数
+            write_batch_size: 写入线程一次事务最多合并的写请求数
+            cache_size_kb: 每个连接的页缓存大小(KB)
+        """
         super().__init__()
         if bf_db_path is None:
             self.bf_db_path = (
@@ -17,49 +50,101 @@ class BattleFieldDataBase:
             )
         else:
             self.bf_db_path = bf_db_path / self.bf_db_name
-        self._conn = None
+        self.read_pool_size = max(1, read_pool_size)
+        self.write_batch_size = max(1, write_batch_size)
+        self.cache_size_kb = cache_size_kb
+        self._conn = None  # 唯一的写连接
+        self._readers: List[aiosqlite.Connection] = []
+        self._read_pool: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
 
-    async def _init_db(self, conn: aiosqlite.Connection):
-        """使用给定连接初始化数据库"""
-        # 修复路径拼接，确保正确找到 SQL 文件
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        sql_path = os.path.join(current_dir, "sql", "battleField_tool_plugin_init.sql")
+    async def _apply_pragmas(self, conn: aiosqlite.Connection):
+        """设置连接参数，WAL模式下读写互不阻塞"""
+        await conn.execute("PRAGMA journal_mode=WAL")
+        # WAL模式下NORMAL可保证一致性，仅在断电时可能丢失最后的事务
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        await conn.execute("PRAGMA temp_store=MEMORY")
 
-        logger.debug(f"尝试从路径加载初始化SQL: {sql_path}")
+    @staticmethod
+    def _list_migrations() -> List[Tuple[int, str]]:
+        """按版本号返回迁移文件列表"""
+        if not os.path.isdir(MIGRATIONS_DIR):
+            logger.error(f"迁移目录不存在: {MIGRATIONS_DIR}")
+            raise FileNotFoundError(f"迁移目录不存在: {MIGRATIONS_DIR}")
+        migrations = []
+        for file_name in os.listdir(MIGRATIONS_DIR):
+            if match := MIGRATION_PATTERN.match(file_name):
+                migrations.append(
+                    (int(match.group(1)), os.path.join(MIGRATIONS_DIR, file_name))
+                )
+        migrations.sort()
+        return migrations
 
-        if not os.path.exists(sql_path):
-            logger.error(f"初始化SQL文件不存在: {sql_path}")
-            raise FileNotFoundError(f"初始化SQL文件不存在: {sql_path}")
+    async def _init_db(self, conn: aiosqlite.Connection):
+        """执行未应用的迁移，当前版本记录在 PRAGMA user_version"""
+        async with conn.execute("PRAGMA user_version") as cursor:
+            current_version = (await cursor.fetchone())[0]
 
-        try:
-            with open(sql_path, "r", encoding="utf-8") as f:
-                sql_script = f.read()
+        migrations = self._list_migrations()
+        if not migrations or current_version >= migrations[-1][0]:
+            # 表结构已是最新，不再读取和执行迁移脚本
+            logger.debug(f"数据库表结构已是最新版本: {current_version}")
+            return
 
-            logger.debug(f"开始执行数据库初始化脚本，文件大小: {len(sql_script)} 字节")
-            await conn.executescript(sql_script)
-            await conn.commit()
-            logger.debug("数据库表结构初始化成功")
+        for version, sql_path in migrations:
+            if version <= current_version:
+                continue
+            try:
+                with open(sql_path, "r", encoding="utf-8") as f:
+                    sql_script = f.read()
 
-        except aiosqlite.Error as e:
-            logger.exception(f"数据库初始化失败: {e}")
-            raise RuntimeError(f"数据库初始化失败: {e}") from e
-        except Exception as e:
-            logger.exception("未知错误发生在数据库初始化过程中")
-            raise
+                logger.debug(f"执行数据库迁移 {os.path.basename(sql_path)}")
+                # 迁移脚本与版本号更新在同一事务中，失败时整体回滚
+                await conn.executescript(
+                    f"BEGIN;\n{sql_script}\nPRAGMA user_version = {version};\nCOMMIT;"
+                )
+                current_version = version
+            except aiosqlite.Error as e:
+                await conn.rollback()
+                logger.exception(f"数据库迁移失败: {e}")
+                raise RuntimeError(
+                    f"数据库迁移失败({os.path.basename(sql_path)}): {e}"
+                ) from e
+        logger.debug(f"数据库表结构版本: {current_version}")
 
     async def initialize(self):
         """异步初始化数据库"""
         logger.debug("开始初始化战场工具数据库...")
         # 先获取主连接
         self._conn = await self._get_conn()
+        await self._apply_pragmas(self._conn)
         logger.debug(f"数据库连接已建立: {self._conn}")
 
-        # 使用主连接初始化表结构
+        # 使用主连接执行迁移
         await self._init_db(self._conn)
+
+        # 只读连接池，结果统一转为字典
+        self._read_pool = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            reader = await aiosqlite.connect(
+                f"file:{self.bf_db_path}?mode=ro", uri=True
+            )
+            reader.text_factory = str
+            reader.row_factory = aiosqlite.Row
+            await reader.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+            await reader.execute("PRAGMA busy_timeout=5000")
+            self._readers.append(reader)
+            self._read_pool.put_nowait(reader)
+
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
         logger.debug("战地风云数据库初始化完成")
 
     async def _get_conn(self) -> aiosqlite.Connection:
-        """获取异步数据库连接(复用现有连接或创建新连接)
+        """获取写连接(复用现有连接或创建新连接)
 
         Returns:
             aiosqlite.Connection: 数据库连接对象
@@ -80,27 +165,123 @@ class BattleFieldDataBase:
             raise RuntimeError(f"无法连接到数据库: {e}")
 
     async def close(self):
-        """关闭数据库连接"""
+        """等待写入队列处理完毕后关闭所有连接"""
+        if self._writer_task:
+            if not self._writer_task.done():
+                await self._write_queue.put(None)
+            try:
+                await self._writer_task
+            except Exception as e:
+                logger.error(f"数据库写入任务异常退出: {e}")
+            self._writer_task = None
+        self._write_queue = None
+        for reader in self._readers:
+            await reader.close()
+        self._readers.clear()
+        self._read_pool = None
         if self._conn:
             await self._conn.close()
             self._conn = None
 
+    async def _writer_loop(self):
+        """唯一的写入任务，把排队中的写请求合并到一个事务中提交"""
+        try:
+            while True:
+                request = await self._write_queue.get()
+                if request is None:
+                    return
+                batch = [request]
+                stop = False
+                while len(batch) < self.write_batch_size:
+                    try:
+                        request = self._write_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if request is None:
+                        stop = True
+                        break
+                    batch.append(request)
+
+                try:
+                    await self._commit_batch(batch)
+                except Exception as e:
+                    # 回滚等出错时只让本批请求失败，写入任务继续运行
+                    logger.exception(f"数据库批量写入失败: {e}")
+                    self._fail_requests(batch, e)
+                if stop:
+                    return
+        finally:
+            # 写入任务退出后，仍在排队的请求不会再被处理，直接失败避免调用方一直等待
+            pending = []
+            while not self._write_queue.empty():
+                request = self._write_queue.get_nowait()
+                if request is not None:
+                    pending.append(request)
+            self._fail_requests(pending, RuntimeError("数据库写入任务已停止"))
+
+    @staticmethod
+    def _fail_requests(batch: List[_WriteRequest], error: BaseException):
+        for request in batch:
+            if not request.future.done():
+                request.future.set_exception(error)
+
+    async def _execute(self, request: _WriteRequest):
+        if request.many:
+            await self._conn.executemany(request.sql, request.params)
+        else:
+            await self._conn.execute(request.sql, request.params or ())
+
+    async def _commit_batch(self, batch: List[_WriteRequest]):
+        """在一个事务中执行一批写请求，失败时逐条重试以免影响同批的其他请求"""
+        try:
+            for request in batch:
+                await self._execute(request)
+            await self._conn.commit()
+        except Exception as e:
+            try:
+                await self._conn.rollback()
+            except Exception as rollback_error:
+                logger.error(f"数据库回滚失败: {rollback_error}")
+            if len(batch) == 1:
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return
+            for request in batch:
+                await self._commit_batch([request])
+            return
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(None)
+
+    async def _enqueue_write(self, sql: str, params, many: bool):
+        if self._write_queue is None:
+            raise RuntimeError("数据库尚未初始化或已关闭")
+        if self._writer_task is None or self._writer_task.done():
+            raise RuntimeError("数据库写入任务已停止")
+        future = asyncio.get_running_loop().create_future()
+        # 队列无上限，put_nowait与上面的检查之间不会切换任务
+        self._write_queue.put_nowait(_WriteRequest(sql, params, many, future))
+        await future
+
     async def exec_sql(self, sql: str, params: Tuple = None):
         """
-        执行SQL(复用现有连接)
+        执行写入SQL，由写入任务合并提交，返回时已落库
 
         Args:
-            sql: 要执行的SQL查询语句
-            params: 查询参数，可以是元组或字典
+            sql: 要执行的SQL语句
+            params: 参数，可以是元组或字典
         """
-        conn = await self._get_conn()
-        try:
-            cursor = await conn.cursor()
-            await cursor.execute(sql, params or ())
-            await conn.commit()
-        except aiosqlite.Error:
-            await conn.rollback()
-            raise
+        await self._enqueue_write(sql, params, many=False)
+
+    async def exec_many(self, sql: str, params_seq: Iterable[Union[Tuple, Dict]]):
+        """
+        以executemany批量执行同一条写入SQL，整体在一个事务中提交
+
+        Args:
+            sql: 要执行的SQL语句
+            params_seq: 参数序列
+        """
+        await self._enqueue_write(sql, list(params_seq), many=True)
 
     async def query(
         self,
@@ -109,7 +290,7 @@ class BattleFieldDataBase:
         fetch_all: bool = True,
     ) -> Union[List[Dict], Optional[Dict]]:
         """
-        执行SQL查询并返回结果(复用现有连接)
+        从只读连接池执行SQL查询并返回结果
 
         Args:
             sql: 要执行的SQL查询语句
@@ -123,24 +304,18 @@ class BattleFieldDataBase:
         Raises:
             aiosqlite.Error: 数据库操作失败时抛出
         """
-        conn = await self._get_conn()
+        if self._read_pool is None:
+            raise RuntimeError("数据库尚未初始化")
+        conn = await self._read_pool.get()
         try:
-            conn.row_factory = aiosqlite.Row  # 使结果可转为字典
-            cursor = await conn.cursor()
-
-            # 根据参数类型选择执行方式
-            if isinstance(params, dict):
-                await cursor.execute(sql, params)
-            else:
-                await cursor.execute(sql, params or ())
-
-            if fetch_all:
-                return [dict(row) for row in await cursor.fetchall()]
-            else:
+            async with conn.execute(sql, params or ()) as cursor:
+                if fetch_all:
+                    return [dict(row) for row in await cursor.fetchall()]
                 if result := await cursor.fetchone():
                     return dict(result)
                 return None
-
         except aiosqlite.Error as e:
             logger.error(f"查询失败: {e}\nSQL: {sql}\nParams: {params}")
             raise
+        finally:
+            self._read_pool.put_nowait(conn)
@@ -9,4 +9,4 @@ create TABLE IF NOT EXISTS battleField_session_tags
 (
     session_channel_id VARCHAR(32) PRIMARY KEY,
     default_game_tag TEXT NOT NULL
-)
\ No newline at end of file
+);
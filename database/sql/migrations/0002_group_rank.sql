@@ -0,0 +1,16 @@
+CREATE TABLE IF NOT EXISTS battleField_group_members
+(
+    group_id VARCHAR(32) NOT NULL,
+    qq_id VARCHAR(32) NOT NULL,
+    PRIMARY KEY (group_id, qq_id)
+);
+
+CREATE TABLE IF NOT EXISTS battleField_player_stats
+(
+    qq_id VARCHAR(32) NOT NULL,
+    game VARCHAR(16) NOT NULL,
+    ea_name TEXT NOT NULL,
+    stats TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (qq_id, game)
+);
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS battleField_server_watches
+(
+    session_origin TEXT NOT NULL,
+    game VARCHAR(16) NOT NULL,
+    server_name TEXT NOT NULL,
+    PRIMARY KEY (session_origin, game, server_name)
+);
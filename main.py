@@ -1,26 +1,69 @@
-from astrbot.api.event import filter, AstrMessageEvent
+from astrbot.api.event import filter, AstrMessageEvent, MessageChain
 from astrbot.api.star import Context, Star, StarTools, register
 from astrbot.api.all import AstrBotConfig
 from astrbot.api import logger
 
 from typing import Union, Pattern
-from data.plugins.astrbot_plugin_battlefield_tool.utils.requestUtil import request_api
+from data.plugins.astrbot_plugin_battlefield_tool.utils.requestUtil import (
+    request_api,
+    configure_cache,
+    configure_rate_limit,
+    configure_sites,
+    get_cache_stats,
+    get_site_stats,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.circuitBreaker import (
+    CircuitBreaker,
+)
 from data.plugins.astrbot_plugin_battlefield_tool.database.BattleFieldDataBase import (
     BattleFieldDataBase,
 )
 from data.plugins.astrbot_plugin_battlefield_tool.database.BattleFieldDBService import (
     BattleFieldDBService,
 )
+from data.plugins.astrbot_plugin_battlefield_tool.utils.renderer import (
+    HtmlRenderer,
+    PillowRenderer,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.transport import get_transport
+from data.plugins.astrbot_plugin_battlefield_tool.utils.metrics import get_metrics
 from data.plugins.astrbot_plugin_battlefield_tool.utils.template import (
-    bf_main_html_builder,
-    bf_weapons_html_builder,
-    bf_vehicles_html_builder,
-    bf_servers_html_builder,
+    configure_bytecode_cache,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.statIndex import (
+    DEFAULT_SORT,
+    SORT_METRICS,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.renderCache import RenderCache
+from data.plugins.astrbot_plugin_battlefield_tool.utils.renderScheduler import (
+    RenderScheduler,
+    RenderQueueFullError,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.assetStore import AssetStore
+from data.plugins.astrbot_plugin_battlefield_tool.utils.playerStore import (
+    PlayerPayloadStore,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.leaderboard import (
+    LeaderboardRefresher,
+    RANK_METRICS,
+    DEFAULT_RANK_METRIC,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.serverWatch import (
+    ServerWatcher,
+    find_server,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.serverCatalog import (
+    ServerCatalog,
+    MATCH_FUZZY,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.bindTransfer import (
+    parse_binds,
+    format_binds,
 )
 
 import re
 import time
-import aiohttp
+import asyncio
 
 
 @register(
@@ -31,10 +74,30 @@ import aiohttp
 )
 class BattlefieldTool(Star):
     STAT_PATTERN = re.compile(
-        r"^(\w*)(?:[，,]?game=([\w\-+.]+))?$"
-    )  # 正则提取用户名和要查询的游戏
+        r"^(\w*)((?:[，,]?(?:game|sort)=[\w\-+.]+)?(?:[，,](?:game|sort)=[\w\-+.]+)*)$"
+    )  # 正则提取用户名和game=、sort=参数(顺序不限)
+    OPTION_PATTERN = re.compile(r"(game|sort)=([\w\-+.]+)")  # 逐个取出参数
+    SORT_COMMANDS = ("stat", "weapons", "vehicles")  # 支持sort参数的命令
+    COMPARE_PATTERN = re.compile(
+        r"^(\w+(?:[，,]\w+)+?)(?:[，,]game=([\w\-+.]+))?$"
+    )  # 正则提取多个用户名和要查询的游戏
+    COMPARE_MAX_PLAYERS = 4  # 对比页面最多展示的玩家数
+    COMPARE_CONCURRENCY = 4  # 对比时同时查询的玩家数
     LANG_CN = "zh-cn"
     LANG_TW = "zh-tw"
+    RENDER_QUEUE_FULL_MSG = "当前查询人数过多，请稍后再试~"
+    RANK_SIZE = 20  # 排行榜展示的人数
+    METRICS_EXPORT_INTERVAL = 60  # 写入Prometheus文件的间隔(秒)
+    CATALOG_MATCH_LIMIT = 10  # 从服务器目录中最多匹配的服务器数
+    CATALOG_LIVE_LIMIT = 3  # 从目录匹配到的服务器中查询实时状态的数量
+    CATALOG_STALE_SLACK = 60  # 目录超过刷新间隔加上该时间(秒)仍未刷新时视为过期
+    BIND_IMPORT_MAX_ERRORS = 20  # 批量导入结果最多列出的失败条数
+    # 熔断状态转为数值输出，便于按数值告警
+    BREAKER_STATE_VALUES = {
+        CircuitBreaker.CLOSED: 0,
+        CircuitBreaker.HALF_OPEN: 1,
+        CircuitBreaker.OPEN: 2,
+    }
 
     def __init__(self, context: Context, config: AstrBotConfig = None):
         super().__init__(context)
@@ -46,21 +109,149 @@ class BattlefieldTool(Star):
             self.default_game = "bfv"
             self.timeout_config = 15
             self.img_quality = 90
+            self.api_cache_enabled = True
+            self.api_cache_max_mb = 32
+            self.render_cache_max_mb = 200
+            self.swr_enabled = False
+            self.swr_max_stale = 3600
+            self.asset_cache_max_mb = 100
+            self.render_backend = "html"
+            self.pillow_font_path = ""
+            self.render_concurrency = 2
+            self.render_queue_size = 20
+            self.api_rate_limit = 5
+            self.api_max_retries = 2
+            self.api_sites = []
+            self.api_hedge_enabled = False
+            self.bind_import_concurrency = 4
+            self.rank_refresh_interval = 3600
+            self.rank_refresh_concurrency = 2
+            self.server_watch_interval = 120
+            self.server_watch_player_delta = 8
+            self.server_catalog_enabled = True
+            self.server_catalog_refresh_interval = 300
+            self.metrics_file_enabled = False
         else:
             logger.info("BattlefieldTool: 使用用户配置文件")
             self.default_game = config.get("default_game", "bfv")
             self.timeout_config = config.get("timeout_config", 15)
             self.img_quality = config.get("img_quality", 90)
+            self.api_cache_enabled = config.get("api_cache_enabled", True)
+            self.api_cache_max_mb = config.get("api_cache_max_mb", 32)
+            self.render_cache_max_mb = config.get("render_cache_max_mb", 200)
+            self.swr_enabled = config.get("swr_enabled", False)
+            self.swr_max_stale = config.get("swr_max_stale", 3600)
+            self.asset_cache_max_mb = config.get("asset_cache_max_mb", 100)
+            self.render_backend = config.get("render_backend", "html")
+            self.pillow_font_path = config.get("pillow_font_path", "")
+            self.render_concurrency = config.get("render_concurrency", 2)
+            self.render_queue_size = config.get("render_queue_size", 20)
+            self.api_rate_limit = config.get("api_rate_limit", 5)
+            self.api_max_retries = config.get("api_max_retries", 2)
+            self.api_sites = config.get("api_sites", [])
+            self.api_hedge_enabled = config.get("api_hedge_enabled", False)
+            self.bind_import_concurrency = config.get("bind_import_concurrency", 4)
+            self.rank_refresh_interval = config.get("rank_refresh_interval", 3600)
+            self.rank_refresh_concurrency = config.get("rank_refresh_concurrency", 2)
+            self.server_watch_interval = config.get("server_watch_interval", 120)
+            self.server_watch_player_delta = config.get("server_watch_player_delta", 8)
+            self.server_catalog_enabled = config.get("server_catalog_enabled", True)
+            self.server_catalog_refresh_interval = config.get(
+                "server_catalog_refresh_interval", 300
+            )
+            self.metrics_file_enabled = config.get("metrics_file_enabled", False)
+
+        configure_cache(
+            self.api_cache_enabled, max_bytes=self.api_cache_max_mb * 1024 * 1024
+        )
+        configure_rate_limit(
+            self.api_rate_limit, self.api_rate_limit * 2, self.api_max_retries
+        )
+        configure_sites(self.api_sites, self.api_hedge_enabled)
 
         self.bf_data_path = StarTools.get_data_dir("battleField_tool_plugin")
+        # 模板字节码缓存，插件重载时无需重新编译模板
+        configure_bytecode_cache(self.bf_data_path / "template_cache")
         self.db = BattleFieldDataBase(self.bf_data_path)  # 初始化数据库
         self.db_service = BattleFieldDBService(self.db)  # 初始化数据库服务
+        self.transport = get_transport()  # 共用的HTTP连接池
+        self.metrics = get_metrics()  # 各阶段耗时统计
+        self._metrics_task = None
         self._session = None
+        self.player_store = PlayerPayloadStore()  # 玩家数据共享
+        self._refresh_tasks = {}  # 后台刷新任务
+        # 渲染图片缓存，大小设为0时关闭
+        self.render_cache = None
+        if self.render_cache_max_mb > 0:
+            self.render_cache = RenderCache(
+                self.bf_data_path / "render_cache",
+                self.render_cache_max_mb * 1024 * 1024,
+            )
+        # 图片资源缓存，大小设为0时关闭
+        self.asset_store = None
+        if self.asset_cache_max_mb > 0:
+            self.asset_store = AssetStore(
+                self.bf_data_path / "assets", self.asset_cache_max_mb * 1024 * 1024
+            )
+        # 群排行榜，后台定期刷新群内已绑定玩家的数据
+        self.rank_refresher = LeaderboardRefresher(
+            self.db_service,
+            self._fetch_rank_stats,
+            self._get_channel_game,
+            self.rank_refresh_interval,
+            self.rank_refresh_concurrency,
+        )
+        # 服务器订阅，同一服务器只轮询一次
+        self.server_watcher = ServerWatcher(
+            self.db_service,
+            self._search_servers,
+            self._send_text,
+            self.server_watch_interval,
+            self.server_watch_player_delta,
+        )
+        # 服务器目录，/servers 优先在本地索引中匹配
+        self.server_catalog = None
+        if self.server_catalog_enabled:
+            self.server_catalog = ServerCatalog(
+                self._fetch_server_catalog, self.server_catalog_refresh_interval
+            )
+        self.render_scheduler = RenderScheduler(
+            self.render_concurrency, self.render_queue_size
+        )
+        # 渲染后端，pillow不支持的页面仍使用html渲染
+        self.html_renderer = HtmlRenderer(
+            self.html_render, self.asset_store, lambda: self._session
+        )
+        self.renderer = self.html_renderer
+        if self.render_backend == "pillow":
+            try:
+                self.renderer = PillowRenderer(
+                    self.bf_data_path / "pillow_render",
+                    # pillow渲染必须先把图片下载到本地
+                    self.asset_store
+                    or AssetStore(self.bf_data_path / "assets", 100 * 1024 * 1024),
+                    lambda: self._session,
+                    self.img_quality,
+                    self.pillow_font_path,
+                )
+            except RuntimeError as e:
+                logger.error(f"{e}，将使用html渲染")
 
     async def initialize(self):
         """可选择实现异步的插件初始化方法，当实例化该插件类之后会自动调用该方法。"""
-        self._session = aiohttp.ClientSession()
+        self._session = self.transport.get_session()
         await self.db.initialize()  # 添加数据库初始化调用
+        if self.render_cache is not None:
+            await self.render_cache.load()
+        # pillow渲染在未启用图片缓存时使用自己的资源缓存
+        asset_stores = {self.asset_store, getattr(self.renderer, "asset_store", None)}
+        for asset_store in asset_stores - {None}:
+            await asset_store.load()
+        self.rank_refresher.start()
+        await self.server_watcher.load()
+        self.server_watcher.start()
+        if self.metrics_file_enabled:
+            self._metrics_task = asyncio.create_task(self._export_metrics())
 
     @filter.command("stat")
     async def bf_stat(self, event: AstrMessageEvent):
@@ -72,6 +263,7 @@ class BattlefieldTool(Star):
             ea_name,
             game,
             server_name,
+            sort_key,
             error_msg,
         ) = await self._handle_player_data_request(event, ["stat"])
 
@@ -80,16 +272,11 @@ class BattlefieldTool(Star):
             return
 
         logger.info(f"玩家id:{ea_name}，所查询游戏:{game}")
-        player_data = await request_api(
-            game,
-            "all",
-            {"name": ea_name, "lang": lang, "platform": "pc"},
-            self.timeout_config,
-            session=self._session,
-        )
+        with self.metrics.timer("api", "stat", game):
+            player_data = await self._fetch_player_data(game, "all", ea_name, lang)
 
         async for result in self._process_api_response(
-            event, player_data, "stat", game
+            event, player_data, "stat", game, sort_key
         ):
             yield result
 
@@ -103,6 +290,7 @@ class BattlefieldTool(Star):
             ea_name,
             game,
             server_name,
+            sort_key,
             error_msg,
         ) = await self._handle_player_data_request(event, ["weapons", "武器"])
 
@@ -111,16 +299,11 @@ class BattlefieldTool(Star):
             return
 
         logger.info(f"玩家id:{ea_name}，所查询游戏:{game}")
-        player_data = await request_api(
-            game,
-            "weapons",
-            {"name": ea_name, "lang": lang, "platform": "pc"},
-            self.timeout_config,
-            session=self._session,
-        )
+        with self.metrics.timer("api", "weapons", game):
+            player_data = await self._fetch_player_data(game, "weapons", ea_name, lang)
 
         async for result in self._process_api_response(
-            event, player_data, "weapons", game
+            event, player_data, "weapons", game, sort_key
         ):
             yield result
 
@@ -134,6 +317,7 @@ class BattlefieldTool(Star):
             ea_name,
             game,
             server_name,
+            sort_key,
             error_msg,
         ) = await self._handle_player_data_request(event, ["vehicles", "载具"])
 
@@ -142,16 +326,11 @@ class BattlefieldTool(Star):
             return
 
         logger.info(f"玩家id:{ea_name}，所查询游戏:{game}")
-        player_data = await request_api(
-            game,
-            "vehicles",
-            {"name": ea_name, "lang": lang, "platform": "pc"},
-            self.timeout_config,
-            session=self._session,
-        )
+        with self.metrics.timer("api", "vehicles", game):
+            player_data = await self._fetch_player_data(game, "vehicles", ea_name, lang)
 
         async for result in self._process_api_response(
-            event, player_data, "vehicles", game
+            event, player_data, "vehicles", game, sort_key
         ):
             yield result
 
@@ -165,6 +344,7 @@ class BattlefieldTool(Star):
             ea_name,
             game,
             server_name,
+            sort_key,
             error_msg,
         ) = await self._handle_player_data_request(event, ["servers", "服务器"])
 
@@ -176,7 +356,39 @@ class BattlefieldTool(Star):
             return
 
         logger.info(f"查询服务器:{server_name}，所查询游戏:{game}")
-        servers_data = await request_api(
+        with self.metrics.timer("api", "servers", game):
+            servers_data = await self._lookup_servers(game, server_name, lang)
+
+        # 特殊处理服务器空数据情况
+        if servers_data is None:
+            yield event.plain_result("API调用失败，没有响应任何信息")
+            return
+
+        if servers_data.get("code") != 200:
+            yield event.plain_result(servers_data.get("errors")[0])
+            return
+
+        if servers_data["servers"] is not None and len(servers_data["servers"]) > 0:
+            # 使用目录快照时已带有目录的刷新时间
+            servers_data.setdefault("__update_time", time.time())
+            try:
+                pic_url = await self._servers_data_to_pic(
+                    servers_data, game, self._get_session_channel_id(event)
+                )
+            except RenderQueueFullError:
+                yield event.plain_result(self.RENDER_QUEUE_FULL_MSG)
+                return
+            yield event.image_result(pic_url)
+        else:
+            yield event.plain_result("暂无数据")
+
+    async def _search_servers(
+        self, game: str, server_name: str, lang: str = None, limit: int = 30
+    ):
+        """按名称搜索服务器"""
+        if lang is None:
+            lang = self.LANG_TW if game == "bf1" else self.LANG_CN
+        return await request_api(
             game,
             "servers",
             {
@@ -184,27 +396,245 @@ class BattlefieldTool(Star):
                 "lang": lang,
                 "platform": "pc",
                 "region": "all",
-                "limit": 30,
+                "limit": limit,
             },
             self.timeout_config,
             session=self._session,
         )
 
-        # 特殊处理服务器空数据情况
-        if servers_data is None:
-            yield event.plain_result("API调用失败，没有响应任何信息")
-            return
+    async def _fetch_server_catalog(self, game: str):
+        """拉取服务器目录用的全部服务器"""
+        return await self._search_servers(
+            game, "", limit=ServerCatalog.CATALOG_LIMIT
+        )
 
-        if servers_data.get("code") != 200:
-            yield event.plain_result(servers_data.get("errors")[0])
+    async def _lookup_servers(self, game: str, server_name: str, lang: str):
+        """先在本地服务器目录中匹配服务器名，再按完整名称查询匹配到的服务器的实时状态
+        Args:
+            game: 所查询的游戏
+            server_name: 服务器名
+            lang: 语言
+        Returns:
+            与servers接口相同格式的数据，含目录快照时__update_time为目录的刷新时间
+        """
+        if self.server_catalog is None:
+            return await self._search_servers(game, server_name, lang)
+        # 不支持的游戏不建立目录，避免任意输入的game启动后台任务
+        if not self.server_catalog.activate(game):
+            return await self._search_servers(game, server_name, lang)
+        result = self.server_catalog.search(
+            game, server_name, self.CATALOG_MATCH_LIMIT
+        )
+        # 目录尚未建立、没有匹配或只有模糊匹配(可能是目录中还没有的新服务器)时仍按原方式搜索
+        if result is None or not result[0] or result[1] == MATCH_FUZZY:
+            return await self._search_servers(game, server_name, lang)
+
+        # 目录只用于确定服务器名，状态按完整服务器名实时查询，相同服务器的请求会命中接口缓存
+        matches = result[0][: self.CATALOG_LIVE_LIMIT]
+        results = await asyncio.gather(
+            *[
+                self._search_servers(game, server["prefix"], lang, limit=5)
+                for server in matches
+            ],
+            return_exceptions=True,
+        )
+        servers = []
+        use_snapshot = False
+        for server, live_data in zip(matches, results):
+            if isinstance(live_data, dict) and live_data.get("code") == 200:
+                # 查询成功但已搜索不到的服务器视为已离线，不再展示
+                live = find_server(live_data.get("servers"), server["prefix"])
+                if live is not None:
+                    servers.append(live)
+            else:
+                # 实时查询失败时使用目录中的快照
+                servers.append(server)
+                use_snapshot = True
+        if not use_snapshot:
+            return {"code": 200, "servers": servers}
+        # 目录过期时快照不再可信，回到原方式搜索
+        max_age = self.server_catalog.refresh_interval + self.CATALOG_STALE_SLACK
+        if self.server_catalog.age(game) > max_age:
+            return await self._search_servers(game, server_name, lang)
+        return {
+            "code": 200,
+            "servers": servers,
+            "__update_time": self.server_catalog.updated_at(game),
+        }
+
+    @filter.command("server_watch", alias=["订阅服务器"])
+    async def bf_server_watch(self, event: AstrMessageEvent):
+        """订阅服务器状态变化，不带服务器名时列出已订阅的服务器"""
+        try:
+            server_name, game, _ = await self._parse_input_regex(
+                ["server_watch", "订阅服务器"], self.STAT_PATTERN, event.message_str
+            )
+        except ValueError as e:
+            yield event.plain_result(str(e))
+            return
+        session_origin = event.unified_msg_origin
+        if server_name is None:
+            watches = self.server_watcher.list_watches(session_origin)
+            if not watches:
+                yield event.plain_result("当前会话没有订阅服务器")
+                return
+            yield event.plain_result(
+                "已订阅的服务器：\n"
+                + "\n".join(f"[{game}] {name}" for game, name in watches)
+            )
             return
 
-        if servers_data["servers"] is not None and len(servers_data["servers"]) > 0:
-            servers_data["__update_time"] = time.time()
-            pic_url = await self._servers_data_to_pic(servers_data, game)
-            yield event.image_result(pic_url)
+        if game is None:
+            game = await self._get_channel_game(self._get_session_channel_id(event))
+        yield event.plain_result(
+            await self.server_watcher.subscribe(session_origin, game, server_name)
+        )
+
+    @filter.command("server_unwatch", alias=["取消订阅服务器"])
+    async def bf_server_unwatch(self, event: AstrMessageEvent):
+        """取消订阅服务器"""
+        try:
+            server_name, game, _ = await self._parse_input_regex(
+                ["server_unwatch", "取消订阅服务器"], self.STAT_PATTERN, event.message_str
+            )
+        except ValueError as e:
+            yield event.plain_result(str(e))
+            return
+        if server_name is None:
+            yield event.plain_result("请输入要取消订阅的服务器名")
+            return
+        if game is None:
+            game = await self._get_channel_game(self._get_session_channel_id(event))
+        removed = await self.server_watcher.unsubscribe(
+            event.unified_msg_origin, game, server_name
+        )
+        if removed is not None:
+            yield event.plain_result(f"已取消订阅 {removed}")
         else:
-            yield event.plain_result("暂无数据")
+            yield event.plain_result(f"没有订阅过 [{game}] {server_name}")
+
+    async def _send_text(self, session_origin: str, text: str):
+        """主动向会话发送文本消息"""
+        await self.context.send_message(session_origin, MessageChain().message(text))
+
+    @filter.command("compare", alias=["对比"])
+    async def bf_compare(self, event: AstrMessageEvent):
+        """对比多名玩家的数据"""
+        message_str = event.message_str
+        for str_to_remove in ["compare", "对比"]:
+            message_str = message_str.replace(str_to_remove, "")
+        match = self.COMPARE_PATTERN.match(message_str.replace(" ", "").strip())
+        if not match:
+            yield event.plain_result(
+                "格式错误，正确格式：compare 用户名1,用户名2[,用户名3][,game=游戏名]"
+            )
+            return
+
+        # 去重并保持输入顺序
+        ea_names = list(dict.fromkeys(re.split(r"[，,]", match.group(1))))
+        if len(ea_names) < 2:
+            yield event.plain_result("至少需要两名不同的玩家才能对比哦~")
+            return
+        if len(ea_names) > self.COMPARE_MAX_PLAYERS:
+            yield event.plain_result(f"最多同时对比{self.COMPARE_MAX_PLAYERS}名玩家")
+            return
+        game = match.group(2) or await self._get_channel_game(
+            self._get_session_channel_id(event)
+        )
+        lang = self.LANG_TW if game == "bf1" else self.LANG_CN
+        logger.info(f"对比玩家:{ea_names}，所查询游戏:{game}")
+
+        # 并发查询，与/stat共用玩家数据
+        semaphore = asyncio.Semaphore(self.COMPARE_CONCURRENCY)
+
+        async def fetch(ea_name):
+            async with semaphore:
+                return await self._fetch_player_data(game, "all", ea_name, lang)
+
+        with self.metrics.timer("api", "compare", game):
+            results = await asyncio.gather(
+                *[fetch(ea_name) for ea_name in ea_names], return_exceptions=True
+            )
+        players = []
+        errors = []
+        for ea_name, player_data in zip(ea_names, results):
+            if isinstance(player_data, Exception) or player_data is None:
+                errors.append(f"{ea_name}: API调用失败")
+            elif player_data.get("code") != 200:
+                errors.append(f"{ea_name}: {player_data.get('errors')[0]}")
+            else:
+                players.append(player_data)
+        if len(players) < 2:
+            yield event.plain_result("\n".join(["查询失败，无法对比"] + errors))
+            return
+        if errors:
+            yield event.plain_result("\n".join(["以下玩家查询失败，已跳过"] + errors))
+
+        update_times = [p.pop("__update_time", time.time()) for p in players]
+        compare_data = {"players": players, "__update_time": min(update_times)}
+        try:
+            pic_url = await self._compare_data_to_pic(
+                compare_data, game, self._get_session_channel_id(event)
+            )
+        except RenderQueueFullError:
+            yield event.plain_result(self.RENDER_QUEUE_FULL_MSG)
+            return
+        yield event.image_result(pic_url)
+
+    @filter.command("bf_rank", alias=["排行"])
+    async def bf_rank(self, event: AstrMessageEvent):
+        """查看本群已绑定玩家的排行榜"""
+        if event.is_private_chat():
+            yield event.plain_result("排行榜只能在群聊中使用哦~")
+            return
+        group_id = event.get_group_id()
+        await self.db_service.add_group_member(group_id, event.get_sender_id())
+
+        metric = event.message_str
+        for str_to_remove in ["bf_rank", "排行"]:
+            metric = metric.replace(str_to_remove, "")
+        metric = metric.strip().lower() or DEFAULT_RANK_METRIC
+        if metric not in RANK_METRICS:
+            yield event.plain_result(
+                f"不支持的排行指标：{metric}，可选：{','.join(RANK_METRICS)}"
+            )
+            return
+
+        # 只读取后台维护的排行榜，不会实时请求接口
+        game = await self._get_channel_game(group_id)
+        entries = self.rank_refresher.top(group_id, game, metric, self.RANK_SIZE)
+        if not entries:
+            yield event.plain_result(
+                "本群暂无排行数据，已绑定账号并在本群使用过查询命令的玩家会在后台统计，请稍后再来看看~"
+            )
+            return
+
+        label = RANK_METRICS[metric][1]
+        lines = [f"本群{game}排行榜 - {label}"]
+        for i, entry in enumerate(entries, 1):
+            value = entry["value"]
+            if metric == "time":
+                value = f"{round(value / 3600, 1)}h"
+            elif metric in ("acc", "hs"):
+                value = f"{value}%"
+            elif value == int(value):
+                value = int(value)
+            lines.append(f"{i}. {entry['ea_name']}  {value}")
+        updated_at = self.rank_refresher.updated_at(group_id, game)
+        lines.append(
+            f"最早数据更新于：{time.strftime('%Y-%m-%d %H:%M', time.localtime(updated_at))}"
+        )
+        yield event.plain_result("\n".join(lines))
+
+    async def _fetch_rank_stats(self, game: str, ea_name: str):
+        """后台刷新排行榜时查询玩家数据"""
+        return await request_api(
+            game,
+            "stats",
+            {"name": ea_name, "lang": self.LANG_CN, "platform": "pc"},
+            self.timeout_config,
+            session=self._session,
+        )
 
     @filter.command("bind", alias=["绑定"])
     async def bf_bind(self, event: AstrMessageEvent):
@@ -216,12 +646,28 @@ class BattlefieldTool(Star):
             ea_name,
             game,
             server_name,
+            sort_key,
             error_msg,
         ) = await self._handle_player_data_request(event, ["bind", "绑定"])
         if error_msg:
             yield event.plain_result(error_msg)
             return
-        # 调用bfv的接口查询用户是否存在
+        ea_id, error_msg = await self._resolve_ea_id(ea_name)
+        if error_msg:
+            yield event.plain_result(error_msg)
+            return
+
+        # 持久化绑定数据
+        msg = await self.db_service.upsert_user_bind(qq_id, ea_name, ea_id)
+        yield event.plain_result(msg)
+
+    async def _resolve_ea_id(self, ea_name: str):
+        """调用bfv的接口查询用户是否存在
+        Args:
+            ea_name: EA账号名
+        Returns:
+            tuple: (ea_id, error_msg)
+        """
         player_data = await request_api(
             self.default_game,
             "stats",
@@ -230,19 +676,85 @@ class BattlefieldTool(Star):
             session=self._session,
         )
         if player_data is None:
-            yield event.plain_result("API调用失败，没有响应任何信息")
-            return
+            return None, "API调用失败，没有响应任何信息"
 
         if player_data.get("code") != 200:
-            yield event.plain_result(player_data.get("errors")[0])
+            return None, player_data.get("errors")[0]
+
+        ea_id = player_data["userId"]
+        logger.debug(f"已查询到{ea_name}的ea_id：{ea_id}")
+        return ea_id, None
+
+    @filter.command("bf_bind_import")
+    async def bf_bind_import(self, event: AstrMessageEvent):
+        """管理员批量导入绑定数据(CSV/JSON)"""
+        if not event.is_admin():
+            yield event.plain_result("没有权限哦，只有机器人管理员可以批量导入绑定")
             return
 
-        if player_data.get("code") == 200:
-            ea_id = player_data["userId"]
-            logger.debug(f"已查询到{ea_name}的ea_id：{ea_id}")
-            # 持久化绑定数据
-            msg = await self.db_service.upsert_user_bind(qq_id, ea_name, ea_id)
-            yield event.plain_result(msg)
+        text = event.message_str.split("bf_bind_import", 1)[-1]
+        entries, errors = parse_binds(text)
+        if not entries and not errors:
+            yield event.plain_result(
+                "请在命令后附上绑定数据，每行 qq_id,ea_name[,ea_id] 或JSON列表"
+            )
+            return
+
+        # 带有ea_id的记录(如导出的数据)直接写入，其余的限制并发查询ea_id
+        semaphore = asyncio.Semaphore(self.bind_import_concurrency)
+
+        async def resolve(entry):
+            if entry["ea_id"]:
+                return entry, None
+            try:
+                async with semaphore:
+                    ea_id, error_msg = await self._resolve_ea_id(entry["ea_name"])
+            except Exception as e:
+                # 超时、网络异常或熔断等只记为该条失败，不影响其余记录
+                logger.warning(f"批量绑定查询失败: {entry['ea_name']}，{e}")
+                return entry, str(e) or type(e).__name__
+            entry["ea_id"] = ea_id
+            return entry, error_msg
+
+        binds = []
+        for entry, error_msg in await asyncio.gather(*[resolve(e) for e in entries]):
+            if error_msg:
+                errors.append(f"{entry['qq_id']}({entry['ea_name']}): {error_msg}")
+            else:
+                binds.append((entry["qq_id"], entry["ea_name"], str(entry["ea_id"])))
+
+        try:
+            count = await self.db_service.bulk_upsert_user_binds(binds)
+        except Exception as e:
+            logger.error(f"批量写入绑定数据失败: {e}")
+            yield event.plain_result(f"写入数据库失败: {e}")
+            return
+
+        msg = f"批量绑定完成：成功{count}条，失败{len(errors)}条"
+        if errors:
+            shown = errors[: self.BIND_IMPORT_MAX_ERRORS]
+            msg += "\n" + "\n".join(shown)
+            if len(errors) > len(shown):
+                msg += f"\n...其余{len(errors) - len(shown)}条失败未显示"
+        yield event.plain_result(msg)
+
+    @filter.command("bf_bind_export")
+    async def bf_bind_export(self, event: AstrMessageEvent):
+        """管理员导出绑定数据，格式与导入一致"""
+        if not event.is_admin():
+            yield event.plain_result("没有权限哦，只有机器人管理员可以导出绑定")
+            return
+        # 导出内容包含所有群的QQ号与EA账号对应关系，不在群聊中发送
+        if not event.is_private_chat():
+            yield event.plain_result("绑定数据包含用户隐私，请私聊机器人使用[bf_bind_export]命令")
+            return
+
+        fmt = "json" if "json" in event.message_str.lower() else "csv"
+        binds = await self.db_service.export_user_binds()
+        if not binds:
+            yield event.plain_result("暂无绑定数据")
+            return
+        yield event.plain_result(format_binds(binds, fmt))
 
     @filter.command("bf_init")
     async def bf_init(self, event: AstrMessageEvent):
@@ -261,7 +773,7 @@ class BattlefieldTool(Star):
             session_channel_id = event.get_group_id()
 
         # 解析命令
-        ea_name, game = await self._parse_input_regex(
+        ea_name, game, _ = await self._parse_input_regex(
             ["bf_init"], self.STAT_PATTERN, message_str
         )
         # 由于共用解析命令所以这里赋个值
@@ -275,7 +787,65 @@ class BattlefieldTool(Star):
             )
             yield event.plain_result(msg)
 
-    async def _process_api_response(self, event, api_data, data_type, game):
+    async def _fetch_player_data(self, game: str, prop: str, ea_name: str, lang: str):
+        """查询玩家数据，/stat、/weapons、/vehicles优先共用已查询到的数据
+        Args:
+            game: 所查询的游戏
+            prop: 请求属性(all/weapons/vehicles)
+            ea_name: 玩家名
+            lang: 语言
+        Returns:
+            接口响应数据
+        """
+        if self.swr_enabled:
+            # 先返回不超过最大过期时间的旧数据，过期的在后台刷新
+            stored = self.player_store.get(
+                game, ea_name, lang, prop, max_age=self.swr_max_stale
+            )
+            if stored is not None and not self.player_store.is_fresh(stored):
+                self._schedule_refresh(game, prop, ea_name, lang)
+        else:
+            stored = self.player_store.get(game, ea_name, lang, prop)
+        if stored is not None:
+            logger.debug(f"使用已保存的玩家数据: {ea_name}，{game}/{prop}")
+            return stored
+
+        return await self._request_player_data(game, prop, ea_name, lang)
+
+    async def _request_player_data(
+        self, game: str, prop: str, ea_name: str, lang: str
+    ):
+        """请求接口查询玩家数据并保存"""
+        player_data = await request_api(
+            game,
+            prop,
+            {"name": ea_name, "lang": lang, "platform": "pc"},
+            self.timeout_config,
+            session=self._session,
+        )
+        if player_data is not None and player_data.get("code") == 200:
+            self.player_store.put(game, ea_name, lang, prop, player_data)
+        return player_data
+
+    def _schedule_refresh(self, game: str, prop: str, ea_name: str, lang: str):
+        """在后台刷新玩家数据，同一玩家同时只有一个刷新任务"""
+        key = (game, prop, ea_name.lower(), lang)
+        if key in self._refresh_tasks:
+            return
+
+        async def refresh():
+            try:
+                await self._request_player_data(game, prop, ea_name, lang)
+            except Exception as e:
+                logger.warning(f"后台刷新玩家数据失败: {ea_name}，{game}/{prop}，{e}")
+            finally:
+                self._refresh_tasks.pop(key, None)
+
+        self._refresh_tasks[key] = asyncio.create_task(refresh())
+
+    async def _process_api_response(
+        self, event, api_data, data_type, game, sort_key=DEFAULT_SORT
+    ):
         """处理API响应通用逻辑"""
         if api_data is None:
             yield event.plain_result("API调用失败，没有响应任何信息")
@@ -285,7 +855,9 @@ class BattlefieldTool(Star):
             yield event.plain_result(api_data.get("errors")[0])
             return
 
-        api_data["__update_time"] = time.time()
+        # 旧数据会带有实际获取时间
+        api_data.setdefault("__update_time", time.time())
+        api_data["__sort"] = sort_key
 
         # 根据数据类型调用对应的图片生成方法
         handler_map = {
@@ -295,9 +867,29 @@ class BattlefieldTool(Star):
             "servers": self._servers_data_to_pic,
         }
 
-        pic_url = await handler_map[data_type](api_data, game)
+        try:
+            pic_url = await handler_map[data_type](
+                api_data, game, self._get_session_channel_id(event)
+            )
+        except RenderQueueFullError:
+            yield event.plain_result(self.RENDER_QUEUE_FULL_MSG)
+            return
         yield event.image_result(pic_url)
 
+    @staticmethod
+    def _get_session_channel_id(event: AstrMessageEvent) -> str:
+        """私聊为发送者id，群聊为群id"""
+        if event.is_private_chat():
+            return event.get_sender_id()
+        return event.get_group_id()
+
+    async def _get_channel_game(self, session_channel_id: str) -> str:
+        """返回会话渠道配置的默认游戏，未配置时使用全局默认"""
+        bd_game = await self.db_service.query_session_channel(session_channel_id)
+        if bd_game is None:
+            return self.default_game
+        return bd_game["default_game_tag"]
+
     async def _handle_player_data_request(
         self, event: AstrMessageEvent, str_to_remove_list: list
     ):
@@ -307,37 +899,48 @@ class BattlefieldTool(Star):
             event: AstrMessageEvent
             str_to_remove_list: 去除指令
         Returns:
-            tuple: (message_str, lang, qq_id, ea_name, game, error_msg)
+            tuple: (message_str, lang, qq_id, ea_name, game, server_name, sort_key, error_msg)
             error_msg: 错误信息，成功时为None
         """
         message_str = event.message_str
         lang = self.LANG_CN
         qq_id = event.get_sender_id()
-        session_channel_id = event.get_sender_id()
+        session_channel_id = self._get_session_channel_id(event)
         error_msg = None
         ea_name = None
         game = None
         server_name = None
-        if not event.is_private_chat():
-            session_channel_id = event.get_group_id()
+        sort_key = DEFAULT_SORT
+
+        command = str_to_remove_list[0]
+        parse_start = time.perf_counter()
 
         try:
             # 解析命令
-            ea_name, game = await self._parse_input_regex(
-                str_to_remove_list, self.STAT_PATTERN, message_str
+            ea_name, game, sort = await self._parse_input_regex(
+                str_to_remove_list,
+                self.STAT_PATTERN,
+                message_str,
+                allow_sort=command in self.SORT_COMMANDS,
             )
+            if sort is not None:
+                if sort.lower() not in SORT_METRICS:
+                    raise ValueError(
+                        f"不支持的排序方式：{sort}，可选：{','.join(SORT_METRICS)}"
+                    )
+                sort_key = sort.lower()
             # 由于共用解析方法所以这里赋个值
             if str_to_remove_list == ["servers", "服务器"]:
                 server_name = ea_name
+            # 此时可能还没确定查询的游戏，解析耗时不按游戏区分
+            self.metrics.observe("parse", time.perf_counter() - parse_start, command)
+            db_start = time.perf_counter()
+            # 记录群成员，用于群排行榜
+            if not event.is_private_chat():
+                await self.db_service.add_group_member(session_channel_id, qq_id)
             # 如果没有输入游戏标识则先查询渠道配置的
             if game is None:
-                bd_game = await self.db_service.query_session_channel(
-                    session_channel_id
-                )
-                if bd_game is None:
-                    game = self.default_game
-                else:
-                    game = bd_game["default_game_tag"]
+                game = await self._get_channel_game(session_channel_id)
             # 如果没有传入ea_name则查询已绑定的
             if ea_name is None:
                 bind_data = await self.db_service.query_bind_user(qq_id)
@@ -345,27 +948,41 @@ class BattlefieldTool(Star):
                     error_msg = "请先使用bind [ea_name]绑定"
                 else:
                     ea_name = bind_data["ea_name"]
+            self.metrics.observe("db", time.perf_counter() - db_start, command, game)
             # 战地1使用繁中
             if game == "bf1":
                 lang = self.LANG_TW
         except Exception as e:
             error_msg = str(e)
+            self.metrics.inc("command_error", command)
 
-        return message_str, lang, qq_id, ea_name, game, server_name, error_msg
+        return (
+            message_str,
+            lang,
+            qq_id,
+            ea_name,
+            game,
+            server_name,
+            sort_key,
+            error_msg,
+        )
 
-    @staticmethod
+    @classmethod
     async def _parse_input_regex(
+        cls,
         str_to_remove_list: list[str],
         pattern: Union[Pattern[str], None],
         base_string: str,
+        allow_sort: bool = False,
     ):
         """私有方法：从base_string中移除str_to_remove_list并去空格，然后根据正则取出参数
         Args:
             str_to_remove_list: 需要移除的子串list
+            pattern: 提取参数的正则，第1组为用户名，第2组为game=、sort=参数
             base_string: 原始字符串
-            default_game: 默认查询的游戏
+            allow_sort: 命令是否支持sort参数，不支持时输入sort视为格式错误
         Returns:
-            处理后的字符串
+            tuple: (ea_name, game, sort)
         """
         # 移除目标子串和空格
         for str_to_remove in str_to_remove_list:
@@ -373,80 +990,61 @@ class BattlefieldTool(Star):
         clean_str = base_string.replace(" ", "")
         # 用正则提取输入的参数
         if pattern is not None:
+            usage = "[用户名][,game=游戏名]" + ("[,sort=排序方式]" if allow_sort else "")
             match = pattern.match(clean_str.strip())
             if not match:
-                raise ValueError("格式错误，正确格式：[用户名][,game=游戏名]")
+                raise ValueError(f"格式错误，正确格式：{usage}")
             ea_name = match.group(1) or None
-            game = match.group(2)
+            options = {}
+            for key, value in cls.OPTION_PATTERN.findall(match.group(2)):
+                if key in options:
+                    raise ValueError(f"参数{key}重复，正确格式：{usage}")
+                options[key] = value
+            if "sort" in options and not allow_sort:
+                raise ValueError(f"该命令不支持sort参数，正确格式：{usage}")
+            game = options.get("game")
+            sort = options.get("sort")
         else:
             ea_name = clean_str.strip()
             game = None
-        return ea_name, game
+            sort = None
+        return ea_name, game, sort
 
-    async def _main_data_to_pic(self, data: dict, game: str):
+    async def _main_data_to_pic(self, data: dict, game: str, channel_id: str = ""):
         """将查询的全部数据转为图片
         Args:
             data:查询到的战绩数据等
+            channel_id:会话渠道id，用于渲染排队
         Returns:
             返回生成的图片
         """
-        html = bf_main_html_builder(data, game)
-        url = await self.html_render(
-            html,
-            {},
-            True,
-            {
-                "timeout": 10000,
-                "quality": self.img_quality,
-                "clip": {"x": 0, "y": 0, "width": 700, "height": 2353},
-            },
-        )
-        return url
+        return await self._render_pic("stat", data, game, 2353, channel_id)
 
-    async def _weapons_data_to_pic(self, data: dict, game: str):
+    async def _weapons_data_to_pic(self, data: dict, game: str, channel_id: str = ""):
         """将查询的数据转为图片
         Args:
             data:查询到的战绩数据等
+            channel_id:会话渠道id，用于渲染排队
         Returns:
             返回生成的图片
         """
-        html = bf_weapons_html_builder(data, game)
-        url = await self.html_render(
-            html,
-            {},
-            True,
-            {
-                "timeout": 10000,
-                "quality": self.img_quality,
-                "clip": {"x": 0, "y": 0, "width": 700, "height": 10000},
-            },
-        )
-        return url
+        return await self._render_pic("weapons", data, game, 10000, channel_id)
 
-    async def _vehicles_data_to_pic(self, data: dict, game: str):
+    async def _vehicles_data_to_pic(self, data: dict, game: str, channel_id: str = ""):
         """将查询的数据转为图片
         Args:
             data:查询到的战绩数据等
+            channel_id:会话渠道id，用于渲染排队
         Returns:
             返回生成的图片
         """
-        html = bf_vehicles_html_builder(data, game)
-        url = await self.html_render(
-            html,
-            {},
-            True,
-            {
-                "timeout": 10000,
-                "quality": self.img_quality,
-                "clip": {"x": 0, "y": 0, "width": 700, "height": 10000},
-            },
-        )
-        return url
+        return await self._render_pic("vehicles", data, game, 10000, channel_id)
 
-    async def _servers_data_to_pic(self, data: dict, game: str):
+    async def _servers_data_to_pic(self, data: dict, game: str, channel_id: str = ""):
         """将查询的服务器数据转为图片
         Args:
             data:查询到的战绩数据等
+            channel_id:会话渠道id，用于渲染排队
         Returns:
             返回生成的图片
         """
@@ -456,19 +1054,124 @@ class BattlefieldTool(Star):
             height = 450
         elif data["servers"] is not None and len(data["servers"]) == 2:
             height = 620
-        html = bf_servers_html_builder(data, game)
-        url = await self.html_render(
-            html,
-            {},
-            True,
-            {
-                "timeout": 10000,
-                "quality": self.img_quality,
-                "clip": {"x": 0, "y": 0, "width": 700, "height": height},
-            },
-        )
+        return await self._render_pic("servers", data, game, height, channel_id)
+
+    async def _compare_data_to_pic(
+        self, data: dict, game: str, channel_id: str = ""
+    ):
+        """将多名玩家的对比数据转为图片
+        Args:
+            data:{"players": 各玩家数据, "__update_time": 更新时间}
+            channel_id:会话渠道id，用于渲染排队
+        Returns:
+            返回生成的图片
+        """
+        return await self._render_pic("compare", data, game, 1400, channel_id)
+
+    async def _render_pic(
+        self, kind: str, data: dict, game: str, height: int, channel_id: str = ""
+    ):
+        """渲染图片，数据未变化时直接返回缓存的图片
+        Args:
+            kind: 数据类型(stat/weapons/vehicles/servers/compare)
+            data: 查询到的数据
+            game: 所查询的游戏
+            height: 截图高度
+            channel_id: 会话渠道id，用于渲染排队
+        Returns:
+            返回生成的图片
+        Raises:
+            RenderQueueFullError: 渲染排队已满
+        """
+        options = {
+            "timeout": 10000,
+            "quality": self.img_quality,
+            "clip": {"x": 0, "y": 0, "width": 700, "height": height},
+        }
+        renderer = self.renderer if self.renderer.supports(kind) else self.html_renderer
+        cache_key = None
+        if self.render_cache is not None:
+            # 渲染时会修改data，所以要先计算缓存键
+            cache_key = self.render_cache.make_key(
+                f"{renderer.name}:{kind}", data, game, options
+            )
+            cached = await self.render_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"命中渲染缓存: {kind}")
+                return cached
+
+        # 启用缓存时需要拿到本地文件才能存入缓存，截图越短开销越小，越优先渲染
+        priority = 0 if height <= 1000 else 1 if height <= 3000 else 2
+        submitted = time.perf_counter()
+
+        async def job():
+            self.metrics.observe("queue", time.perf_counter() - submitted, kind, game)
+            return await renderer.render(kind, data, game, options, cache_key is None)
+
+        url = await self.render_scheduler.submit(channel_id, priority, job)
+        if cache_key is not None:
+            url = await self.render_cache.put(cache_key, url)
         return url
 
+    @filter.command("bf_metrics")
+    async def bf_metrics(self, event: AstrMessageEvent):
+        """管理员查看各阶段耗时和缓存统计，带reset参数时清空统计"""
+        if not event.is_admin():
+            yield event.plain_result("没有权限哦，只有机器人管理员可以查看运行统计")
+            return
+        if "reset" in event.message_str.replace("bf_metrics", ""):
+            self.metrics.reset()
+            yield event.plain_result("已清空运行统计")
+            return
+
+        uptime = round((time.time() - self.metrics.started_at) / 60)
+        lines = [f"运行统计(最近{uptime}分钟)"]
+        lines += self.metrics.summary() or ["暂无数据"]
+        lines.append("缓存及状态:")
+        lines += [f"{name}: {value}" for name, value in self._collect_gauges().items()]
+        yield event.plain_result("\n".join(lines))
+
+    def _collect_gauges(self) -> dict:
+        """汇总各缓存、队列、连接池和接口熔断的统计值"""
+        gauges = {}
+        site_stats = get_site_stats()
+        sources = {
+            "api_cache": get_cache_stats(),
+            "db_cache": self.db_service.cache_stats(),
+            "render_queue": self.render_scheduler.stats(),
+            "http_pool": self.transport.stats(),
+            # 各接口最近请求的p95耗时(秒)，样本不足时没有该项
+            "upstream_p95": site_stats["p95"],
+        }
+        # 熔断状态 0:正常 1:半开 2:熔断
+        for site, breaker in site_stats["sites"].items():
+            sources[f"site[{site}]"] = {
+                "breaker_state": self.BREAKER_STATE_VALUES.get(breaker["state"], -1),
+                "failures": breaker["failures"],
+            }
+        if self.render_cache is not None:
+            sources["render_cache"] = self.render_cache.stats()
+        if self.asset_store is not None:
+            sources["asset_cache"] = self.asset_store.stats()
+        if self.server_catalog is not None:
+            for game, stats in self.server_catalog.stats().items():
+                sources[f"server_catalog_{game}"] = stats
+        for prefix, stats in sources.items():
+            for name, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f"{prefix}_{name}"] = value
+        return gauges
+
+    async def _export_metrics(self):
+        """定期把统计写入Prometheus文本文件"""
+        path = self.bf_data_path / "metrics.prom"
+        while True:
+            try:
+                self.metrics.write_prometheus(path, self._collect_gauges())
+            except Exception as e:
+                logger.warning(f"写入统计文件失败: {e}")
+            await asyncio.sleep(self.METRICS_EXPORT_INTERVAL)
+
     @filter.command("bf_help")
     async def bf_help(self, event: AstrMessageEvent):
         """显示战地插件帮助信息"""
@@ -484,20 +1187,22 @@ class BattlefieldTool(Star):
 注意: 私聊都能使用，群聊中仅bot管理员可用
 
 3. 战绩查询
-命令: /stat [ea_name],game=[游戏代号]
+命令: /stat [ea_name],game=[游戏代号],sort=[排序方式]
 参数:
   ea_name - EA账号名(可选，已绑定则可不填)
   game - 游戏代号(可选)
+  sort - 战绩页中武器/载具的排序方式(可选)，同武器统计
 示例: /stat ExamplePlayer,game=bf1
 
 4. 武器统计
-命令: /weapons [ea_name],game=[游戏代号] 或 /武器 [ea_name],game=[游戏代号]
-参数同上
-示例: /weapons ExamplePlayer,game=bfv
+命令: /weapons [ea_name],game=[游戏代号],sort=[排序方式] 或 /武器 [ea_name],game=[游戏代号],sort=[排序方式]
+参数同上，另有:
+  sort - 排序方式(可选): kills(击杀,默认)/kpm/acc(命中率)/hs(爆头率)/time(使用时间)，bf4武器没有使用时间，time按击杀排序
+示例: /weapons ExamplePlayer,game=bfv,sort=kpm
 
 5. 载具统计
-命令: /vehicles [ea_name],game=[游戏代号] 或 /载具 [ea_name],game=[游戏代号]
-参数同上
+命令: /vehicles [ea_name],game=[游戏代号],sort=[排序方式] 或 /载具 [ea_name],game=[游戏代号],sort=[排序方式]
+参数同武器统计
 示例: /vehicles ExamplePlayer
 
 6. 服务器查询
@@ -507,9 +1212,47 @@ class BattlefieldTool(Star):
   game - 游戏代号(可选)
 示例: /servers 中文服务器,game=bf1
 
+7. 玩家对比
+命令: /compare [ea_name1],[ea_name2][,ea_name3],game=[游戏代号] 或 /对比 ...
+参数:
+  ea_name - 2~4名玩家的EA账号名，用逗号分隔
+  game - 游戏代号(可选)
+示例: /compare PlayerA,PlayerB,game=bf1
+
+8. 服务器订阅
+命令: /server_watch [server_name],game=[游戏代号] 或 /订阅服务器 ...
+命令: /server_unwatch [server_name],game=[游戏代号] 或 /取消订阅服务器 ...
+说明: 换图、上下线或人数明显变化时主动通知，不带服务器名时列出已订阅的服务器
+
+9. 群排行榜
+命令: /bf_rank [指标] 或 /排行 [指标]
+参数: 指标(可选): kills(默认)/kd/kpm/acc/hs/wins/time
+注意: 仅统计已绑定账号且在本群使用过查询命令的玩家，数据由后台定期刷新
+
+10. 批量绑定(仅bot管理员)
+命令: /bf_bind_import [数据]
+数据: 每行 qq_id,ea_name[,ea_id]，或JSON列表 [{"qq_id": "...", "ea_name": "..."}]
+命令: /bf_bind_export [csv/json]
+导出的数据可直接用于导入，导出仅限私聊
+
+11. 运行统计(仅bot管理员)
+命令: /bf_metrics [reset]
+说明: 查看各阶段耗时、接口错误及缓存命中统计，带reset时清空
+
 注: 实际使用时不需要输入[]。/为唤醒词，以实际情况为准
 """
         yield event.plain_result(help_msg)
 
     async def terminate(self):
         """可选择实现异步的插件销毁方法，当插件卸载/停用时会调用。"""
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        await self.rank_refresher.stop()
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+        await self.server_watcher.stop()
+        if self.server_catalog is not None:
+            await self.server_catalog.stop()
+        await self.transport.close()
+        self._session = None
+        await self.db.close()
@@ -0,0 +1,148 @@
+"""
+根据模板中实际使用的class生成精简的Tailwind CSS
+
+渲染时不再加载cdn.tailwindcss.com并在浏览器中即时编译，
+修改模板的class后执行本脚本重新生成 template/tailwind.css：
+
+    python scripts/build_tailwind_css.py
+
+使用了未收录的class时脚本会报错退出，需要在RULES中补充对应规则(取值与Tailwind v3一致)。
+"""
+
+from pathlib import Path
+
+import re
+import sys
+
+TEMPLATE_DIR = Path(__file__).parent.parent.resolve() / "template"
+OUTPUT_PATH = TEMPLATE_DIR / "tailwind.css"
+
+# 模板中自定义的颜色，对应原 tailwind.config 中的 extend.colors
+CUSTOM_COLORS = {"bb": "#111B2B"}
+
+# 精简版preflight，只保留模板中用得到的元素重置
+PREFLIGHT = """*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}
+html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,sans-serif,"Apple Color Emoji","Segoe UI Emoji","Segoe UI Symbol","Noto Color Emoji"}
+body{margin:0;line-height:inherit}
+h1,h2,h3,h4,h5,h6,p{margin:0;font-size:inherit;font-weight:inherit}
+img,svg,video{display:block;vertical-align:middle}
+img,video{max-width:100%;height:auto}"""
+
+MONO_FONTS = (
+    'ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,"Liberation Mono","Courier New",monospace'
+)
+
+# 固定class -> CSS声明
+RULES = {
+    "flex": "display:flex",
+    "grid": "display:grid",
+    "flex-col": "flex-direction:column",
+    "flex-1": "flex:1 1 0%",
+    "justify-center": "justify-content:center",
+    "items-center": "align-items:center",
+    "rounded-lg": "border-radius:0.5rem",
+    "font-bold": "font-weight:700",
+    "font-semibold": "font-weight:600",
+    "font-mono": f"font-family:{MONO_FONTS}",
+    "text-center": "text-align:center",
+    "text-xl": "font-size:1.25rem;line-height:1.75rem",
+    "text-2xl": "font-size:1.5rem;line-height:2rem",
+    "text-3xl": "font-size:1.875rem;line-height:2.25rem",
+    "text-gray-200": "color:rgb(229 231 235)",
+    "text-yellow-400": "color:rgb(250 204 21)",
+    "text-slate-400": "color:rgb(148 163 184)",
+    "text-sky-500": "color:rgb(14 165 233)",
+    "bg-cover": "background-size:cover",
+    "bg-gradient-to-b": "background-image:linear-gradient(to bottom,var(--tw-gradient-stops))",
+    "from-transparent": "--tw-gradient-from:transparent;--tw-gradient-to:rgb(0 0 0 / 0);"
+    "--tw-gradient-stops:var(--tw-gradient-from),var(--tw-gradient-to)",
+    "object-scale-down": "object-fit:scale-down",
+    "truncate": "overflow:hidden;text-overflow:ellipsis;white-space:nowrap",
+}
+# 自定义颜色的渐变终点
+for _name, _color in CUSTOM_COLORS.items():
+    RULES[f"to-{_name}"] = f"--tw-gradient-to:{_color}"
+
+SPACING = {"1": "0.25rem", "2": "0.5rem", "3": "0.75rem", "4": "1rem", "6": "1.5rem"}
+
+# 带参数的class
+PATTERN_RULES = [
+    (re.compile(r"^grid-cols-(\d+)$"), lambda m: f"grid-template-columns:repeat({m[1]},minmax(0,1fr))"),
+    (re.compile(r"^col-span-(\d+)$"), lambda m: f"grid-column:span {m[1]} / span {m[1]}"),
+    (re.compile(r"^row-span-(\d+)$"), lambda m: f"grid-row:span {m[1]} / span {m[1]}"),
+    (re.compile(r"^gap-(\d+)$"), lambda m: f"gap:{SPACING[m[1]]}" if m[1] in SPACING else None),
+    (re.compile(r"^py-(\d+)$"), lambda m: f"padding-top:{SPACING[m[1]]};padding-bottom:{SPACING[m[1]]}" if m[1] in SPACING else None),
+    (re.compile(r"^max-w-\[(\d+px)\]$"), lambda m: f"max-width:{m[1]}"),
+]
+
+# Tailwind本身也不会生成样式的class(模板中的笔误)，保持原有渲染效果直接忽略
+IGNORED = {"text-1xl", "flex-nowarp"}
+
+# class属性中可能带有Jinja语法，其中的引号不算属性结束
+CLASS_ATTR = re.compile(r'class="((?:\{\{.*?\}\}|\{%.*?%\}|[^"])*)"', re.DOTALL)
+# 含有{{ }}表达式的class在渲染时才确定，整个去掉
+JINJA_EXPR = re.compile(r"\S*\{\{.*?\}\}\S*", re.DOTALL)
+# {% %}标签本身去掉，标签之间的固定class保留
+JINJA_TAG = re.compile(r"\{%.*?%\}", re.DOTALL)
+
+
+def collect_classes(template_dir: Path) -> set:
+    """收集模板中使用的全部class"""
+    classes = set()
+    for path in sorted(template_dir.glob("*.html")):
+        for attr in CLASS_ATTR.findall(path.read_text(encoding="utf-8")):
+            attr = JINJA_TAG.sub(" ", JINJA_EXPR.sub(" ", attr))
+            classes.update(attr.split())
+    return classes
+
+
+def escape_selector(name: str) -> str:
+    """转义class中的特殊字符"""
+    return re.sub(r"([\[\]/.:%])", r"\\\1", name)
+
+
+def resolve(name: str):
+    """返回class对应的CSS声明，未收录时返回None"""
+    if name in RULES:
+        return RULES[name]
+    for pattern, builder in PATTERN_RULES:
+        match = pattern.match(name)
+        if match:
+            return builder(match)
+    return None
+
+
+def build(template_dir: Path = TEMPLATE_DIR) -> str:
+    """生成CSS文本"""
+    unknown = []
+    lines = [PREFLIGHT]
+    # 按RULES定义顺序输出，保证层叠顺序稳定
+    order = {name: i for i, name in enumerate(RULES)}
+    classes = sorted(
+        collect_classes(template_dir) - IGNORED,
+        key=lambda c: (order.get(c, len(order)), c),
+    )
+    for name in classes:
+        declaration = resolve(name)
+        if declaration is None:
+            unknown.append(name)
+            continue
+        lines.append(f".{escape_selector(name)}{{{declaration}}}")
+    if unknown:
+        raise ValueError(f"以下class没有对应的CSS规则，请补充到RULES中: {unknown}")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    try:
+        css = build()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    OUTPUT_PATH.write_text(css, encoding="utf-8")
+    print(f"已生成 {OUTPUT_PATH} ({len(css)} 字节)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
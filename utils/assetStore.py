@@ -0,0 +1,384 @@
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from astrbot.api import logger
+from data.plugins.astrbot_plugin_battlefield_tool.utils.transport import get_transport
+
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import aiohttp
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow为可选依赖，没有时不缩放图片
+    Image = None
+
+
+class AssetStore:
+    """图片资源本地缓存，渲染前将页面中的远程图片替换为data URI"""
+
+    INDEX_NAME = "index.json"
+    # 页面宽度，背景图按此宽度缩放
+    PAGE_WIDTH = 700
+    IMG_TAG = re.compile(r"<img\s[^>]*>", re.IGNORECASE)
+    IMG_SRC = re.compile(r'src="(https?://[^"]+)"')
+    IMG_WIDTH = re.compile(r'(?:width="|width:\s*)(\d+)px')
+    BG_URL = re.compile(r"url\('(https?://[^']+)'\)")
+    MIME_TYPES = {
+        ".png": "image/png",
+        ".gif": "image/gif",
+        ".webp": "image/webp",
+        ".jpg": "image/jpeg",
+    }
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = 100 * 1024 * 1024,
+        timeout: int = 10,
+        concurrency: int = 8,
+    ):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存图片的最大总字节数
+            timeout: 单张图片下载超时时间(秒)
+            concurrency: 同时下载的图片数
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # url -> 缓存文件名(内容摘要+后缀)，相同内容的不同url共用一个文件
+        self._index: Dict[str, str] = {}
+        # 正在下载的url，避免同一张图片并发下载多次
+        self._downloading: Dict[str, asyncio.Task] = {}
+        self._dirty = False
+        # 缓存文件名 -> 字节数，按最近使用顺序排列，命中和淘汰都在内存中完成，无需访问磁盘
+        # 缩放图片在线程池中生成，修改时需持有锁
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # 命中过、等待刷新修改时间的文件，批量在线程池中更新，重启后仍能恢复LRU顺序
+        self._touched: Set[str] = set()
+
+    async def load(self):
+        """读取索引并扫描缓存目录恢复LRU顺序，文件操作在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        index, files, dirty = await loop.run_in_executor(None, self._load_sync)
+        with self._lock:
+            # 载入前已写入的文件较新，排在后面
+            loaded = OrderedDict((name, size) for name, size in files)
+            for name, size in self._files.items():
+                loaded.pop(name, None)
+                loaded[name] = size
+            self._files = loaded
+            self._total_bytes = sum(loaded.values())
+        index.update(self._index)
+        self._index = index
+        self._dirty = self._dirty or dirty
+
+    def _load_sync(self):
+        """
+        Returns:
+            (url -> 文件名, 按修改时间排序的[(文件名, 字节数)], 索引是否需要重新写入)
+        """
+        files = []
+        for f in self.cache_dir.iterdir():
+            if f.name == self.INDEX_NAME:
+                continue
+            try:
+                if f.is_file():
+                    st = f.stat()
+                    files.append((st.st_mtime, f.name, st.st_size))
+            except OSError:
+                continue
+        files.sort()
+        names = {name for _, name, _ in files}
+
+        index = {}
+        dirty = False
+        index_path = self.cache_dir / self.INDEX_NAME
+        try:
+            raw = json.loads(index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raw = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"图片缓存索引读取失败，将重新下载: {e}")
+            raw = {}
+        for url, name in raw.items():
+            # 旧版索引只记录摘要，启动时补全一次后缀，之后查询无需遍历目录
+            if "." not in name:
+                name = next((n for n in names if n.startswith(f"{name}.")), None)
+                dirty = True
+            if name in names:
+                index[url] = name
+            else:
+                dirty = True
+        return index, [(name, size) for _, name, size in files], dirty
+
+    def _save_index(self, index: Dict[str, str]):
+        index_path = self.cache_dir / self.INDEX_NAME
+        try:
+            index_path.write_text(json.dumps(index), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"图片缓存索引写入失败: {e}")
+
+    async def inline_html(self, html: str, session: aiohttp.ClientSession = None) -> str:
+        """
+        将html中的远程图片替换为data URI
+        Args:
+            html: 构建好的html
+            session: 可选的aiohttp.ClientSession实例，默认使用共用连接池
+        Returns:
+            替换后的html，下载失败的图片保留原地址
+        """
+        # 收集图片地址及其显示宽度，同一地址取最大宽度
+        widths: Dict[str, int] = {}
+        for tag in self.IMG_TAG.findall(html):
+            src = self.IMG_SRC.search(tag)
+            if src is None:
+                continue
+            width = self.IMG_WIDTH.search(tag)
+            width = int(width.group(1)) if width else self.PAGE_WIDTH
+            widths[src.group(1)] = max(widths.get(src.group(1), 0), width)
+        for url in self.BG_URL.findall(html):
+            widths[url] = self.PAGE_WIDTH
+        if not widths:
+            return html
+
+        if session is None:
+            session = get_transport().get_session()
+        urls = list(widths)
+        uris = await asyncio.gather(
+            *(self.to_data_uri(url, widths[url], session) for url in urls)
+        )
+        await self._flush()
+
+        replacements = {url: uri for url, uri in zip(urls, uris) if uri is not None}
+        if not replacements:
+            return html
+        pattern = re.compile("|".join(re.escape(url) for url in replacements))
+        return pattern.sub(lambda m: replacements[m.group(0)], html)
+
+    async def to_data_uri(
+        self, url: str, width: int = None, session: aiohttp.ClientSession = None
+    ) -> Optional[str]:
+        """
+        获取图片的data URI，必要时先下载并缩放到显示宽度
+        Returns:
+            data URI，下载失败时返回None
+        """
+        original = await self._get_original(url, session)
+        if original is None:
+            return None
+        # 读取、缩放和编码都是同步操作，放到线程池中避免阻塞事件循环
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._encode_sync, original, width)
+
+    def _encode_sync(self, original: Path, width: Optional[int]) -> Optional[str]:
+        """读取(必要时缩放)图片并编码为data URI"""
+        path = self._get_variant(original, width)
+        mime = self.MIME_TYPES.get(path.suffix, "image/jpeg")
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            logger.warning(f"图片缓存读取失败: {path}，{e}")
+            # 文件已被删除，下次重新下载
+            self._forget(path.name)
+            return None
+        return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+    async def get_files(
+        self, urls, session: aiohttp.ClientSession = None
+    ) -> Dict[str, Path]:
+        """
+        批量获取图片的本地文件，必要时先下载
+        Args:
+            urls: 图片地址列表
+            session: 可选的aiohttp.ClientSession实例，默认使用共用连接池
+        Returns:
+            url -> 本地文件路径，下载失败的url不在结果中
+        """
+        urls = list(dict.fromkeys(u for u in urls if u and u.startswith("http")))
+        if not urls:
+            return {}
+        if session is None:
+            session = get_transport().get_session()
+        paths = await asyncio.gather(*(self._get_original(url, session) for url in urls))
+        await self._flush()
+        return {url: path for url, path in zip(urls, paths) if path is not None}
+
+    async def _get_original(self, url: str, session) -> Optional[Path]:
+        """获取原图的本地文件，不存在时下载"""
+        name = self._index.get(url)
+        if name is not None:
+            if self._use(name):
+                return self.cache_dir / name
+            # 文件已被淘汰或删除，重新下载
+            self._index.pop(url, None)
+
+        task = self._downloading.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url, session))
+            self._downloading[url] = task
+            task.add_done_callback(lambda _: self._downloading.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _download(self, url: str, session) -> Optional[Path]:
+        async with self._semaphore:
+            try:
+                timeout_obj = aiohttp.ClientTimeout(total=self.timeout)
+                async with session.get(url, timeout=timeout_obj) as response:
+                    if response.status != 200:
+                        logger.warning(f"图片下载失败: {url}，状态码{response.status}")
+                        return None
+                    data = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"图片下载失败: {url}，{e}")
+                return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        suffix = self._sniff_suffix(data)
+        path = self.cache_dir / f"{digest}{suffix}"
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write_sync, path, data)
+        except OSError as e:
+            logger.warning(f"图片缓存写入失败: {path}，{e}")
+            return None
+        self._index[url] = path.name
+        self._dirty = True
+        return path
+
+    def _use(self, name: str) -> bool:
+        """命中时只在内存中调整LRU顺序，返回文件是否在缓存中"""
+        with self._lock:
+            if name not in self._files:
+                return False
+            self._files.move_to_end(name)
+            self._touched.add(name)
+            return True
+
+    def _forget(self, name: str):
+        with self._lock:
+            size = self._files.pop(name, None)
+            if size is not None:
+                self._total_bytes -= size
+
+    def _write_sync(self, path: Path, data: bytes):
+        """写入缓存文件并计入总大小，相同内容的文件已存在时跳过写入"""
+        if not path.exists():
+            path.write_bytes(data)
+        with self._lock:
+            if path.name in self._files:
+                self._files.move_to_end(path.name)
+                return
+            self._files[path.name] = len(data)
+            self._total_bytes += len(data)
+
+    @staticmethod
+    def _sniff_suffix(data: bytes) -> str:
+        """根据文件头判断图片格式"""
+        if data[:8] == b"\x89PNG\r\n\x1a\n":
+            return ".png"
+        if data[:4] == b"GIF8":
+            return ".gif"
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return ".webp"
+        return ".jpg"
+
+    def _get_variant(self, original: Path, width: Optional[int]) -> Path:
+        """获取缩放到显示宽度的图片，没有Pillow或原图不大于显示宽度时返回原图"""
+        # gif可能是动图，缩放会丢帧，保持原图
+        if Image is None or width is None or original.suffix == ".gif":
+            return original
+        variant = original.with_name(f"{original.stem}_w{width}{original.suffix}")
+        if self._use(variant.name):
+            return variant
+        try:
+            with Image.open(original) as img:
+                if img.width <= width:
+                    return original
+                height = max(1, round(img.height * width / img.width))
+                resized = img.resize((width, height), Image.LANCZOS)
+                buffer = io.BytesIO()
+                if original.suffix in (".png", ".webp"):
+                    resized.save(buffer, format=original.suffix[1:].upper())
+                else:
+                    resized.convert("RGB").save(buffer, format="JPEG", quality=90)
+        except OSError as e:
+            logger.warning(f"图片缩放失败: {original}，{e}")
+            return original
+        try:
+            self._write_sync(variant, buffer.getvalue())
+        except OSError as e:
+            logger.warning(f"图片缓存写入失败: {variant}，{e}")
+            return original
+        return variant
+
+    async def _flush(self):
+        """写入新的索引、检查容量并批量刷新命中文件的修改时间，一批请求只执行一次"""
+        with self._lock:
+            touched, self._touched = self._touched, set()
+        if not self._dirty and not touched:
+            return
+        dirty, self._dirty = self._dirty, False
+        # 文件操作放到线程池中执行，索引先复制一份避免与事件循环中的修改冲突
+        loop = asyncio.get_running_loop()
+        removed = await loop.run_in_executor(
+            None, self._flush_sync, dict(self._index) if dirty else None, touched
+        )
+        if removed:
+            # 原图被删除的url需要重新下载
+            self._index = {
+                url: name for url, name in self._index.items() if name not in removed
+            }
+            if not dirty:
+                self._dirty = True
+
+    def _flush_sync(self, index: Optional[Dict[str, str]], touched: Set[str]) -> Set[str]:
+        """
+        Args:
+            index: 需要写入的索引，无变化时为None
+            touched: 需要刷新修改时间的文件名
+        Returns:
+            被淘汰的文件名
+        """
+        removed = self._evict()
+        for name in touched - removed:
+            try:
+                os.utime(self.cache_dir / name)
+            except OSError:
+                pass
+        if index is not None:
+            self._save_index(
+                {url: name for url, name in index.items() if name not in removed}
+            )
+        return removed
+
+    def _evict(self) -> Set[str]:
+        """总大小超过上限时按内存中的LRU顺序淘汰最久未使用的图片"""
+        removed: List[str] = []
+        with self._lock:
+            while self._files and self._total_bytes > self.max_bytes:
+                name, size = self._files.popitem(last=False)
+                self._total_bytes -= size
+                removed.append(name)
+        for name in removed:
+            try:
+                (self.cache_dir / name).unlink()
+            except OSError:
+                pass
+        return set(removed)
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        return {"urls": len(self._index), "bytes": self._total_bytes}
@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional, Tuple
+
+import csv
+import io
+import json
+
+BIND_FIELDS = ("qq_id", "ea_name", "ea_id")
+
+
+def _normalize(entry) -> Optional[Dict[str, str]]:
+    """把一条导入记录转为 {qq_id, ea_name, ea_id}，ea_id可为空"""
+    if isinstance(entry, dict):
+        values = [entry.get(field) for field in BIND_FIELDS]
+    elif isinstance(entry, (list, tuple)):
+        values = list(entry[:3]) + [None] * (3 - len(entry[:3]))
+    else:
+        return None
+    qq_id, ea_name, ea_id = [
+        str(v).strip() if v is not None and str(v).strip() else None for v in values
+    ]
+    if not qq_id or not ea_name:
+        return None
+    return {"qq_id": qq_id, "ea_name": ea_name, "ea_id": ea_id}
+
+
+def parse_binds(text: str) -> Tuple[List[Dict[str, str]], List[str]]:
+    """
+    解析批量绑定数据，支持JSON和CSV
+    JSON: [{"qq_id": "...", "ea_name": "..."}] 或 [["qq_id", "ea_name"]]
+    CSV: 每行 qq_id,ea_name[,ea_id]，可带表头
+    Args:
+        text: 导入的文本
+    Returns:
+        (记录列表, 无法解析的行说明)，同一qq_id重复出现时以最后一条为准
+    """
+    text = text.strip()
+    errors = []
+    if text.startswith("[") or text.startswith("{"):
+        try:
+            raw = json.loads(text)
+        except json.JSONDecodeError as e:
+            return [], [f"JSON格式错误: {e}"]
+        if isinstance(raw, dict):
+            raw = raw.get("binds", [])
+        rows = list(enumerate(raw, 1)) if isinstance(raw, list) else []
+    else:
+        # 兼容中文逗号
+        reader = csv.reader(io.StringIO(text.replace("，", ",")))
+        rows = [(i, row) for i, row in enumerate(reader, 1) if any(row)]
+        if rows and [c.strip().lower() for c in rows[0][1][:2]] == ["qq_id", "ea_name"]:
+            rows = rows[1:]
+
+    entries = {}
+    for line_no, raw_entry in rows:
+        entry = _normalize(raw_entry)
+        if entry is None:
+            errors.append(f"第{line_no}条: 缺少qq_id或ea_name")
+            continue
+        entries[entry["qq_id"]] = entry
+    return list(entries.values()), errors
+
+
+def format_binds(binds: List[Dict[str, str]], fmt: str = "csv") -> str:
+    """
+    导出绑定数据，格式与导入一致
+    Args:
+        binds: 绑定记录
+        fmt: csv或json
+    Returns:
+        导出的文本
+    """
+    rows = [{field: bind.get(field) for field in BIND_FIELDS} for bind in binds]
+    if fmt == "json":
+        return json.dumps(rows, ensure_ascii=False, indent=1)
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=BIND_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import time
+
+
+class TTLLRUCache:
+    """带过期时间的LRU缓存，同时按条目数和字节数限制容量"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Args:
+            max_entries: 最大缓存条目数
+            max_bytes: 缓存内容的最大总字节数
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (过期时间戳, 字节数, 值)
+        self._data: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取缓存，不存在或已过期时返回None"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expire_at, size, value = item
+        if expire_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 0):
+        """写入缓存
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 存活时间(秒)，小于等于0时不缓存
+            size: 该条目占用的字节数，用于容量控制
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        # 淘汰最久未使用的条目直到满足容量限制
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._data))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._data)
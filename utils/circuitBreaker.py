@@ -0,0 +1,79 @@
+from collections import deque
+from typing import Optional
+
+import time
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后在一段时间内直接拒绝请求，到期后放行一次试探请求"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断持续时间(秒)，到期后进入半开状态
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """当前是否允许发出请求"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        # 半开状态同一时间只放行一个试探请求
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_cancel(self):
+        """请求被取消(如对冲请求中较慢的一方)，不计入成功或失败"""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyTracker:
+    """记录最近的请求耗时，用于计算对冲请求的触发时间"""
+
+    def __init__(self, window: int = 100, min_samples: int = 20):
+        """
+        Args:
+            window: 保留最近多少次耗时
+            min_samples: 样本数不足时不给出分位数
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float = 0.95) -> Optional[float]:
+        """返回耗时分位数(秒)，样本不足时返回None"""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
@@ -0,0 +1,92 @@
+import json
+
+try:  # orjson为可选依赖，安装后解析大体积的玩家数据更快
+    import orjson
+
+    def loads(data):
+        """解析JSON，orjson可直接解析bytes"""
+        return orjson.loads(data)
+
+    JSON_BACKEND = "orjson"
+except ImportError:
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+
+# 各接口只保留模板用得到的字段，解析后立即丢弃其余数据(职业、配备、地图、模式等)
+_PLAYER_FIELDS = {
+    "userName",
+    "userId",
+    "id",
+    "avatar",
+    "rank",
+    "rankImg",
+    "secondsPlayed",
+    "kills",
+    "deaths",
+    "killDeath",
+    "killsPerMinute",
+    "headshots",
+    "accuracy",
+    "revives",
+    "headShots",
+    "longestHeadShot",
+    "wins",
+    "loses",
+    "highestKillStreak",
+}
+_WEAPON_FIELDS = {
+    "weaponName",
+    "type",
+    "image",
+    "kills",
+    "killsPerMinute",
+    "headshots",
+    "accuracy",
+    "timeEquipped",
+    "shotsFired",
+    "headshotKills",
+    "shotsHit",
+}
+_VEHICLE_FIELDS = {
+    "vehicleName",
+    "type",
+    "image",
+    "kills",
+    "killsPerMinute",
+    "timeIn",
+    "destroyed",
+}
+
+# prop -> (保留的顶层字段, {列表字段: 列表元素保留的字段})
+PROJECTIONS = {
+    "all": (
+        _PLAYER_FIELDS,
+        {"weapons": _WEAPON_FIELDS, "vehicles": _VEHICLE_FIELDS},
+    ),
+    "weapons": ({"userName", "userId", "id", "avatar"}, {"weapons": _WEAPON_FIELDS}),
+    "vehicles": ({"userName", "userId", "id", "avatar"}, {"vehicles": _VEHICLE_FIELDS}),
+}
+
+
+def project(data: dict, prop: str) -> dict:
+    """
+    按接口裁剪数据，没有定义裁剪规则的接口原样返回
+    Args:
+        data: 解析后的响应数据
+        prop: 请求属性(all/weapons/vehicles等)
+    Returns:
+        裁剪后的数据
+    """
+    projection = PROJECTIONS.get(prop)
+    if projection is None or not isinstance(data, dict):
+        return data
+    fields, list_fields = projection
+    result = {k: v for k, v in data.items() if k in fields}
+    for key, item_fields in list_fields.items():
+        items = data.get(key)
+        if isinstance(items, list):
+            result[key] = [
+                {k: v for k, v in item.items() if k in item_fields} for item in items
+            ]
+    return result
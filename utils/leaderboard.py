@@ -0,0 +1,258 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from astrbot.api import logger
+from data.plugins.astrbot_plugin_battlefield_tool.utils.statIndex import to_number
+
+import asyncio
+import bisect
+import time
+
+# 排行指标 -> (数据字段, 名称)
+RANK_METRICS = {
+    "kills": ("kills", "击杀"),
+    "kd": ("killDeath", "K/D"),
+    "kpm": ("killsPerMinute", "KPM"),
+    "acc": ("accuracy", "命中率"),
+    "hs": ("headshots", "爆头率"),
+    "wins": ("wins", "胜利场数"),
+    "time": ("secondsPlayed", "游戏时间"),
+}
+DEFAULT_RANK_METRIC = "kills"
+
+
+def extract_rank_stats(player_data: dict) -> Dict[str, float]:
+    """从stats接口的数据中取出排行用的指标"""
+    return {
+        metric: to_number(player_data.get(field))
+        for metric, (field, _) in RANK_METRICS.items()
+    }
+
+
+class Leaderboard:
+    """一个群在某个游戏下的排行榜，每个指标维护一个有序列表，更新时只调整变化的玩家"""
+
+    def __init__(self):
+        self._values: Dict[str, Dict[str, float]] = {}
+        # 指标 -> [(-数值, qq_id)]，按升序即为数值降序
+        self._ranks: Dict[str, List[Tuple[float, str]]] = {
+            metric: [] for metric in RANK_METRICS
+        }
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, member: str):
+        return member in self._values
+
+    def update(self, member: str, values: Dict[str, float]) -> bool:
+        """
+        更新玩家的指标
+        Returns:
+            数据是否有变化
+        """
+        old = self._values.get(member)
+        if old == values:
+            return False
+        for metric, ranks in self._ranks.items():
+            if old is not None:
+                del ranks[bisect.bisect_left(ranks, (-old[metric], member))]
+            bisect.insort(ranks, (-values[metric], member))
+        self._values[member] = values
+        return True
+
+    def remove(self, member: str):
+        old = self._values.pop(member, None)
+        if old is None:
+            return
+        for metric, ranks in self._ranks.items():
+            del ranks[bisect.bisect_left(ranks, (-old[metric], member))]
+
+    def members(self):
+        return list(self._values)
+
+    def top(self, metric: str, n: int) -> List[Tuple[str, float]]:
+        """返回前n名 (qq_id, 数值)"""
+        return [(member, -value) for value, member in self._ranks[metric][:n]]
+
+
+class LeaderboardRefresher:
+    """在后台定期刷新已绑定群成员的数据，查询排行时只读内存中的排行榜"""
+
+    TICK_INTERVAL = 60  # 每次检查过期数据的间隔(秒)
+    BATCH_SIZE = 30  # 每次最多刷新的玩家数
+
+    def __init__(
+        self,
+        db_service,
+        fetcher: Callable[[str, str], Awaitable[Optional[dict]]],
+        game_getter: Callable[[str], Awaitable[str]],
+        refresh_interval: float = 3600,
+        concurrency: int = 2,
+    ):
+        """
+        Args:
+            db_service: BattleFieldDBService
+            fetcher: 查询玩家stats数据的方法 (game, ea_name) -> 响应数据
+            game_getter: 返回群默认游戏的方法 (group_id) -> game
+            refresh_interval: 玩家数据的刷新间隔(秒)
+            concurrency: 同时刷新的玩家数
+        """
+        self.db_service = db_service
+        self.fetcher = fetcher
+        self.game_getter = game_getter
+        self.refresh_interval = refresh_interval
+        self.concurrency = max(1, concurrency)
+        # (qq_id, game) -> {"ea_name", "stats", "updated_at"}
+        self._players: Dict[Tuple[str, str], Dict] = {}
+        # (group_id, game) -> Leaderboard
+        self._boards: Dict[Tuple[str, str], Leaderboard] = {}
+        # 查询失败的玩家(如改名)在下个刷新周期前不再重试
+        self._failed: Dict[Tuple[str, str], float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = False
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"刷新排行榜失败: {e}")
+            await asyncio.sleep(self.TICK_INTERVAL)
+
+    async def _load(self):
+        """启动后首次刷新前载入已保存的数据，重启后排行榜立即可用"""
+        if self._loaded:
+            return
+        for row in await self.db_service.query_player_stats():
+            self._players[(row["qq_id"], row["game"])] = {
+                "ea_name": row["ea_name"],
+                "stats": row["stats"],
+                "updated_at": row["updated_at"],
+            }
+        self._loaded = True
+
+    async def _targets(self) -> Dict[Tuple[str, str], Tuple[str, List[str]]]:
+        """返回需要统计的 (qq_id, game) -> (ea_name, 所在群列表)"""
+        binds = {b["qq_id"]: b for b in await self.db_service.export_user_binds()}
+        targets = {}
+        for group_id, members in (await self.db_service.query_group_members()).items():
+            game = await self.game_getter(group_id)
+            for qq_id in members:
+                bind = binds.get(qq_id)
+                if bind is None:
+                    continue
+                entry = targets.setdefault((qq_id, game), (bind["ea_name"], []))
+                entry[1].append(group_id)
+        return targets
+
+    async def refresh_once(self):
+        """刷新最久未更新的一批玩家，并同步各群排行榜"""
+        await self._load()
+        targets = await self._targets()
+        now = time.time()
+        stale = []
+        for key, (ea_name, _) in targets.items():
+            if now - self._failed.get(key, 0) < self.refresh_interval:
+                continue
+            player = self._players.get(key)
+            if (
+                player is None
+                or player["ea_name"] != ea_name
+                or now - player["updated_at"] >= self.refresh_interval
+            ):
+                stale.append((player["updated_at"] if player else 0, key))
+        stale.sort()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def refresh(key):
+            qq_id, game = key
+            ea_name = targets[key][0]
+            try:
+                async with semaphore:
+                    player_data = await self.fetcher(game, ea_name)
+            except Exception as e:
+                # 超时、网络异常或熔断时同样等到下个刷新周期再重试
+                logger.debug(f"排行榜刷新玩家数据失败: {ea_name}({game})，{e}")
+                self._failed[key] = time.time()
+                return None
+            if player_data is None or player_data.get("code") != 200:
+                self._failed[key] = time.time()
+                return None
+            self._failed.pop(key, None)
+            return qq_id, game, ea_name, extract_rank_stats(player_data), time.time()
+
+        results = await asyncio.gather(
+            *[refresh(key) for _, key in stale[: self.BATCH_SIZE]],
+            return_exceptions=True,
+        )
+        rows = [r for r in results if r is not None and not isinstance(r, Exception)]
+        for qq_id, game, ea_name, stats, updated_at in rows:
+            self._players[(qq_id, game)] = {
+                "ea_name": ea_name,
+                "stats": stats,
+                "updated_at": updated_at,
+            }
+        await self.db_service.upsert_player_stats(rows)
+        self._sync_boards(targets)
+        if rows:
+            logger.debug(f"排行榜刷新了{len(rows)}名玩家，剩余{len(stale) - len(rows)}名待刷新")
+
+    def _sync_boards(self, targets: Dict[Tuple[str, str], Tuple[str, List[str]]]):
+        """按最新的成员和数据更新各群排行榜，数据未变化的玩家不会重新排序"""
+        expected: Dict[Tuple[str, str], set] = {}
+        for (qq_id, game), (_, group_ids) in targets.items():
+            player = self._players.get((qq_id, game))
+            for group_id in group_ids:
+                members = expected.setdefault((group_id, game), set())
+                if player is None:
+                    continue
+                members.add(qq_id)
+                board = self._boards.setdefault((group_id, game), Leaderboard())
+                board.update(qq_id, player["stats"])
+        for key, board in list(self._boards.items()):
+            members = expected.get(key, set())
+            for member in board.members():
+                if member not in members:
+                    board.remove(member)
+            if not len(board):
+                del self._boards[key]
+
+    def top(self, group_id: str, game: str, metric: str, n: int = 20) -> List[Dict]:
+        """
+        读取群排行榜
+        Returns:
+            [{"qq_id", "ea_name", "value"}]
+        """
+        board = self._boards.get((group_id, game))
+        if board is None:
+            return []
+        return [
+            {
+                "qq_id": qq_id,
+                "ea_name": self._players[(qq_id, game)]["ea_name"],
+                "value": value,
+            }
+            for qq_id, value in board.top(metric, n)
+        ]
+
+    def updated_at(self, group_id: str, game: str) -> Optional[float]:
+        """返回群排行榜中最早的数据更新时间"""
+        board = self._boards.get((group_id, game))
+        if board is None:
+            return None
+        return min(self._players[(m, game)]["updated_at"] for m in board.members())
@@ -0,0 +1,171 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+from data.plugins.astrbot_plugin_battlefield_tool.utils.template import BANNERS
+
+import bisect
+import os
+import time
+
+# 耗时分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 各阶段名称，用于 /bf_metrics 展示
+STAGE_NAMES = {
+    "parse": "参数解析",
+    "db": "数据库查询",
+    "api": "获取数据",
+    "upstream": "接口请求",
+    "queue": "渲染排队",
+    "build": "构建页面",
+    "render": "渲染图片",
+}
+
+# 不支持的游戏统一记为other，避免任意输入的game产生新的统计序列
+OTHER_GAME = "other"
+
+
+def _game_label(game: str) -> str:
+    if not game:
+        return ""
+    return game if game in BANNERS else OTHER_GAME
+
+
+def _escape(value) -> str:
+    """转义Prometheus标签值中的反斜杠、双引号和换行"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """固定分桶的耗时直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为+Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按分桶估算分位数，返回所在分桶的上界"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    """插件内的耗时直方图和计数器，按阶段、命令和游戏区分"""
+
+    def __init__(self):
+        # (stage, command, game) -> Histogram
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        # (name, label) -> 次数
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float, command: str = "", game: str = ""):
+        key = (stage, command, _game_label(game))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, command: str = "", game: str = ""):
+        """记录代码块耗时，异常时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, command, game)
+
+    def inc(self, name: str, label: str = "", value: int = 1):
+        key = (name, label)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+        self.started_at = time.time()
+
+    def summary(self) -> List[str]:
+        """按阶段汇总的文本，用于 /bf_metrics"""
+        lines = []
+        for (stage, command, game), h in sorted(self.histograms.items()):
+            name = STAGE_NAMES.get(stage, stage)
+            target = "/".join(x for x in (command, game) if x)
+            lines.append(
+                f"{name}[{target}] n={h.count} avg={h.sum / h.count * 1000:.0f}ms "
+                f"p50≤{h.quantile(0.5) * 1000:.0f}ms p99≤{h.quantile(0.99) * 1000:.0f}ms"
+            )
+        for (name, label), value in sorted(self.counters.items()):
+            lines.append(f"{name}{f'[{label}]' if label else ''}: {value}")
+        return lines
+
+    def to_prometheus(self, gauges: Dict[str, float] = None) -> str:
+        """
+        生成Prometheus文本格式
+        Args:
+            gauges: 额外输出的数值，如各缓存的命中数
+        Returns:
+            文本
+        """
+        lines = [
+            "# HELP bf_stage_seconds Battlefield Tool 各阶段耗时",
+            "# TYPE bf_stage_seconds histogram",
+        ]
+        for (stage, command, game), h in sorted(self.histograms.items()):
+            labels = (
+                f'stage="{_escape(stage)}",command="{_escape(command)}",game="{_escape(game)}"'
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets_of(h), h.counts):
+                cumulative += count
+                lines.append(f'bf_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"bf_stage_seconds_sum{{{labels}}} {h.sum}")
+            lines.append(f"bf_stage_seconds_count{{{labels}}} {h.count}")
+        lines += [
+            "# HELP bf_events_total Battlefield Tool 事件计数",
+            "# TYPE bf_events_total counter",
+        ]
+        for (name, label), value in sorted(self.counters.items()):
+            labels = f'event="{_escape(name)}",label="{_escape(label)}"'
+            lines.append(f"bf_events_total{{{labels}}} {value}")
+        if gauges:
+            lines += [
+                "# HELP bf_state Battlefield Tool 缓存等状态",
+                "# TYPE bf_state gauge",
+            ]
+            for name, value in sorted(gauges.items()):
+                lines.append(f'bf_state{{name="{_escape(name)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def buckets_of(histogram: Histogram):
+        return [str(b) for b in histogram.buckets] + ["+Inf"]
+
+    def write_prometheus(self, path: Path, gauges: Dict[str, float] = None):
+        """写入Prometheus文本文件(先写临时文件再替换，避免读到一半的内容)"""
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(self.to_prometheus(gauges), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+_default_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """返回插件共用的指标"""
+    return _default_metrics
@@ -0,0 +1,97 @@
+from collections import OrderedDict
+from typing import Optional
+
+import time
+
+
+class PlayerPayloadStore:
+    """按玩家保存最近查询到的数据，/stat、/weapons、/vehicles之间共享"""
+
+    # 每种查询可以由哪些已保存的数据提供，all中已包含武器和载具列表
+    COVERAGE = {
+        "all": ("all",),
+        "weapons": ("weapons", "all"),
+        "vehicles": ("vehicles", "all"),
+    }
+    # 每种查询需要保留的列表字段，其余标量字段全部保留
+    PROJECTIONS = {
+        "all": None,
+        "weapons": ("weapons",),
+        "vehicles": ("vehicles",),
+    }
+
+    def __init__(self, ttl: float = 300, max_players: int = 512):
+        """
+        Args:
+            ttl: 数据保持新鲜的时间(秒)
+            max_players: 最多保存的玩家数
+        """
+        self.ttl = ttl
+        self.max_players = max_players
+        # (game, name, lang) -> {prop: (获取时间, 数据)}
+        self._players: "OrderedDict[tuple, dict]" = OrderedDict()
+
+    @staticmethod
+    def _key(game: str, name: str, lang: str) -> tuple:
+        return game, name.strip().lower(), lang
+
+    def put(self, game: str, name: str, lang: str, prop: str, payload: dict):
+        """保存查询到的数据"""
+        key = self._key(game, name, lang)
+        entry = self._players.get(key)
+        if entry is None:
+            entry = self._players[key] = {}
+        else:
+            self._players.move_to_end(key)
+        entry[prop] = (time.time(), dict(payload))
+        while len(self._players) > self.max_players:
+            self._players.popitem(last=False)
+
+    def get(
+        self, game: str, name: str, lang: str, prop: str, max_age: float = None
+    ) -> Optional[dict]:
+        """
+        读取可用于该查询的数据
+        Args:
+            game: 所查询的游戏
+            name: 玩家名
+            lang: 语言
+            prop: 查询类型(all/weapons/vehicles)
+            max_age: 可接受的最大数据年龄(秒)，默认为新鲜期
+        Returns:
+            按查询类型裁剪后的数据副本，__update_time为数据实际获取时间，
+            没有满足条件的数据时返回None
+        """
+        if max_age is None:
+            max_age = self.ttl
+        key = self._key(game, name, lang)
+        entry = self._players.get(key)
+        if entry is None:
+            return None
+        now = time.time()
+        # 取满足条件的数据中最新的一份
+        best = None
+        for source in self.COVERAGE.get(prop, (prop,)):
+            item = entry.get(source)
+            if item is not None and now - item[0] <= max_age:
+                if best is None or item[0] > best[0]:
+                    best = item
+        if best is None:
+            return None
+        self._players.move_to_end(key)
+        data = self._project(best[1], prop)
+        data["__update_time"] = best[0]
+        return data
+
+    def is_fresh(self, data: dict) -> bool:
+        """判断get返回的数据是否仍在新鲜期内"""
+        return time.time() - data["__update_time"] <= self.ttl
+
+    def _project(self, payload: dict, prop: str) -> dict:
+        """只保留该查询需要的列表字段，返回浅拷贝"""
+        keep = self.PROJECTIONS.get(prop)
+        if keep is None:
+            return dict(payload)
+        return {
+            k: v for k, v in payload.items() if not isinstance(v, list) or k in keep
+        }
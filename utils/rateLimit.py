@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """令牌桶限流器，所有接口请求共用"""
+
+    def __init__(self, rate: float = 5, burst: int = 10):
+        """
+        Args:
+            rate: 每秒补充的令牌数，小于等于0时不限流
+            burst: 令牌桶容量，即允许的瞬时并发请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        # 收到429等响应后暂停发放令牌直到该时间
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def configure(self, rate: float, burst: int):
+        """修改限流参数"""
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = min(self._tokens, self.burst)
+
+    def pause(self, seconds: float):
+        """在指定时间内暂停发放令牌，用于遵守Retry-After"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, timeout: float):
+        """
+        获取一个令牌
+        Args:
+            timeout: 最长等待时间(秒)
+        Raises:
+            TimeoutError: 在等待时间内无法获取令牌
+        """
+        if self.rate <= 0:
+            return
+        deadline = time.monotonic() + timeout
+        # 加锁保证等待中的请求按先来后到获取令牌
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                wait = max(self._paused_until - now, 0)
+                if wait == 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                if wait == 0:
+                    wait = (1 - self._tokens) / self.rate
+                if now + wait > deadline:
+                    raise TimeoutError(f"请求限流: {timeout:.1f}秒内无法发出请求")
+                await asyncio.sleep(wait)
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+from astrbot.api import logger
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+
+
+class RenderCache:
+    """按内容寻址的渲染图片磁盘缓存，数据未变化时直接复用已渲染的图片"""
+
+    # 图片上显示的更新时间精确到秒，缓存键中按秒取整，同一份数据重复渲染时仍能命中
+    UPDATE_TIME_KEY = "__update_time"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存图片的最大总字节数
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # key -> (文件路径, 字节数)，按最近使用顺序排列
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def load(self):
+        """扫描缓存目录，按修改时间恢复LRU顺序，文件操作在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, self._scan)
+        for f, size in files:
+            if f.stem not in self._entries:
+                self._entries[f.stem] = (f, size)
+                self._bytes += size
+        await self._evict()
+
+    def _scan(self) -> List[tuple]:
+        files = []
+        for f in self.cache_dir.iterdir():
+            try:
+                if f.is_file():
+                    st = f.stat()
+                    files.append((st.st_mtime, f, st.st_size))
+            except OSError:
+                continue
+        files.sort(key=lambda item: item[0])
+        return [(f, size) for _, f, size in files]
+
+    def make_key(self, template_name: str, data: dict, game: str, options: dict) -> str:
+        """
+        生成缓存键
+        Args:
+            template_name: 模板名
+            data: 查询到的数据
+            game: 所查询的游戏
+            options: 渲染参数
+        Returns:
+            sha256摘要
+        """
+        payload = dict(data)
+        if payload.get(self.UPDATE_TIME_KEY) is not None:
+            payload[self.UPDATE_TIME_KEY] = int(payload[self.UPDATE_TIME_KEY])
+        raw = json.dumps(
+            [template_name, game, payload, options],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """读取缓存图片路径，不存在时返回None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        # 刷新修改时间，重启后仍能保持LRU顺序，文件不存在时返回False
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self._touch, entry[0]):
+            if self._entries.get(key) is entry:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return str(entry[0])
+
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    async def put(self, key: str, image_path: str) -> str:
+        """
+        将渲染好的图片移入缓存
+        Args:
+            key: 缓存键
+            image_path: 渲染得到的图片路径
+        Returns:
+            缓存中的图片路径，写入失败时返回原路径
+        """
+        src = Path(image_path)
+        target = self.cache_dir / f"{key}{src.suffix or '.jpg'}"
+        loop = asyncio.get_running_loop()
+        try:
+            size = await loop.run_in_executor(None, self._move, src, target)
+        except OSError as e:
+            logger.warning(f"渲染缓存写入失败: {e}")
+            return image_path
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (target, size)
+        self._bytes += size
+        await self._evict()
+        return str(target)
+
+    @staticmethod
+    def _move(src: Path, target: Path) -> int:
+        shutil.move(str(src), str(target))
+        return target.stat().st_size
+
+    def stats(self) -> dict:
+        """返回缓存统计信息"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def _evict(self):
+        """淘汰最久未使用的图片直到满足容量限制，在线程池中删除文件"""
+        removed = []
+        while self._entries and self._bytes > self.max_bytes:
+            removed.append(self._remove(next(iter(self._entries))))
+        if removed:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._unlink, removed)
+
+    def _remove(self, key: str) -> Path:
+        """从索引中移除，返回对应的文件路径"""
+        path, size = self._entries.pop(key)
+        self._bytes -= size
+        return path
+
+    @staticmethod
+    def _unlink(paths: List[Path]):
+        for path in paths:
+            try:
+                path.unlink()
+            except OSError:
+                pass
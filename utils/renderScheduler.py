@@ -0,0 +1,94 @@
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict
+
+import asyncio
+
+
+class RenderQueueFullError(Exception):
+    """渲染队列已满"""
+
+
+class RenderScheduler:
+    """渲染调度器：限制同时渲染数，按优先级排队，同一优先级内各会话轮流执行"""
+
+    def __init__(self, concurrency: int = 2, max_queue: int = 20):
+        """
+        Args:
+            concurrency: 同时进行的渲染数
+            max_queue: 最多排队的渲染数，超出时拒绝
+        """
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        # 优先级 -> 会话 -> 排队任务，数字越小越优先
+        self._queues: Dict[int, "OrderedDict[str, deque]"] = {}
+        self._pending = 0
+        self._running = 0
+        self.rejected = 0
+
+    async def submit(
+        self, channel_id: str, priority: int, job: Callable[[], Awaitable]
+    ):
+        """
+        提交渲染任务并等待结果
+        Args:
+            channel_id: 会话渠道id，用于各会话间轮流执行
+            priority: 优先级，数字越小越优先(开销小的渲染)
+            job: 返回协程的渲染方法
+        Returns:
+            渲染结果
+        Raises:
+            RenderQueueFullError: 排队数已达上限
+        """
+        if self._running >= self.concurrency and self._pending >= self.max_queue:
+            self.rejected += 1
+            raise RenderQueueFullError("渲染队列已满")
+
+        future = asyncio.get_running_loop().create_future()
+        channels = self._queues.setdefault(priority, OrderedDict())
+        channels.setdefault(channel_id, deque()).append((future, job))
+        self._pending += 1
+        self._pump()
+        return await future
+
+    def stats(self) -> dict:
+        """返回调度统计信息"""
+        return {
+            "running": self._running,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
+
+    def _pump(self):
+        """有空闲名额时取出下一个任务执行"""
+        while self._running < self.concurrency and self._pending > 0:
+            future, job = self._next()
+            if future.done():  # 调用方已取消
+                continue
+            self._running += 1
+            asyncio.ensure_future(self._run(future, job))
+
+    def _next(self):
+        """取优先级最高的队列中排在最前面的会话的任务，并把该会话移到队尾"""
+        priority = min(p for p, channels in self._queues.items() if channels)
+        channels = self._queues[priority]
+        channel_id, jobs = next(iter(channels.items()))
+        item = jobs.popleft()
+        if jobs:
+            channels.move_to_end(channel_id)
+        else:
+            del channels[channel_id]
+        self._pending -= 1
+        return item
+
+    async def _run(self, future: asyncio.Future, job: Callable[[], Awaitable]):
+        try:
+            result = await job()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._running -= 1
+            self._pump()
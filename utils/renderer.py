@@ -0,0 +1,607 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from astrbot.api import logger
+from data.plugins.astrbot_plugin_battlefield_tool.utils.assetStore import AssetStore
+from data.plugins.astrbot_plugin_battlefield_tool.utils.metrics import get_metrics
+from data.plugins.astrbot_plugin_battlefield_tool.utils.template import (
+    BANNERS,
+    LOGOS,
+    bf_main_html_builder,
+    bf_weapons_html_builder,
+    bf_vehicles_html_builder,
+    bf_servers_html_builder,
+    bf_compare_html_builder,
+    prepare_main_data,
+    prepare_weapons_data,
+    prepare_vehicles_data,
+    format_update_time,
+)
+from data.plugins.astrbot_plugin_battlefield_tool.utils.statIndex import DEFAULT_SORT
+
+import asyncio
+import time
+import uuid
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Pillow为可选依赖，只有使用pillow渲染后端时才需要
+    Image = ImageDraw = ImageFont = None
+
+
+class Renderer(ABC):
+    """渲染后端接口，将查询到的数据渲染为图片"""
+
+    name = ""
+    # 支持渲染的数据类型
+    kinds = ()
+
+    def supports(self, kind: str) -> bool:
+        return kind in self.kinds
+
+    @abstractmethod
+    async def render(
+        self, kind: str, data: dict, game: str, options: dict, return_url: bool
+    ) -> str:
+        """
+        Args:
+            kind: 数据类型(stat/weapons/vehicles/servers)
+            data: 查询到的数据
+            game: 所查询的游戏
+            options: 截图参数
+            return_url: 是否返回url，为False时返回本地文件路径
+        Returns:
+            图片url或本地文件路径
+        """
+
+
+class HtmlRenderer(Renderer):
+    """使用Jinja模板构建html，再交给AstrBot的文转图服务截图"""
+
+    name = "html"
+    HTML_BUILDERS = {
+        "stat": bf_main_html_builder,
+        "weapons": bf_weapons_html_builder,
+        "vehicles": bf_vehicles_html_builder,
+        "servers": bf_servers_html_builder,
+        "compare": bf_compare_html_builder,
+    }
+
+    def __init__(
+        self,
+        html_render: Callable,
+        asset_store: Optional[AssetStore] = None,
+        session_getter: Callable = lambda: None,
+    ):
+        """
+        Args:
+            html_render: Star.html_render
+            asset_store: 图片资源缓存，为None时页面直接引用远程图片
+            session_getter: 返回当前aiohttp.ClientSession的方法
+        """
+        self.html_render = html_render
+        self.asset_store = asset_store
+        self.session_getter = session_getter
+        self.kinds = tuple(self.HTML_BUILDERS)
+
+    async def render(self, kind, data, game, options, return_url):
+        metrics = get_metrics()
+        with metrics.timer("build", kind, game):
+            html = self.HTML_BUILDERS[kind](data, game)
+            if self.asset_store is not None:
+                html = await self.asset_store.inline_html(html, self.session_getter())
+        with metrics.timer("render", kind, game):
+            return await self.html_render(html, {}, return_url, options)
+
+
+# 与模板中的Tailwind样式对应的颜色
+BG_COLOR = (17, 27, 43)
+CARD_COLOR = tuple(round(c + (255 - c) * 0.05) for c in BG_COLOR)
+WHITE = (255, 255, 255)
+YELLOW = (250, 204, 21)
+SLATE = (148, 163, 184)
+GRAY = (229, 231, 235)
+SKY = (14, 165, 233)
+
+PAGE_WIDTH = 700
+MARGIN = 20
+PADDING = 10
+GAP = 8
+CONTENT_WIDTH = PAGE_WIDTH - MARGIN * 2
+
+# 常见的中文字体路径，未配置字体时依次尝试
+CJK_FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/wqy-microhei/wqy-microhei.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+)
+
+
+class PillowRenderer(Renderer):
+    """直接用Pillow按模板布局绘制图片，不依赖无头浏览器"""
+
+    name = "pillow"
+    kinds = ("stat", "weapons", "vehicles", "servers")
+    # 生成的图片保留时间(秒)，未启用图片缓存时定期清理
+    OUTPUT_KEEP_SECONDS = 600
+
+    def __init__(
+        self,
+        output_dir: Path,
+        asset_store: Optional[AssetStore] = None,
+        session_getter: Callable = lambda: None,
+        img_quality: int = 90,
+        font_path: str = "",
+    ):
+        """
+        Args:
+            output_dir: 图片输出目录
+            asset_store: 图片资源缓存，为None时不绘制图片
+            session_getter: 返回当前aiohttp.ClientSession的方法
+            img_quality: jpeg质量
+            font_path: 字体文件路径，为空时自动查找中文字体
+        """
+        if Image is None:
+            raise RuntimeError("使用pillow渲染需要先安装Pillow: pip install pillow")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.asset_store = asset_store
+        self.session_getter = session_getter
+        self.img_quality = img_quality
+        self.font_path = self._find_font(font_path)
+        self._fonts: Dict[int, "ImageFont.FreeTypeFont"] = {}
+
+    @staticmethod
+    def _find_font(font_path: str) -> Optional[str]:
+        candidates = (font_path,) + CJK_FONT_CANDIDATES if font_path else CJK_FONT_CANDIDATES
+        for candidate in candidates:
+            if candidate and Path(candidate).exists():
+                return candidate
+        logger.warning("未找到中文字体，pillow渲染的中文可能无法显示，请配置pillow_font_path")
+        return None
+
+    def _font(self, size: int):
+        font = self._fonts.get(size)
+        if font is None:
+            if self.font_path:
+                font = ImageFont.truetype(self.font_path, size)
+            else:
+                try:
+                    font = ImageFont.load_default(size)
+                except TypeError:
+                    # Pillow 10.1之前的默认字体不支持指定字号
+                    font = ImageFont.load_default()
+            self._fonts[size] = font
+        return font
+
+    async def render(self, kind, data, game, options, return_url):
+        metrics = get_metrics()
+        with metrics.timer("build", kind, game):
+            self._prepare(kind, data, game)
+            # 图片下载是异步的，先取回本地文件，再在线程池中绘制，避免阻塞事件循环
+            images = {}
+            if self.asset_store is not None:
+                images = await self.asset_store.get_files(
+                    self._image_urls(kind, data, game), self.session_getter()
+                )
+        loop = asyncio.get_running_loop()
+        with metrics.timer("render", kind, game):
+            return await loop.run_in_executor(
+                None, self._render_sync, kind, data, game, images
+            )
+
+    @staticmethod
+    def _prepare(kind: str, data: dict, game: str):
+        """与html模板一致地整理数据"""
+        sort = data.get("__sort", DEFAULT_SORT)
+        if kind == "stat":
+            prepare_main_data(data)
+            data["__weapon_data"] = prepare_weapons_data(data, 5, game, sort)
+            data["__vehicle_data"] = prepare_vehicles_data(data, 5, sort)
+        elif kind == "weapons":
+            data["__weapon_data"] = prepare_weapons_data(data, 50, game, sort)
+        elif kind == "vehicles":
+            data["__vehicle_data"] = prepare_vehicles_data(data, 50, sort)
+
+    @staticmethod
+    def _image_urls(kind: str, data: dict, game: str) -> List[str]:
+        """收集需要绘制的图片地址"""
+        if kind == "servers":
+            return [BANNERS[game], LOGOS[game]] + [
+                s.get("url", "") for s in data["servers"] or []
+            ]
+        urls = [BANNERS[game], data.get("avatar") or "", data.get("rankImg") or ""]
+        urls += [w.get("image", "") for w in data.get("__weapon_data") or []]
+        urls += [v.get("image", "") for v in data.get("__vehicle_data") or []]
+        return urls
+
+    def _render_sync(self, kind: str, data: dict, game: str, images: dict) -> str:
+        painter = {
+            "stat": self._paint_main,
+            "weapons": self._paint_weapons,
+            "vehicles": self._paint_vehicles,
+            "servers": self._paint_servers,
+        }[kind]
+        img = painter(data, game, images)
+        self._cleanup_output()
+        path = self.output_dir / f"{uuid.uuid4().hex}.jpg"
+        img.save(path, format="JPEG", quality=self.img_quality)
+        return str(path)
+
+    def _cleanup_output(self):
+        """清理过期的输出图片"""
+        expire = time.time() - self.OUTPUT_KEEP_SECONDS
+        for f in self.output_dir.iterdir():
+            try:
+                if f.stat().st_mtime < expire:
+                    f.unlink()
+            except OSError:
+                pass
+
+    # ---------- 页面 ----------
+
+    def _paint_main(self, d: dict, game: str, images: dict):
+        weapons = d.get("__weapon_data") or []
+        vehicles = d.get("__vehicle_data") or []
+        weapon_h = self._weapon_card_height(game)
+        vehicle_h = self._vehicle_card_height()
+        height = (
+            self.HEADER_HEIGHT
+            + self.TITLE_HEIGHT
+            + self.STATS_HEIGHT
+            + self.TITLE_HEIGHT
+            + self._list_height(len(weapons), weapon_h)
+            + self.HINT_HEIGHT
+            + self.TITLE_HEIGHT
+            + self._list_height(len(vehicles), vehicle_h)
+            + self.HINT_HEIGHT
+            + self.FOOTER_HEIGHT
+        )
+        img, draw = self._new_page(height)
+        y = self._paint_player_header(img, draw, d, game, images, with_rank=True)
+        y = self._paint_title(draw, "基本信息", y)
+        y = self._paint_stats_grid(draw, d, y)
+        y = self._paint_title(draw, "武器信息", y)
+        y = self._paint_list(
+            img, draw, weapons, y, weapon_h, "暂无武器数据",
+            lambda item, top: self._paint_weapon_card(img, draw, item, game, top, images),
+        )
+        y = self._paint_hint(draw, f"weapons [玩家id],game={game}", y)
+        y = self._paint_title(draw, "载具信息", y)
+        y = self._paint_list(
+            img, draw, vehicles, y, vehicle_h, "暂无载具数据",
+            lambda item, top: self._paint_vehicle_card(img, draw, item, top, images),
+        )
+        y = self._paint_hint(draw, f"vehicles [玩家id],game={game}", y)
+        self._paint_footer(draw, format_update_time(d), y)
+        return img
+
+    def _paint_weapons(self, d: dict, game: str, images: dict):
+        weapons = d.get("__weapon_data") or []
+        card_h = self._weapon_card_height(game)
+        height = (
+            self.HEADER_HEIGHT
+            + self.TITLE_HEIGHT
+            + self._list_height(len(weapons), card_h)
+            + self.FOOTER_HEIGHT
+        )
+        img, draw = self._new_page(height)
+        y = self._paint_player_header(img, draw, d, game, images, with_rank=False)
+        y = self._paint_title(draw, "武器信息", y)
+        y = self._paint_list(
+            img, draw, weapons, y, card_h, "暂无武器数据",
+            lambda item, top: self._paint_weapon_card(img, draw, item, game, top, images),
+        )
+        self._paint_footer(draw, format_update_time(d), y)
+        return img
+
+    def _paint_vehicles(self, d: dict, game: str, images: dict):
+        vehicles = d.get("__vehicle_data") or []
+        card_h = self._vehicle_card_height()
+        height = (
+            self.HEADER_HEIGHT
+            + self.TITLE_HEIGHT
+            + self._list_height(len(vehicles), card_h)
+            + self.FOOTER_HEIGHT
+        )
+        img, draw = self._new_page(height)
+        y = self._paint_player_header(img, draw, d, game, images, with_rank=False)
+        y = self._paint_title(draw, "载具信息", y)
+        y = self._paint_list(
+            img, draw, vehicles, y, card_h, "暂无载具数据",
+            lambda item, top: self._paint_vehicle_card(img, draw, item, top, images),
+        )
+        self._paint_footer(draw, format_update_time(d), y)
+        return img
+
+    def _paint_servers(self, d: dict, game: str, images: dict):
+        servers = d["servers"] or []
+        card_h = self._server_card_height()
+        height = (
+            self.HEADER_HEIGHT
+            + self._list_height(len(servers), card_h)
+            + self.FOOTER_HEIGHT
+        )
+        img, draw = self._new_page(height)
+        self._paint_banner(img, game, images)
+        logo = self._open(images.get(LOGOS[game]))
+        center_x = (40 + PAGE_WIDTH - 350) // 2
+        if logo is not None:
+            self._paste_fit(img, logo, center_x - 140, 60, 280, 160)
+        self._text_center(draw, "服务器列表", center_x, 230, 30, WHITE, bold=True)
+        y = self.HEADER_HEIGHT
+        y = self._paint_list(
+            img, draw, servers, y, card_h, "暂无服务器数据",
+            lambda item, top: self._paint_server_card(img, draw, item, top, images),
+        )
+        self._paint_footer(draw, format_update_time(d), y)
+        return img
+
+    # ---------- 区块 ----------
+
+    HEADER_HEIGHT = 380
+    TITLE_HEIGHT = 64
+    STATS_HEIGHT = 2 * 56 + 16 + PADDING * 2
+    HINT_HEIGHT = 40
+    FOOTER_HEIGHT = 72
+    LIST_GAP = 24
+
+    def _new_page(self, height: int):
+        img = Image.new("RGB", (PAGE_WIDTH, height), BG_COLOR)
+        return img, ImageDraw.Draw(img)
+
+    def _paint_banner(self, img, game: str, images: dict):
+        """绘制顶部横幅，底部渐变到背景色"""
+        banner = self._open(images.get(BANNERS[game]))
+        if banner is not None:
+            img.paste(self._cover(banner, PAGE_WIDTH, self.HEADER_HEIGHT), (0, 0))
+        gradient_h = 60
+        top = self.HEADER_HEIGHT - gradient_h
+        overlay = Image.new("RGB", (PAGE_WIDTH, gradient_h), BG_COLOR)
+        mask = Image.linear_gradient("L").resize((PAGE_WIDTH, gradient_h))
+        region = img.crop((0, top, PAGE_WIDTH, self.HEADER_HEIGHT))
+        img.paste(Image.composite(overlay, region, mask), (0, top))
+
+    def _paint_player_header(self, img, draw, d, game, images, with_rank: bool) -> int:
+        self._paint_banner(img, game, images)
+        center_x = (40 + PAGE_WIDTH - 350) // 2
+        y = 60
+        avatar = self._open(images.get(d.get("avatar")))
+        if avatar is not None:
+            avatar = self._cover(avatar, 128, 128)
+            mask = Image.new("L", (128, 128), 0)
+            ImageDraw.Draw(mask).rounded_rectangle((0, 0, 127, 127), 8, fill=255)
+            img.paste(avatar, (center_x - 64, y), mask)
+        y += 136
+        self._text_center(draw, str(d.get("userName", "")), center_x, y, 30, WHITE, bold=True)
+        y += 40
+        if with_rank:
+            rank_text = f"等级 {d.get('rank', '')}"
+            font = self._font(16)
+            text_w = draw.textlength(rank_text, font=font)
+            left = center_x - (text_w + 40) / 2
+            rank_img = self._open(images.get(d.get("rankImg")))
+            if rank_img is not None:
+                self._paste_fit(img, rank_img, int(left), y, 32, 32)
+            draw.text((left + 40, y + 6), rank_text, font=font, fill=GRAY, stroke_width=0)
+            y += 36
+            self._text_center(
+                draw, f"游戏时间：{d.get('__hoursPlayed', 0)} h", center_x, y, 16, GRAY
+            )
+        return self.HEADER_HEIGHT
+
+    def _paint_title(self, draw, text: str, y: int) -> int:
+        draw.text((MARGIN, y + 16), text, font=self._font(27), fill=WHITE, stroke_width=1, stroke_fill=WHITE)
+        return y + self.TITLE_HEIGHT
+
+    def _paint_stats_grid(self, draw, d: dict, y: int) -> int:
+        stats = [
+            ("击杀", d.get("kills")),
+            ("K/D", d.get("killDeath")),
+            ("KPM", d.get("killsPerMinute")),
+            ("爆头率", d.get("headshots")),
+            ("命中率", d.get("accuracy")),
+            ("拉人数", d.get("revives")),
+            ("爆头数", d.get("headShots")),
+            ("最远爆头", f"{d.get('longestHeadShot')}m"),
+            ("胜利场数", d.get("wins")),
+            ("最高连杀", d.get("highestKillStreak")),
+        ]
+        draw.rounded_rectangle(
+            (MARGIN, y, PAGE_WIDTH - MARGIN, y + self.STATS_HEIGHT), 8, fill=CARD_COLOR
+        )
+        col_w = (CONTENT_WIDTH - PADDING * 2 - 16 * 4) / 5
+        for i, (label, value) in enumerate(stats):
+            x = MARGIN + PADDING + (i % 5) * (col_w + 16)
+            top = y + PADDING + (i // 5) * (56 + 16)
+            self._paint_stat(draw, label, value, x, top, col_w)
+        return y + self.STATS_HEIGHT
+
+    def _paint_hint(self, draw, command: str, y: int) -> int:
+        font = self._font(16)
+        prefix, suffix = "使用 ", " 查看更多数据"
+        total = sum(draw.textlength(t, font=font) for t in (prefix, command, suffix))
+        x = (PAGE_WIDTH - total) / 2
+        for text, color in ((prefix, SLATE), (command, SKY), (suffix, SLATE)):
+            draw.text((x, y + 10), text, font=font, fill=color)
+            x += draw.textlength(text, font=font)
+        return y + self.HINT_HEIGHT
+
+    def _paint_footer(self, draw, update_time: str, y: int):
+        self._text_center(draw, "powered by astrbot", PAGE_WIDTH // 2, y + 12, 16, SLATE)
+        self._text_center(draw, f"数据更新时间：{update_time}", PAGE_WIDTH // 2, y + 36, 16, SLATE)
+
+    def _list_height(self, count: int, card_h: int) -> int:
+        if count == 0:
+            return 32
+        return count * card_h + (count - 1) * self.LIST_GAP
+
+    def _paint_list(self, img, draw, items, y, card_h, empty_text, paint_card) -> int:
+        if not items:
+            self._text_center(draw, empty_text, PAGE_WIDTH // 2, y + 6, 16, SLATE)
+            return y + 32
+        for i, item in enumerate(items):
+            paint_card(item, y)
+            y += card_h + (self.LIST_GAP if i < len(items) - 1 else 0)
+        return y
+
+    # ---------- 卡片 ----------
+
+    @staticmethod
+    def _weapon_card_height(game: str) -> int:
+        if game == "bf4":
+            return max(56, 50 + 24) + PADDING * 2
+        return max(56 * 2 + GAP, 90 + 24) + PADDING * 2
+
+    @staticmethod
+    def _vehicle_card_height() -> int:
+        return max(56, 50 + 24) + PADDING * 2
+
+    @staticmethod
+    def _server_card_height() -> int:
+        return max(52 * 2 + GAP, 90 + 24) + PADDING * 2
+
+    def _paint_card_box(self, draw, y: int, height: int):
+        draw.rounded_rectangle(
+            (MARGIN, y, PAGE_WIDTH - MARGIN, y + height), 8, fill=CARD_COLOR
+        )
+
+    def _grid_columns(self, cols: int):
+        """返回grid布局中每一列的起始x坐标和列宽"""
+        col_w = (CONTENT_WIDTH - PADDING * 2 - GAP * (cols - 1)) / cols
+        return [MARGIN + PADDING + i * (col_w + GAP) for i in range(cols)], col_w
+
+    def _paint_item_image(self, img, draw, url, name, images, x, y, box_w, img_w, img_h):
+        """绘制卡片左侧的图片和名称"""
+        item_img = self._open(images.get(url))
+        if item_img is not None:
+            self._paste_fit(img, item_img, int(x + (box_w - img_w) / 2), y, img_w, img_h)
+        text = self._truncate(draw, str(name or ""), self._font(16), box_w)
+        self._text_center(draw, text, x + box_w / 2, y + img_h + 2, 16, WHITE)
+
+    def _paint_weapon_card(self, img, draw, w: dict, game: str, y: int, images: dict):
+        height = self._weapon_card_height(game)
+        self._paint_card_box(draw, y, height)
+        xs, col_w = self._grid_columns(6)
+        left_w = col_w * 2 + GAP
+        top = y + PADDING
+        stats = [
+            ("击杀", w.get("kills")),
+            ("KPM", w.get("killsPerMinute")),
+            ("爆头率", w.get("headshots")),
+            ("命中率", w.get("accuracy")),
+        ]
+        if game == "bf4":
+            self._paint_item_image(img, draw, w.get("image"), w.get("weaponName"), images, xs[0], top, left_w, 140, 50)
+        else:
+            self._paint_item_image(img, draw, w.get("image"), w.get("weaponName"), images, xs[0], top, left_w, 200, 90)
+            stats += [
+                ("使用时间", f"{w.get('__timeEquippedHours')}h"),
+                ("击发数", w.get("shotsFired")),
+                ("爆头击杀", w.get("headshotKills")),
+                ("命中数", w.get("shotsHit")),
+            ]
+        for i, (label, value) in enumerate(stats):
+            self._paint_stat(draw, label, value, xs[2 + i % 4], top + (i // 4) * (56 + GAP), col_w)
+
+    def _paint_vehicle_card(self, img, draw, v: dict, y: int, images: dict):
+        height = self._vehicle_card_height()
+        self._paint_card_box(draw, y, height)
+        xs, col_w = self._grid_columns(6)
+        top = y + PADDING
+        self._paint_item_image(img, draw, v.get("image"), v.get("vehicleName"), images, xs[0], top, col_w * 2 + GAP, 150, 50)
+        stats = [
+            ("使用时间", f"{v.get('__timeInHour')}h"),
+            ("击杀", v.get("kills")),
+            ("KPM", v.get("killsPerMinute")),
+            ("摧毁载具数", v.get("destroyed")),
+        ]
+        for i, (label, value) in enumerate(stats):
+            self._paint_stat(draw, label, value, xs[2 + i], top + (height - PADDING * 2 - 56) / 2, col_w)
+
+    def _paint_server_card(self, img, draw, s: dict, y: int, images: dict):
+        height = self._server_card_height()
+        self._paint_card_box(draw, y, height)
+        left = MARGIN + PADDING
+        top = y + PADDING
+        self._paint_item_image(img, draw, s.get("url"), s.get("currentMap"), images, left, top, 200, 200, 90)
+        x = left + 200 + GAP
+        right_w = PAGE_WIDTH - MARGIN - PADDING - x
+        self._paint_stat(draw, "服务器", s.get("prefix"), x, top, min(400, right_w), value_size=20)
+        col_w = (right_w - GAP * 2) / 3
+        for i, (label, value) in enumerate(
+            (("模式", s.get("mode")), ("人数", s.get("serverInfo")), ("区服", s.get("country")))
+        ):
+            self._paint_stat(draw, label, value, x + i * (col_w + GAP), top + 52 + GAP, col_w, value_size=20)
+
+    def _paint_stat(self, draw, label, value, x, y, width, value_size: int = 24):
+        """绘制一个标签+数值的统计项"""
+        draw.text((x, y), label, font=self._font(16), fill=YELLOW)
+        font = self._font(value_size)
+        text = self._truncate(draw, "" if value is None else str(value), font, width)
+        draw.text((x, y + 24), text, font=font, fill=WHITE, stroke_width=1, stroke_fill=WHITE)
+
+    # ---------- 工具 ----------
+
+    def _text_center(self, draw, text, center_x, y, size, color, bold=False):
+        font = self._font(size)
+        width = draw.textlength(text, font=font)
+        draw.text(
+            (center_x - width / 2, y),
+            text,
+            font=font,
+            fill=color,
+            stroke_width=1 if bold else 0,
+            stroke_fill=color,
+        )
+
+    @staticmethod
+    def _truncate(draw, text: str, font, max_width: float) -> str:
+        """超出宽度时截断并加省略号"""
+        if draw.textlength(text, font=font) <= max_width:
+            return text
+        while text and draw.textlength(text + "…", font=font) > max_width:
+            text = text[:-1]
+        return text + "…"
+
+    @staticmethod
+    def _open(path: Optional[Path]):
+        if path is None:
+            return None
+        try:
+            img = Image.open(path)
+            img.load()
+            return img.convert("RGBA")
+        except OSError as e:
+            logger.warning(f"图片读取失败: {path}，{e}")
+            return None
+
+    @staticmethod
+    def _cover(img, width: int, height: int):
+        """等比缩放并居中裁剪以铺满区域，对应css的background-size:cover"""
+        scale = max(width / img.width, height / img.height)
+        resized = img.resize(
+            (max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+            Image.LANCZOS,
+        )
+        left = (resized.width - width) // 2
+        top = (resized.height - height) // 2
+        return resized.crop((left, top, left + width, top + height)).convert("RGB")
+
+    @staticmethod
+    def _paste_fit(img, item, x: int, y: int, width: int, height: int):
+        """等比缩小后居中贴图，对应css的object-fit:scale-down"""
+        scale = min(1.0, width / item.width, height / item.height)
+        if scale < 1.0:
+            item = item.resize(
+                (max(1, round(item.width * scale)), max(1, round(item.height * scale))),
+                Image.LANCZOS,
+            )
+        left = x + (width - item.width) // 2
+        top = y + (height - item.height) // 2
+        img.paste(item, (left, top), item)
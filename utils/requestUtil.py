@@ -1,14 +1,131 @@
 import json
+import random
 import asyncio
 import aiohttp
 
+from typing import Dict
 from astrbot.api import logger
+from data.plugins.astrbot_plugin_battlefield_tool.utils.cacheUtil import TTLLRUCache
+from data.plugins.astrbot_plugin_battlefield_tool.utils.rateLimit import TokenBucket
+from data.plugins.astrbot_plugin_battlefield_tool.utils.transport import get_transport
+from data.plugins.astrbot_plugin_battlefield_tool.utils.jsonUtil import loads, project
+from data.plugins.astrbot_plugin_battlefield_tool.utils.metrics import get_metrics
+from data.plugins.astrbot_plugin_battlefield_tool.utils.circuitBreaker import (
+    CircuitBreaker,
+    LatencyTracker,
+)
 
 
 API_SITE = "https://api.gametools.network/"
 
+# 可用的接口地址(官方地址或镜像/本地代理)，按优先级排列，每个地址有独立的熔断器
+_api_sites = [API_SITE]
+_breakers: Dict[str, CircuitBreaker] = {API_SITE: CircuitBreaker()}
+# 是否启用对冲请求：首个请求超过该接口近期p95耗时仍未返回时，向另一个地址再发一次
+_hedge_enabled = False
+_latency: Dict[str, LatencyTracker] = {}
 
-async def request_api(game, prop="stats", params=None, timeout=15, session=None):
+# 各接口的缓存时间(秒)，服务器状态变化快，玩家数据变化慢
+PROP_CACHE_TTL = {
+    "servers": 30,
+    "stats": 120,
+    "all": 300,
+    "weapons": 300,
+    "vehicles": 300,
+}
+DEFAULT_CACHE_TTL = 60
+
+_response_cache = TTLLRUCache(max_entries=256, max_bytes=32 * 1024 * 1024)
+_cache_enabled = True
+# 所有请求共用的限流器
+_rate_limiter = TokenBucket(rate=5, burst=10)
+# 失败后的最大重试次数，以及指数退避的基础时间和上限(秒)
+_max_retries = 2
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_CAP = 8
+# 可以重试的状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# 正在进行中的请求，相同请求并发时共享同一个结果
+_inflight: Dict[tuple, "asyncio.Task"] = {}
+
+
+def configure_cache(enabled: bool = True, max_entries: int = None, max_bytes: int = None):
+    """
+    配置接口响应缓存
+        Args:
+        enabled: 是否启用缓存
+        max_entries: 最大缓存条目数
+        max_bytes: 最大缓存字节数
+    """
+    global _cache_enabled
+    _cache_enabled = enabled
+    if max_entries is not None:
+        _response_cache.max_entries = max_entries
+    if max_bytes is not None:
+        _response_cache.max_bytes = max_bytes
+    if not enabled:
+        _response_cache.clear()
+
+
+def configure_rate_limit(rate: float = 5, burst: int = 10, max_retries: int = 2):
+    """
+    配置接口限流和重试
+        Args:
+        rate: 每秒最多请求数，小于等于0时不限流
+        burst: 允许的瞬时请求数
+        max_retries: 失败后的最大重试次数
+    """
+    global _max_retries
+    _rate_limiter.configure(rate, burst)
+    _max_retries = max(0, max_retries)
+
+
+def configure_sites(sites=None, hedge_enabled: bool = False):
+    """
+    配置接口地址
+        Args:
+        sites: 接口地址列表，为空时使用官方地址
+        hedge_enabled: 是否启用对冲请求
+    """
+    global _api_sites, _hedge_enabled
+    sites = [s if s.endswith("/") else s + "/" for s in (sites or []) if s]
+    _api_sites = sites or [API_SITE]
+    for site in _api_sites:
+        _breakers.setdefault(site, CircuitBreaker())
+    _hedge_enabled = hedge_enabled
+
+
+def get_site_stats() -> dict:
+    """返回各接口地址的熔断状态和各接口的p95耗时"""
+    return {
+        "sites": {
+            site: {"state": _breakers[site].state, "failures": _breakers[site].failures}
+            for site in _api_sites
+        },
+        "p95": {prop: tracker.percentile() for prop, tracker in _latency.items()},
+    }
+
+
+def get_cache_stats() -> dict:
+    """返回接口响应缓存的命中统计"""
+    return _response_cache.stats()
+
+
+def _cache_key(game, prop, params):
+    """生成缓存键，玩家名不区分大小写"""
+    normalized = []
+    for k, v in sorted(params.items()):
+        v = str(v)
+        if k == "name":
+            v = v.strip().lower()
+        normalized.append((k, v))
+    return game, prop, tuple(normalized)
+
+
+async def request_api(
+    game, prop="stats", params=None, timeout=15, session=None, use_cache=True
+):
     """
     异步请求API
         Args:
@@ -16,35 +133,266 @@ async def request_api(game, prop="stats", params=None, timeout=15, session=None)
         prop: 请求属性(stats/servers等)
         params: 查询参数
         timeout: 超时时间(秒)
-        session: 可选的aiohttp.ClientSession实例
+        session: 可选的aiohttp.ClientSession实例，默认使用共用连接池
+        use_cache: 是否使用响应缓存
     Returns:
-        JSON响应数据
+        JSON响应数据的浅拷贝，相同请求并发时只会实际请求一次
     Raises:
         aiohttp.ClientError: 网络或HTTP错误
         json.JSONDecodeError: 响应不是合法JSON
     """
     if params is None:
         params = {}
-    url = API_SITE + f"{game}/{prop}"
+    use_cache = use_cache and _cache_enabled
+    key = _cache_key(game, prop, params)
+    if use_cache:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            logger.debug(f"Battlefield Tool 命中接口缓存: {game}/{prop}，请求参数: {params}")
+            # 调用方会在顶层写入字段，返回浅拷贝避免污染缓存
+            return dict(cached)
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _fetch_and_cache(key, game, prop, params, timeout, session, use_cache)
+        )
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _on_inflight_done(key, t))
+    else:
+        logger.debug(f"Battlefield Tool 合并相同的并发请求: {game}/{prop}，请求参数: {params}")
+
+    # shield保证单个调用方被取消时不会影响其他等待同一请求的调用方
+    result = await asyncio.shield(task)
+    return dict(result)
+
+
+async def _fetch_and_cache(key, game, prop, params, timeout, session, use_cache):
+    """请求接口并在成功时写入缓存"""
+    result, size = await _fetch_with_retry(game, prop, params, timeout, session)
+    if use_cache and result.get("code") == 200:
+        _response_cache.set(
+            key, result, PROP_CACHE_TTL.get(prop, DEFAULT_CACHE_TTL), size
+        )
+    return result
+
+
+def _on_inflight_done(key, task: "asyncio.Task"):
+    """请求结束后从进行中列表移除"""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # 所有调用方都已取消时取出异常，避免产生未获取异常的警告
+    if not task.cancelled():
+        task.exception()
+
+
+async def _fetch_with_retry(game, prop, params, timeout, session):
+    """
+    限流并在失败时重试，所有重试都在timeout内完成
+    Returns:
+        tuple: (JSON响应数据, 响应体字节数)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    attempt = 0
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise TimeoutError(f"请求超时: {timeout}秒内未收到响应")
+        await _rate_limiter.acquire(remaining)
+        remaining = deadline - loop.time()
+
+        retry_after = None
+        try:
+            result, size, retry_after = await _fetch_from_sites(
+                game, prop, params, remaining, session, attempt
+            )
+            error = None
+        except (ConnectionError, TimeoutError) as e:
+            error = e
+        else:
+            if result.get("code") not in RETRY_STATUS:
+                return result, size
+            if retry_after is not None:
+                _rate_limiter.pause(retry_after)
+
+        # 指数退避加随机抖动，服务端要求的等待时间优先
+        delay = random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if attempt >= _max_retries or loop.time() + delay >= deadline:
+            if error is not None:
+                raise error
+            return result, size
+        attempt += 1
+        logger.warning(
+            f"Battlefield Tool 请求失败，{delay:.2f}秒后第{attempt}次重试: {game}/{prop}"
+        )
+        await asyncio.sleep(delay)
+
+
+def _available_sites(attempt: int = 0):
+    """未熔断的接口地址，重试时从下一个地址开始轮换"""
+    sites = [site for site in _api_sites if _breakers[site].allow()]
+    if not sites:
+        return sites
+    start = attempt % len(sites)
+    return sites[start:] + sites[:start]
+
+
+async def _fetch_from_sites(game, prop, params, timeout, session, attempt=0):
+    """
+    选择接口地址发起请求，启用对冲时首个请求过慢会向另一个地址再发一次，取先返回的成功结果
+    Returns:
+        tuple: (JSON响应数据, 响应体字节数, Retry-After秒数)
+    """
+    sites = _available_sites(attempt)
+    if not sites:
+        raise ConnectionError("网络请求异常: 所有接口地址均已熔断，请稍后再试")
+
+    tracker = _latency.setdefault(prop, LatencyTracker())
+    hedge_delay = tracker.percentile() if _hedge_enabled and len(sites) > 1 else None
+    if hedge_delay is None or hedge_delay >= timeout:
+        # 只发一次请求，释放其他地址的半开试探名额
+        for site in sites[1:]:
+            _breakers[site].record_cancel()
+        return await _fetch_tracked(sites[0], game, prop, params, timeout, session)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = {
+        asyncio.ensure_future(
+            _fetch_tracked(sites[0], game, prop, params, timeout, session)
+        ): sites[0]
+    }
+    hedged = False
+    last_error = None
+    last_result = None
+    try:
+        while tasks:
+            wait_timeout = None if hedged else hedge_delay - (loop.time() - start)
+            done, _ = await asyncio.wait(
+                tasks, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                # 首个请求超过p95仍未返回，向下一个地址发起对冲请求
+                hedged = True
+                remaining = timeout - (loop.time() - start)
+                logger.info(f"Battlefield Tool 请求较慢，向{sites[1]}发起对冲请求")
+                tasks[
+                    asyncio.ensure_future(
+                        _fetch_tracked(sites[1], game, prop, params, remaining, session)
+                    )
+                ] = sites[1]
+                continue
+            for task in done:
+                tasks.pop(task)
+                try:
+                    result = task.result()
+                except (ConnectionError, TimeoutError) as e:
+                    last_error = e
+                    continue
+                if result[0].get("code") not in RETRY_STATUS:
+                    return result
+                last_result = result
+            if not hedged and not tasks:
+                break
+    finally:
+        for task, site in tasks.items():
+            task.cancel()
+            _breakers[site].record_cancel()
+        # 释放未使用地址的半开试探名额
+        for site in sites[1 if not hedged else 2:]:
+            _breakers[site].record_cancel()
+
+    if last_result is not None:
+        return last_result
+    raise last_error
+
+
+async def _fetch_tracked(site, game, prop, params, timeout, session):
+    """请求指定地址，并记录熔断状态和耗时"""
+    breaker = _breakers[site]
+    metrics = get_metrics()
+    start = asyncio.get_running_loop().time()
+    try:
+        result = await _fetch(game, prop, params, timeout, session, site)
+    except TimeoutError:
+        breaker.record_failure()
+        metrics.inc("upstream_timeout", prop)
+        raise
+    except ConnectionError:
+        breaker.record_failure()
+        metrics.inc("upstream_connection_error", prop)
+        raise
+    except asyncio.CancelledError:
+        breaker.record_cancel()
+        raise
+    except Exception:
+        # 响应解析失败等其他异常也要计入失败，否则半开状态的试探名额永远不会释放
+        breaker.record_failure()
+        raise
+    elapsed = asyncio.get_running_loop().time() - start
+    metrics.observe("upstream", elapsed, prop, game)
+    code = result[0].get("code", 0)
+    if code != 200:
+        metrics.inc("upstream_error", str(code))
+    if code >= 500:
+        breaker.record_failure()
+    elif code == 429:
+        # 被限流说明接口可达但不代表健康，不计入成功或失败
+        breaker.record_cancel()
+    else:
+        breaker.record_success()
+    if code == 200:
+        # 只用正常响应的耗时计算对冲时间，快速返回的错误会拉低p95
+        _latency.setdefault(prop, LatencyTracker()).record(elapsed)
+    return result
+
+
+def _parse_retry_after(value):
+    """解析Retry-After响应头(秒数形式)"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        return None
+
+
+async def _fetch(game, prop, params, timeout, session, site=API_SITE):
+    """
+    实际发起HTTP请求
+    Returns:
+        tuple: (JSON响应数据, 响应体字节数, Retry-After秒数)
+    """
+    url = site + f"{game}/{prop}"
     logger.info(f"Battlefield Tool Request Gametools API: {url}，请求参数: {params}")
 
-    should_close = session is None
-    if should_close:
-        session = aiohttp.ClientSession()
+    if session is None:
+        # 未传入会话时使用插件共用的连接池，不再每次新建会话
+        session = get_transport().get_session()
 
     try:
         timeout_obj = aiohttp.ClientTimeout(total=timeout)
         async with session.get(url, params=params, timeout=timeout_obj) as response:
+            body = await response.read()
             if response.status == 200:
-                result = await response.json()
+                # 解析后立即裁剪掉模板用不到的字段，降低内存占用
+                result = project(loads(body), prop)
                 result["code"] = response.status
-                return result
+                return result, len(body), None
             else:
                 # 携带状态码和错误信息抛出
-                error_dict = await response.json()
+                try:
+                    error_dict = loads(body)
+                except json.JSONDecodeError:
+                    # 网关等返回的非JSON错误页
+                    error_dict = {"errors": [f"接口返回错误，状态码: {response.status}"]}
                 error_dict["code"] = response.status
                 logger.error(f"Battlefield Tool 调用接口失败，错误信息{error_dict}")
-                return error_dict
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                return error_dict, len(body), retry_after
     except aiohttp.ClientError as e:
         error_msg = f"网络请求异常: {str(e)}"
         logger.error(error_msg)
@@ -57,6 +405,3 @@ async def request_api(game, prop="stats", params=None, timeout=15, session=None)
         error_msg = f"请求超时: {timeout}秒内未收到响应"
         logger.error(error_msg)
         raise TimeoutError(error_msg) from e
-    finally:
-        if should_close and session is not None:
-            await session.close()
@@ -0,0 +1,194 @@
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from astrbot.api import logger
+from data.plugins.astrbot_plugin_battlefield_tool.utils.template import BANNERS
+
+import asyncio
+import bisect
+import time
+
+# 匹配方式，只有模糊匹配时调用方应改为实时搜索
+MATCH_EXACT = "exact"
+MATCH_FUZZY = "fuzzy"
+
+
+def normalize(name: str) -> str:
+    """统一大小写并去掉空格，与命令解析保持一致"""
+    return "".join(str(name).lower().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """服务器名索引，支持前缀、子串和三元组模糊匹配"""
+
+    def __init__(self, names: List[str]):
+        self.names = [normalize(n) for n in names]
+        self._postings: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self._postings.setdefault(gram, []).append(i)
+        # 按名称排序，用二分查找前缀
+        self._sorted = sorted((name, i) for i, name in enumerate(self.names))
+
+    def _prefix(self, query: str) -> List[int]:
+        start = bisect.bisect_left(self._sorted, (query, -1))
+        result = []
+        for name, i in self._sorted[start:]:
+            if not name.startswith(query):
+                break
+            result.append(i)
+        return result
+
+    def search(self, query: str, limit: int = 10) -> Tuple[List[int], str]:
+        """
+        搜索服务器名
+        Args:
+            query: 输入的服务器名
+            limit: 最多返回的数量
+        Returns:
+            (下标, 匹配方式)，前缀匹配在前、子串匹配在后，均为MATCH_EXACT；
+            两者都没有时才返回模糊匹配，匹配方式为MATCH_FUZZY
+        """
+        query = normalize(query)
+        if not query:
+            return [], MATCH_EXACT
+        result = self._prefix(query)[:limit]
+        seen = set(result)
+        grams = trigrams(query)
+        if not grams:
+            # 少于三个字符时只能逐个比较
+            for i, name in enumerate(self.names):
+                if len(result) >= limit:
+                    break
+                if i not in seen and query in name:
+                    result.append(i)
+            return result, MATCH_EXACT
+
+        # 统计每个名称命中的三元组数
+        hits: Dict[int, int] = {}
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                hits[i] = hits.get(i, 0) + 1
+        substring = [
+            i
+            for i, count in hits.items()
+            if count == len(grams) and i not in seen and query in self.names[i]
+        ]
+        substring.sort(key=lambda i: len(self.names[i]))
+        result.extend(substring)
+        if result:
+            return result[:limit], MATCH_EXACT
+
+        # 没有精确匹配时，至少命中一半三元组的作为模糊匹配，按相似度排序
+        threshold = max(1, len(grams) // 2)
+        fuzzy = [
+            (count / (len(grams) + len(self.names[i]) - 2 - count), i)
+            for i, count in hits.items()
+            if count >= threshold
+        ]
+        fuzzy.sort(reverse=True)
+        return [i for _, i in fuzzy[:limit]], MATCH_FUZZY
+
+
+class ServerCatalog:
+    """各游戏的服务器目录，后台定期拉取全部服务器并建立索引，查询时先在本地匹配"""
+
+    CATALOG_LIMIT = 1000  # 每次拉取的服务器数上限
+
+    def __init__(
+        self,
+        fetcher: Callable[[str], Awaitable[Optional[dict]]],
+        refresh_interval: float = 300,
+        games: Iterable[str] = tuple(BANNERS),
+    ):
+        """
+        Args:
+            fetcher: 拉取某个游戏全部服务器的方法 (game) -> 响应数据
+            refresh_interval: 刷新间隔(秒)
+            games: 允许建立目录的游戏，其余输入不会启动后台任务
+        """
+        self.fetcher = fetcher
+        self.refresh_interval = refresh_interval
+        self.games = frozenset(games)
+        # game -> (服务器列表, 索引, 拉取时间)
+        self._catalogs: Dict[str, tuple] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def activate(self, game: str) -> bool:
+        """
+        开始在后台维护某个游戏的目录，查询过的游戏才会拉取
+        Returns:
+            是否为支持的游戏，不支持的游戏不会启动后台任务
+        """
+        if game not in self.games:
+            return False
+        task = self._tasks.get(game)
+        if task is None or task.done():
+            self._tasks[game] = asyncio.create_task(self._run(game))
+        return True
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+    async def _run(self, game: str):
+        while True:
+            try:
+                await self.refresh(game)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"刷新{game}服务器目录失败: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self, game: str) -> bool:
+        """拉取服务器列表并重建索引，失败时保留旧目录"""
+        servers_data = await self.fetcher(game)
+        if servers_data is None or servers_data.get("code") != 200:
+            return False
+        servers = [s for s in servers_data.get("servers") or [] if s.get("prefix")]
+        if not servers:
+            return False
+        index = TrigramIndex([s["prefix"] for s in servers])
+        self._catalogs[game] = (servers, index, time.time())
+        logger.debug(f"{game}服务器目录已更新，共{len(servers)}个服务器")
+        return True
+
+    def updated_at(self, game: str) -> Optional[float]:
+        """目录上次刷新的时间戳，尚未建立时返回None"""
+        catalog = self._catalogs.get(game)
+        return None if catalog is None else catalog[2]
+
+    def age(self, game: str) -> Optional[float]:
+        """目录距上次刷新的秒数，尚未建立时返回None"""
+        updated = self.updated_at(game)
+        return None if updated is None else time.time() - updated
+
+    def search(
+        self, game: str, server_name: str, limit: int = 10
+    ) -> Optional[Tuple[List[dict], str]]:
+        """
+        在本地目录中搜索服务器
+        Returns:
+            (匹配到的服务器(目录中的快照), 匹配方式)，目录尚未建立时返回None
+        """
+        catalog = self._catalogs.get(game)
+        if catalog is None:
+            return None
+        servers, index, _ = catalog
+        indices, kind = index.search(server_name, limit)
+        return [dict(servers[i]) for i in indices], kind
+
+    def stats(self) -> dict:
+        return {
+            game: {"servers": len(servers), "age": round(time.time() - updated)}
+            for game, (servers, _, updated) in self._catalogs.items()
+        }
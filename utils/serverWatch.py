@@ -0,0 +1,270 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from astrbot.api import logger
+
+import asyncio
+import re
+
+SERVER_INFO_PATTERN = re.compile(r"(\d+)\s*/\s*(\d+)")
+
+
+def normalize_name(server_name: str) -> str:
+    """命令解析时会去掉空格，比较服务器名时同样忽略空格和大小写"""
+    return str(server_name).lower().replace(" ", "")
+
+
+def find_server(servers: List[dict], server_name: str) -> Optional[dict]:
+    """从搜索结果中找出名称完全一致的服务器，没有时返回None"""
+    name = normalize_name(server_name)
+    for server in servers or []:
+        if normalize_name(server.get("prefix", "")) == name:
+            return server
+    return None
+
+
+def match_server(servers: List[dict], server_name: str) -> Optional[dict]:
+    """优先完全匹配，否则取第一个名称包含输入的服务器，仅用于订阅时确定完整服务器名"""
+    server = find_server(servers, server_name)
+    if server is not None:
+        return server
+    name = normalize_name(server_name)
+    return next(
+        (s for s in servers or [] if name in normalize_name(s.get("prefix", ""))), None
+    )
+
+
+def snapshot(server: Optional[dict]) -> dict:
+    """提取用于比较的服务器状态，server为None表示服务器已离线"""
+    if server is None:
+        return {"online": False}
+    players = server.get("playerAmount")
+    max_players = server.get("maxPlayers")
+    if players is None and (match := SERVER_INFO_PATTERN.search(str(server.get("serverInfo", "")))):
+        players, max_players = int(match.group(1)), int(match.group(2))
+    return {
+        "online": True,
+        "prefix": server.get("prefix"),
+        "map": server.get("currentMap"),
+        "mode": server.get("mode"),
+        "players": players or 0,
+        "max_players": max_players or 0,
+    }
+
+
+def describe_changes(old: dict, new: dict, player_delta: int) -> List[str]:
+    """
+    比较两次状态，只返回值得通知的变化
+    Args:
+        old: 上一次的状态
+        new: 本次的状态
+        player_delta: 人数变化达到多少才通知
+    Returns:
+        变化说明，为空表示无需通知
+    """
+    if old["online"] != new["online"]:
+        return ["服务器已上线"] if new["online"] else ["服务器已离线或无法搜索到"]
+    if not new["online"]:
+        return []
+    changes = []
+    if old["map"] != new["map"] or old["mode"] != new["mode"]:
+        changes.append(f"换图: {old['map']}({old['mode']}) -> {new['map']}({new['mode']})")
+    full = new["max_players"] and new["players"] >= new["max_players"]
+    was_full = old["max_players"] and old["players"] >= old["max_players"]
+    if (
+        abs(new["players"] - old["players"]) >= player_delta
+        or bool(full) != bool(was_full)
+        or (old["players"] == 0) != (new["players"] == 0)
+    ):
+        changes.append(
+            f"人数: {old['players']} -> {new['players']}/{new['max_players']}"
+            + ("(已满)" if full else "")
+        )
+    return changes
+
+
+class ServerWatcher:
+    """服务器订阅，相同的服务器无论多少个会话订阅都只轮询一次，状态有明显变化时才发送通知"""
+
+    MAX_WATCHES_PER_SESSION = 5
+
+    def __init__(
+        self,
+        db_service,
+        fetcher: Callable[[str, str], Awaitable[Optional[dict]]],
+        notifier: Callable[[str, str], Awaitable[None]],
+        interval: float = 120,
+        player_delta: int = 8,
+    ):
+        """
+        Args:
+            db_service: BattleFieldDBService
+            fetcher: 搜索服务器的方法 (game, server_name) -> 响应数据
+            notifier: 发送通知的方法 (session_origin, 文本)
+            interval: 轮询间隔(秒)
+            player_delta: 人数变化达到多少才通知
+        """
+        self.db_service = db_service
+        self.fetcher = fetcher
+        self.notifier = notifier
+        self.interval = interval
+        self.player_delta = player_delta
+        # (game, 规范化的完整服务器名) -> {session_origin: 完整服务器名}
+        self._subscriptions: Dict[Tuple[str, str], Dict[str, str]] = {}
+        # (game, 规范化的完整服务器名) -> 上一次通知时的状态
+        self._states: Dict[Tuple[str, str], dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(game: str, server_name: str) -> Tuple[str, str]:
+        return game, normalize_name(server_name)
+
+    async def load(self):
+        """载入已保存的订阅"""
+        for row in await self.db_service.query_server_watches():
+            key = self._key(row["game"], row["server_name"])
+            self._subscriptions.setdefault(key, {})[row["session_origin"]] = row[
+                "server_name"
+            ]
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def list_watches(self, session_origin: str) -> List[Tuple[str, str]]:
+        """返回会话订阅的 (game, 服务器名)"""
+        return [
+            (game, sessions[session_origin])
+            for (game, _), sessions in self._subscriptions.items()
+            if session_origin in sessions
+        ]
+
+    async def subscribe(self, session_origin: str, game: str, server_name: str) -> str:
+        """
+        订阅服务器，输入部分名称时按搜索结果确定完整服务器名，之后只按完整名称精确匹配，
+        首次订阅时以当前状态作为比较基准
+        Returns:
+            回复给用户的信息
+        """
+        key = self._key(game, server_name)
+        if key not in self._subscriptions:
+            servers_data = await self.fetcher(game, server_name)
+            if servers_data is None or servers_data.get("code") != 200:
+                return "API调用失败，请稍后再试"
+            server = match_server(servers_data.get("servers"), server_name)
+            if server is None:
+                return f"未找到服务器：{server_name}"
+            server_name = server["prefix"]
+            key = self._key(game, server_name)
+            if key not in self._subscriptions:
+                self._states[key] = snapshot(server)
+        else:
+            server_name = next(iter(self._subscriptions[key].values()))
+        if session_origin in self._subscriptions.get(key, {}):
+            return f"已经订阅过 {server_name} 了"
+        if len(self.list_watches(session_origin)) >= self.MAX_WATCHES_PER_SESSION:
+            return f"每个会话最多订阅{self.MAX_WATCHES_PER_SESSION}个服务器"
+
+        # 已有其他会话订阅的服务器沿用轮询到的状态，重启后尚未轮询时先查询一次
+        state = self._states.get(key)
+        if state is None:
+            state = await self._poll(key, server_name)
+            if state is None:
+                return "API调用失败，请稍后再试"
+            self._states[key] = state
+
+        await self.db_service.add_server_watch(session_origin, game, server_name)
+        self._subscriptions.setdefault(key, {})[session_origin] = server_name
+        # 只有已被其他会话订阅的服务器可能处于离线状态
+        if not state["online"]:
+            return f"已订阅 {server_name}，当前离线，状态变化时会通知"
+        return (
+            f"已订阅 {state['prefix']}\n当前: {state['map']}({state['mode']}) "
+            f"{state['players']}/{state['max_players']}\n换图或人数明显变化时会通知"
+        )
+
+    async def unsubscribe(
+        self, session_origin: str, game: str, server_name: str
+    ) -> Optional[str]:
+        """
+        取消订阅，输入的名称与完整服务器名不一致时，在该会话订阅的服务器中唯一包含该名称的也可取消
+        Returns:
+            被取消订阅的服务器名，没有该订阅时返回None
+        """
+        key = self._key(game, server_name)
+        if session_origin not in self._subscriptions.get(key, {}):
+            candidates = [
+                k
+                for k, sessions in self._subscriptions.items()
+                if k[0] == game and session_origin in sessions and key[1] in k[1]
+            ]
+            if len(candidates) != 1:
+                return None
+            key = candidates[0]
+        sessions = self._subscriptions[key]
+        removed = sessions.pop(session_origin)
+        await self.db_service.remove_server_watch(session_origin, game, removed)
+        if not sessions:
+            self._subscriptions.pop(key, None)
+            self._states.pop(key, None)
+        return removed
+
+    async def _poll(self, key: Tuple[str, str], server_name: str) -> Optional[dict]:
+        """查询服务器当前状态，接口失败时返回None(不当作离线)，搜索不到同名服务器时视为离线"""
+        servers_data = await self.fetcher(key[0], server_name)
+        if servers_data is None or servers_data.get("code") != 200:
+            return None
+        return snapshot(find_server(servers_data.get("servers"), server_name))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"服务器订阅轮询失败: {e}")
+
+    async def poll_once(self):
+        """每个被订阅的服务器请求一次，有变化时通知所有订阅的会话"""
+        keys = list(self._subscriptions)
+        results = await asyncio.gather(
+            *[
+                self._poll(key, next(iter(self._subscriptions[key].values())))
+                for key in keys
+            ],
+            return_exceptions=True,
+        )
+        for key, state in zip(keys, results):
+            if state is None or isinstance(state, Exception):
+                continue
+            sessions = self._subscriptions.get(key)
+            if not sessions:
+                continue
+            old = self._states.get(key)
+            if old is None:
+                self._states[key] = state
+                continue
+            changes = describe_changes(old, state, self.player_delta)
+            if not changes:
+                continue
+            # 只在通知后更新基准，人数缓慢变化累计达到阈值时也会通知
+            self._states[key] = state
+            name = state.get("prefix") or old.get("prefix") or key[1]
+            text = f"[{key[0]}] {name}\n" + "\n".join(changes)
+            await self._notify(list(sessions), text)
+
+    async def _notify(self, session_origins: List[str], text: str):
+        for session_origin in session_origins:
+            try:
+                await self.notifier(session_origin, text)
+            except Exception as e:
+                logger.warning(f"发送服务器订阅通知失败: {session_origin}，{e}")
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Dict, List
+
+import heapq
+
+# 排序参数 -> 数据字段，time会按武器/载具替换为对应的使用时间字段
+SORT_METRICS = {
+    "kills": "kills",
+    "kpm": "killsPerMinute",
+    "acc": "accuracy",
+    "hs": "headshots",
+    "time": None,
+}
+DEFAULT_SORT = "kills"
+
+
+def to_number(value) -> float:
+    """将数值或"12.5%"形式的字符串转为数字"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.rstrip("%"))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+class StatIndex:
+    """武器/载具列表的排序索引，每个指标的数值列只在第一次使用时计算"""
+
+    def __init__(self, items: List[dict], time_field: str):
+        """
+        Args:
+            items: 武器或载具列表
+            time_field: 使用时间字段(timeEquipped/timeIn)
+        """
+        self.items = items
+        self.time_field = time_field
+        # 只索引有击杀的条目，与原先的展示规则一致
+        self._candidates = [i for i, item in enumerate(items) if item.get("kills", 0) > 0]
+        self._columns: Dict[str, List[float]] = {}
+
+    def _column(self, field: str) -> List[float]:
+        column = self._columns.get(field)
+        if column is None:
+            column = [to_number(item.get(field)) for item in self.items]
+            self._columns[field] = column
+        return column
+
+    def top_n(self, sort: str, n: int) -> List[dict]:
+        """
+        按指标取前n个条目(降序)
+        Args:
+            sort: 排序参数，见SORT_METRICS
+            n: 数量
+        Returns:
+            原列表中的条目，不做复制
+        """
+        field = SORT_METRICS.get(sort, SORT_METRICS[DEFAULT_SORT]) or self.time_field
+        column = self._column(field)
+        # 指标相同时按击杀数排序
+        kills = self._column("kills")
+        top = heapq.nlargest(
+            n, self._candidates, key=lambda i: (column[i], kills[i])
+        )
+        return [self.items[i] for i in top]
+
+
+# 最近使用的索引，按列表对象缓存，同一份玩家数据重复查询时无需重建
+_INDEX_CACHE: "OrderedDict[int, StatIndex]" = OrderedDict()
+_INDEX_CACHE_SIZE = 64
+
+
+def get_index(items: List[dict], time_field: str) -> StatIndex:
+    """获取列表的排序索引，同一个列表对象只构建一次"""
+    key = id(items)
+    index = _INDEX_CACHE.get(key)
+    # 索引持有列表引用，id不会被复用，但仍校验是否为同一对象
+    if index is not None and index.items is items:
+        _INDEX_CACHE.move_to_end(key)
+        return index
+    index = StatIndex(items, time_field)
+    _INDEX_CACHE[key] = index
+    while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+        _INDEX_CACHE.popitem(last=False)
+    return index
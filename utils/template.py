@@ -1,6 +1,11 @@
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from astrbot.api import logger
+from data.plugins.astrbot_plugin_battlefield_tool.utils.statIndex import (
+    DEFAULT_SORT,
+    get_index,
+    to_number,
+)
 
 import time
 
@@ -28,56 +33,104 @@ LOGOS = {"bf3": BF3_LOGO, "bf4": BF4_LOGO, "bf1": BF1_LOGO, "bfv": BFV_LOGO}
 # 默认头像
 DEFAULT_AVATAR = "https://s21.ax1x.com/2025/07/16/pV1Ox6e.jpg"
 
-# 创建Jinja2环境并设置模板加载路径
+# 创建Jinja2环境并设置模板加载路径，模板在首次使用时才编译
+# 关闭auto_reload，已加载的模板不再检查文件修改时间，修改模板后需重载插件
 template_dir = PARENT_FOLDER / "template"
-env = Environment(loader=FileSystemLoader(template_dir))
+env = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
 
-MAIN_TEMPLATE = env.get_template("template.html")
-WEAPONS_TEMPLATE = env.get_template("template_weapons.html")
-VEHICLES_TEMPLATE = env.get_template("template_vehicles.html")
-SERVERS_TEMPLATE = env.get_template("template_servers.html")
-WEAPON_CARD = env.get_template("weapon_card.html")
-VEHICLE_CARD = env.get_template("vehicle_card.html")
-SERVER_CARD = env.get_template("server_card.html")
+# 预编译的Tailwind CSS，由 scripts/build_tailwind_css.py 生成，内联到页面中渲染时无需联网
+TAILWIND_CSS_PATH = template_dir / "tailwind.css"
+if TAILWIND_CSS_PATH.exists():
+    TAILWIND_CSS = TAILWIND_CSS_PATH.read_text(encoding="utf-8")
+else:
+    logger.warning(f"未找到预编译的Tailwind CSS: {TAILWIND_CSS_PATH}，将使用CDN")
+    TAILWIND_CSS = ""
 
+MAIN_TEMPLATE = "template.html"
+WEAPONS_TEMPLATE = "template_weapons.html"
+VEHICLES_TEMPLATE = "template_vehicles.html"
+SERVERS_TEMPLATE = "template_servers.html"
+COMPARE_TEMPLATE = "template_compare.html"
 
-def sort_list_of_dicts(list_of_dicts, key):
-    """降序排序"""
-    return sorted(list_of_dicts, key=lambda k: k[key], reverse=True)
 
+def configure_bytecode_cache(cache_dir: Path):
+    """
+    把编译后的模板字节码保存到插件数据目录，插件重载后无需重新编译
+    Args:
+        cache_dir: 缓存目录，模板内容变化时缓存自动失效
+    """
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"无法创建模板缓存目录: {cache_dir}，{e}")
+        return
+    env.bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+
+
+def get_template(name: str):
+    """返回模板，首次使用时编译(有字节码缓存时直接载入)，之后使用Jinja内部缓存"""
+    return env.get_template(name)
 
-def prepare_weapons_data(d: dict, lens: int,game:str):
+
+def prepare_weapons_data(d: dict, lens: int,game:str, sort: str = DEFAULT_SORT):
     """提取武器数据，格式化使用时间"""
-    weapons_list = d["weapons"]
-    weapons_list = sort_list_of_dicts(weapons_list, "kills")
+    # bf4的武器使用时间不展示(显示为0)，按时间排序没有意义，改为按击杀排序
+    if game == "bf4" and sort == "time":
+        sort = DEFAULT_SORT
+    weapons_list = get_index(d["weapons"], "timeEquipped").top_n(sort, lens)
     if game == "bf4":
         return [
             {**w, "__timeEquippedHours": 0, "timeEquipped": 0}
-            for w in weapons_list[:lens]
-            if  w.get("kills", 0) > 0
+            for w in weapons_list
         ]
     else:
         return [
             {**w, "__timeEquippedHours": round(w.get("timeEquipped", 0) / 3600, 2)}
-            for w in weapons_list[:lens]
-            if  w.get("kills", 0) > 0
+            for w in weapons_list
         ]
 
-def prepare_vehicles_data(d: dict, lens: int):
+def prepare_vehicles_data(d: dict, lens: int, sort: str = DEFAULT_SORT):
     """提取载具数据，格式化使用时间"""
-    vehicles_list = d["vehicles"]
-    vehicles_list = sort_list_of_dicts(vehicles_list, "kills")
+    vehicles_list = get_index(d["vehicles"], "timeIn").top_n(sort, lens)
     return [
         {
             **w,
             "__timeInHour": round(w.get("timeIn", 0) / 3600, 2),
             "image": SU_50 if w.get("vehicleName", "").lower() == "su-50" else w.get("image", "")
         }
-        for w in vehicles_list[:lens]
-        if  w.get("kills", 0) > 0
+        for w in vehicles_list
     ]
 
 
+def prepare_main_data(d: dict):
+    """整理主页面用到的玩家基本数据"""
+    if d.get("avatar") is None:
+        d["avatar"] = DEFAULT_AVATAR
+    d["__hoursPlayed"] = round(d["secondsPlayed"] / 3600, 2)
+    d["revives"] = int(d["revives"])
+    d["longestHeadShot"] = int(d["longestHeadShot"])
+
+
+# 对比页面展示的指标: (字段, 名称, 单位)，数值越大越好
+COMPARE_STATS = [
+    ("kills", "击杀", ""),
+    ("killDeath", "K/D", ""),
+    ("killsPerMinute", "KPM", ""),
+    ("headshots", "爆头率", ""),
+    ("accuracy", "命中率", ""),
+    ("revives", "拉人数", ""),
+    ("longestHeadShot", "最远爆头", "m"),
+    ("wins", "胜利场数", ""),
+    ("highestKillStreak", "最高连杀", ""),
+    ("__hoursPlayed", "游戏时间", "h"),
+]
+
+
+def format_update_time(d: dict) -> str:
+    """格式化数据更新时间"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(d["__update_time"]))
+
+
 def bf_main_html_builder(d, game):
     """
     构建主要html
@@ -88,18 +141,16 @@ def bf_main_html_builder(d, game):
         构建的Html
     """
     banner = BANNERS[game]
-    if d.get("avatar") is None:
-        d["avatar"] = DEFAULT_AVATAR
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(d["__update_time"]))
-    d["__hoursPlayed"] = round(d["secondsPlayed"] / 3600, 2)
-    d["revives"] = int(d["revives"])
-    d["longestHeadShot"] = int(d["longestHeadShot"])
+    update_time = format_update_time(d)
+    prepare_main_data(d)
 
     # 整理数据
-    weapon_data = prepare_weapons_data(d, 5,game)
-    vehicle_data = prepare_vehicles_data(d, 5)
+    sort = d.get("__sort", DEFAULT_SORT)
+    weapon_data = prepare_weapons_data(d, 5,game, sort)
+    vehicle_data = prepare_vehicles_data(d, 5, sort)
 
-    html = MAIN_TEMPLATE.render(
+    html = get_template(MAIN_TEMPLATE).render(
+        tailwind_css=TAILWIND_CSS,
         banner=banner,
         update_time=update_time,
         d=d,
@@ -122,12 +173,13 @@ def bf_weapons_html_builder(d, game):
     banner = BANNERS[game]
     if d.get("avatar") is None:
         d["avatar"] = DEFAULT_AVATAR
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(d["__update_time"]))
+    update_time = format_update_time(d)
 
     # 整理数据
-    weapon_data = prepare_weapons_data(d, 50,game)
+    weapon_data = prepare_weapons_data(d, 50,game, d.get("__sort", DEFAULT_SORT))
 
-    html = WEAPONS_TEMPLATE.render(
+    html = get_template(WEAPONS_TEMPLATE).render(
+        tailwind_css=TAILWIND_CSS,
         banner=banner,
         update_time=update_time,
         d=d,
@@ -149,12 +201,13 @@ def bf_vehicles_html_builder(d, game):
     banner = BANNERS[game]
     if d.get("avatar") is None:
         d["avatar"] = DEFAULT_AVATAR
-    update_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(d["__update_time"]))
+    update_time = format_update_time(d)
 
     # 整理数据
-    vehicle_data = prepare_vehicles_data(d, 50)
+    vehicle_data = prepare_vehicles_data(d, 50, d.get("__sort", DEFAULT_SORT))
 
-    html = VEHICLES_TEMPLATE.render(
+    html = get_template(VEHICLES_TEMPLATE).render(
+        tailwind_css=TAILWIND_CSS,
         banner=banner,
         update_time=update_time,
         d=d,
@@ -175,11 +228,10 @@ def bf_servers_html_builder(servers_data, game):
     """
     banner = BANNERS[game]
     logo = LOGOS[game]
-    update_time = time.strftime(
-        "%Y-%m-%d %H:%M:%S", time.localtime(servers_data["__update_time"])
-    )
+    update_time = format_update_time(servers_data)
 
-    html = SERVERS_TEMPLATE.render(
+    html = get_template(SERVERS_TEMPLATE).render(
+        tailwind_css=TAILWIND_CSS,
         banner=banner,
         logo=logo,
         update_time=update_time,
@@ -187,3 +239,46 @@ def bf_servers_html_builder(servers_data, game):
         game=game,
     )
     return html
+
+
+def bf_compare_html_builder(compare_data, game):
+    """
+    构建玩家对比html
+    Args:
+        compare_data: {"players": [每名玩家的数据], "__update_time": 更新时间}
+        game: 所查询的游戏
+    Returns:
+        构建的Html
+    """
+    banner = BANNERS[game]
+    update_time = format_update_time(compare_data)
+    players = compare_data["players"]
+    for d in players:
+        prepare_main_data(d)
+
+    # 每项指标标出最高的玩家
+    stats = []
+    for field, label, unit in COMPARE_STATS:
+        values = [d.get(field) for d in players]
+        numbers = [to_number(v) for v in values]
+        best = max(numbers)
+        stats.append(
+            {
+                "label": label,
+                "unit": unit,
+                "cells": values,
+                "best": [i for i, n in enumerate(numbers) if n == best and n > 0],
+            }
+        )
+    weapon_data = [prepare_weapons_data(d, 3, game) for d in players]
+
+    html = get_template(COMPARE_TEMPLATE).render(
+        tailwind_css=TAILWIND_CSS,
+        banner=banner,
+        update_time=update_time,
+        players=players,
+        stats=stats,
+        weapon_data=weapon_data,
+        game=game,
+    )
+    return html
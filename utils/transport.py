@@ -0,0 +1,89 @@
+from typing import Optional
+from astrbot.api import logger
+
+import aiohttp
+
+try:  # aiohttp需要安装Brotli才能解压br编码的响应
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+
+class GametoolsTransport:
+    """插件共用的HTTP连接池，统一管理aiohttp会话的创建和关闭"""
+
+    def __init__(
+        self,
+        limit: int = 64,
+        limit_per_host: int = 16,
+        keepalive_timeout: float = 60,
+        dns_cache_ttl: int = 300,
+    ):
+        """
+        Args:
+            limit: 连接池总连接数上限
+            limit_per_host: 单个地址的连接数上限
+            keepalive_timeout: 空闲连接保持时间(秒)
+            dns_cache_ttl: DNS缓存时间(秒)
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """获取共用会话，未创建或已关闭时新建(需在事件循环中调用)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Accept-Encoding": ACCEPT_ENCODING},
+                auto_decompress=True,
+            )
+            logger.debug(f"Battlefield Tool 创建HTTP连接池，Accept-Encoding: {ACCEPT_ENCODING}")
+        return self._session
+
+    def stats(self) -> dict:
+        """返回连接池统计信息"""
+        if self._session is None or self._session.closed:
+            return {"open": False}
+        connector = self._session.connector
+        # aiohttp没有公开连接数接口，读取内部字段仅用于统计
+        acquired = getattr(connector, "_acquired", ())
+        idle = getattr(connector, "_conns", {})
+        return {
+            "open": True,
+            "limit": connector.limit,
+            "limit_per_host": connector.limit_per_host,
+            "in_use": len(acquired),
+            "idle": sum(len(conns) for conns in idle.values()),
+            "accept_encoding": ACCEPT_ENCODING,
+        }
+
+    async def close(self):
+        """关闭会话及连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_default_transport = GametoolsTransport()
+
+
+def get_transport() -> GametoolsTransport:
+    """返回插件共用的连接池"""
+    return _default_transport